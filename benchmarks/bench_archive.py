@@ -0,0 +1,74 @@
+"""对比先解压到磁盘再扫描与直接在内存中扫描压缩包的耗时
+
+用法: python benchmarks/bench_archive.py [--files 5000] [--workers 4]
+
+把生成的项目分别打包为zip和tar.gz，每种格式先解压到临时目录后扫描，再直接扫描压缩包，
+核对两者按包内路径得出的判定一致。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from scanner_core import PHPAuthScanner  # noqa: E402
+from scanner_results import relative_path  # noqa: E402
+
+
+def pack(project, archive):
+    if archive.endswith(".zip"):
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for dirpath, _, names in os.walk(project):
+                for name in names:
+                    path = os.path.join(dirpath, name)
+                    zf.write(path, os.path.relpath(path, project))
+    else:
+        with tarfile.open(archive, "w:gz") as tf:
+            tf.add(project, arcname=".")
+
+
+def verdicts(records):
+    return sorted((relative_path(r).replace(os.sep, "/"), r.verdict) for r in records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.set_defaults(files=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="扫描进程数（默认: %(default)s）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_archive_")
+    try:
+        project = os.path.join(root, "project")
+        manifest = corpus.generate_from_args(project, args)
+        scanner = PHPAuthScanner(workers=args.workers)
+        pattern = scanner.generate_matcher(manifest["keywords"])
+        for name in ("project.zip", "project.tar.gz"):
+            archive = os.path.join(root, name)
+            pack(project, archive)
+            extracted = os.path.join(root, "extracted")
+            started = time.perf_counter()
+            shutil.unpack_archive(archive, extracted)
+            expected = verdicts(scanner.iter_records([extracted], pattern))
+            unpacked = time.perf_counter() - started
+            shutil.rmtree(extracted)
+            started = time.perf_counter()
+            result = verdicts(scanner.iter_records([archive], pattern))
+            in_memory = time.perf_counter() - started
+            if result != expected:
+                raise SystemExit(f"直接扫描压缩包的判定与解压后扫描不一致: {name}")
+            print(f"{name:<16} {len(result)} 个文件  {os.path.getsize(archive) / 1e6:7.1f} MB  "
+                  f"解压后扫描 {unpacked:7.3f}s  直接扫描 {in_memory:7.3f}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
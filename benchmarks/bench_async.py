@@ -0,0 +1,77 @@
+"""在模拟的高延迟文件系统上对比顺序扫描与异步扫描的耗时
+
+用法: python benchmarks/bench_async.py [--files 500] [--latency 0.005] [--concurrency 8,32,128]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from latency import LatencyShim  # noqa: E402
+from scanner_core import VERDICT_ERROR, VERDICT_NO_AUTH, PHPAuthScanner  # noqa: E402
+
+
+async def collect(scanner, directories, pattern, **kwargs):
+    return [record async for record in scanner.aiter_records(directories, pattern, **kwargs)]
+
+
+def summarize(records, root):
+    no_auth = {os.path.relpath(r.path, root) for r in records if r.verdict == VERDICT_NO_AUTH}
+    errors = sum(1 for r in records if r.verdict == VERDICT_ERROR)
+    return no_auth, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.set_defaults(files=500)
+    parser.add_argument("--latency", type=float, default=0.005, help="每次打开文件的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.002, help="延迟的随机抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="瞬时错误概率")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="卡顿概率（用于测试超时）")
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--retries", type=int, default=0)
+    parser.add_argument("--concurrency", default="8,32,128", help="逗号分隔的并发数列表")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_async_")
+    try:
+        manifest = corpus.generate_from_args(root, args)
+        expected = set(manifest["no_auth"])
+        directories = manifest["controller_dirs"]
+        scanner = PHPAuthScanner(workers=1)
+        pattern = scanner.generate_matcher(manifest["keywords"])
+        print(f"语料: {manifest['files']} 个文件，每次打开延迟 {args.latency * 1000:.1f} ms")
+
+        def shim():
+            return LatencyShim(args.latency, args.jitter, args.error_rate, args.stall_rate,
+                               stall=(args.timeout or 1.0) * 2, seed=args.seed)
+
+        with shim():
+            start = time.perf_counter()
+            records = list(scanner.iter_records(directories, pattern))
+            baseline = time.perf_counter() - start
+        no_auth, errors = summarize(records, root)
+        print(f"顺序扫描      {baseline:8.2f}s  读取失败 {errors}  结果{'一致' if no_auth == expected else '不一致'}")
+
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            with shim():
+                start = time.perf_counter()
+                records = asyncio.run(collect(scanner, directories, pattern, concurrency=concurrency,
+                                              timeout=args.timeout, retries=args.retries))
+                elapsed = time.perf_counter() - start
+            no_auth, errors = summarize(records, root)
+            print(f"异步 并发{concurrency:<4} {elapsed:8.2f}s  加速 {baseline / elapsed:5.1f}x  "
+                  f"读取失败 {errors}  结果{'一致' if no_auth == expected else '不一致'}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""对比普通扫描与追踪include/继承关系的扫描耗时，并验证依赖图解析随文件数线性增长
+
+用法: python benchmarks/bench_graph.py [--files 5000] [--inherited-ratio 0.5] [--chain 1000 10000 100000]
+
+第二部分生成首尾相连的include环（环上只有一个文件含鉴权代码），每个文件都要经过整个环才能确定结论，
+用于观察最坏情况下每个文件的平均解析耗时是否保持不变。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from bench_scan import timed  # noqa: E402
+from scanner_core import VERDICT_INHERITED, VERDICT_NO_AUTH, PHPAuthScanner  # noqa: E402
+
+
+def write_include_ring(root, count, keyword):
+    """生成count个首尾相连互相include的文件，只有第一个文件含鉴权代码"""
+    for i in range(count):
+        with open(os.path.join(root, f"ring{i}.php"), "w", encoding="utf-8") as f:
+            f.write(f"<?php\ninclude 'ring{(i + 1) % count}.php';\n")
+            if i == 0:
+                f.write(f"${keyword} = $_SESSION['{keyword}'] ?? null;\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.set_defaults(files=5000, inherited_ratio=0.5)
+    parser.add_argument("--workers", type=int, default=1, help="扫描进程数（默认: %(default)s）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最短耗时（默认: %(default)s）")
+    parser.add_argument("--chain", type=int, nargs="*", default=[1000, 10000, 100000],
+                        help="include环的文件数（默认: %(default)s）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_graph_")
+    try:
+        # 1. ThinkPHP语料：部分控制器继承公共基类或include公共文件
+        manifest = corpus.generate_from_args(os.path.join(root, "project"), args)
+        directories = manifest["controller_dirs"]
+        expected = {os.path.join(manifest["root"], p) for p in manifest["inherited"]}
+        print(f"语料: {manifest['files']} 个文件 {manifest['bytes'] / 1e6:.1f} MB，"
+              f"直接匹配未鉴权 {len(manifest['no_auth'])} 个，其中 {len(expected)} 个经由继承/include获得鉴权")
+        baseline = None
+        for follow in (False, True):
+            scanner = PHPAuthScanner(workers=args.workers, follow_includes=follow)
+            matcher = scanner.generate_matcher(manifest["keywords"])
+            seconds, records = timed(lambda: list(scanner.iter_records(directories, matcher)), args.repeat)
+            baseline = baseline or seconds
+            inherited = {os.path.abspath(r.path) for r in records if r.verdict == VERDICT_INHERITED}
+            no_auth = sum(1 for r in records if r.verdict == VERDICT_NO_AUTH)
+            line = f"扫描 {'追踪依赖' if follow else '直接匹配'} {seconds:8.3f}s  {seconds / baseline:5.2f}x  未鉴权 {no_auth}"
+            if follow:
+                graph = scanner.auth_graph
+                line += (f"  识别间接鉴权 {len(inherited & {os.path.abspath(p) for p in expected})}/{len(expected)}"
+                         f"  依赖图 {graph.nodes} 个文件 {graph.edges} 条依赖  额外读取 {graph.files_read} 个文件")
+            print(line)
+
+        # 2. 最坏情况：所有文件在同一个include环中
+        keyword = manifest["keywords"][0]
+        for count in args.chain:
+            ring = os.path.join(root, f"ring{count}")
+            os.makedirs(ring)
+            write_include_ring(ring, count, keyword)
+            scanner = PHPAuthScanner(follow_includes=True)
+            matcher = scanner.generate_matcher([keyword])
+            started = time.perf_counter()
+            records = list(scanner.iter_records([ring], matcher))
+            seconds = time.perf_counter() - started
+            inherited = sum(1 for r in records if r.verdict == VERDICT_INHERITED)
+            print(f"include环 {count:>7} 个文件  {seconds:8.3f}s  {seconds / count * 1e6:7.1f} 微秒/文件  "
+                  f"间接鉴权 {inherited}/{count - 1}")
+            shutil.rmtree(ring, ignore_errors=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
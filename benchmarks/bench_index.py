@@ -0,0 +1,78 @@
+"""对比修改关键词后重新完整扫描与由标识符索引得出判定的耗时
+
+用法: python benchmarks/bench_index.py [--files 20000] [--size-median 2] [--workers 4]
+
+先建立索引（首次扫描同时提取标识符），然后依次换用几组关键词，分别用普通扫描和索引得出结果，
+核对两者判定一致，并给出索引直接回答和需要读取确认的文件数。
+
+单核测试机上 --files 100000 测得由索引得出判定需1.1～1.4秒（session, auth 为1.23秒，
+checkLogin, isLogin, AdminBase 为1.10秒），其中遍历目录和读取文件状态约0.9秒，未稳定达到1秒以内。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from scanner_core import PHPAuthScanner  # noqa: E402
+from scanner_index import IdentifierIndex  # noqa: E402
+from scanner_rules import BUILTIN_PACKS  # noqa: E402
+
+# 依次换用的关键词（第一组用于建立索引）
+KEYWORD_SETS = [
+    corpus.KEYWORDS,
+    ["session", "auth"],
+    ["checkLogin", "isLogin", "AdminBase"],
+    ["Auth::check", "$this->auth"],
+]
+
+
+def verdicts(records):
+    return sorted((r.path, r.verdict) for r in records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.set_defaults(files=20000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="扫描进程数（默认: %(default)s）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_index_")
+    try:
+        manifest = corpus.generate_from_args(root, args)
+        directories = manifest["controller_dirs"]
+        plain = PHPAuthScanner(workers=args.workers)
+        indexed = PHPAuthScanner(workers=args.workers)
+        indexed.index = IdentifierIndex(os.path.join(root, "index.sqlite3"))
+
+        started = time.perf_counter()
+        files = sum(1 for _ in indexed.iter_records(directories, indexed.generate_matcher(KEYWORD_SETS[0])))
+        print(f"建立索引 {files} 个文件  {time.perf_counter() - started:8.3f}s  "
+              f"索引文件 {os.path.getsize(indexed.index.path) / 1e6:.1f} MB")
+
+        cases = [(", ".join(keywords), keywords, ()) for keywords in KEYWORD_SETS[1:]]
+        cases.append(("laravel 规则包", [], [BUILTIN_PACKS["laravel"]]))
+        for label, keywords, packs in cases:
+            started = time.perf_counter()
+            expected = verdicts(plain.iter_records(directories, plain.generate_matcher(keywords, packs)))
+            full = time.perf_counter() - started
+            started = time.perf_counter()
+            result = verdicts(indexed.iter_records(directories, indexed.generate_matcher(keywords, packs)))
+            quick = time.perf_counter() - started
+            if result != expected:
+                raise SystemExit(f"索引得出的判定与完整扫描不一致: {label}")
+            stats = indexed.index_stats
+            print(f"{label:<32} 完整扫描 {full:7.3f}s  索引 {quick:7.3f}s  "
+                  f"直接回答 {stats['answered']} 个，读取确认 {stats['read']} 个")
+        indexed.index.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""对比 generate_regex 生成的正则与 KeywordMatcher 在关键词数量增长时的匹配耗时
+
+用法: python benchmarks/bench_matcher.py [--files 200] [--counts 50,100,200,500]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner_core import PHPAuthScanner  # noqa: E402
+
+
+def random_identifier(rng, length):
+    return rng.choice(string.ascii_letters) + ''.join(
+        rng.choice(string.ascii_letters + string.digits + '_') for _ in range(length - 1))
+
+
+def generate_files(rng, count, keywords):
+    """生成PHP文件内容，约一半文件包含某个关键词"""
+    files = []
+    for _ in range(count):
+        lines = ["<?php", "namespace app\\controller;", ""]
+        for _ in range(rng.randint(50, 400)):
+            name = random_identifier(rng, rng.randint(4, 12))
+            lines.append(f"    ${name} = $this->request->param('{name}');")
+        if rng.random() < 0.5:
+            keyword = rng.choice(keywords)
+            lines.insert(rng.randrange(3, len(lines)), f"    if (!${keyword.upper()}['uid']) {{ return; }}")
+        files.append("\n".join(lines))
+    return files
+
+
+def time_pattern(pattern, files):
+    start = time.perf_counter()
+    verdicts = [pattern.search(content) is None for content in files]
+    return time.perf_counter() - start, verdicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--counts', default='50,100,200,500')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    scanner = PHPAuthScanner()
+    print(f"{'关键词数':>8} {'正则(s)':>10} {'引擎(s)':>10} {'加速比':>8}")
+    for count in [int(c) for c in args.counts.split(',')]:
+        rng = random.Random(args.seed)
+        keywords = list(dict.fromkeys(random_identifier(rng, rng.randint(5, 12)) for _ in range(count)))
+        files = generate_files(rng, args.files, keywords)
+        regex_time, regex_verdicts = time_pattern(scanner.generate_regex(keywords), files)
+        matcher_time, matcher_verdicts = time_pattern(scanner.generate_matcher(keywords), files)
+        if regex_verdicts != matcher_verdicts:
+            raise SystemExit(f"判定结果不一致（关键词数 {count}）")
+        print(f"{count:>8} {regex_time:>10.3f} {matcher_time:>10.3f} {regex_time / matcher_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""对比文本解码匹配与原始字节匹配的CPU耗时和内存分配
+
+用法: python benchmarks/bench_reader.py [--files 2000] [--keep DIR]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner_core import PHPAuthScanner  # noqa: E402
+from scanner_reader import match_file  # noqa: E402
+
+KEYWORDS = ["session", "auth", "login", "AdminBase", "AuthBase"]
+
+
+def generate_corpus(root, count, seed):
+    """生成测试用PHP文件：大小从几KB到数百KB不等，部分带中文注释，约三成未鉴权"""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        lines = ["<?php", "namespace app\\controller;", ""]
+        for j in range(int(rng.lognormvariate(5.5, 1.0))):
+            if rng.random() < 0.1:
+                lines.append(f"    // 处理第{j}个参数，返回格式化后的结果")
+            lines.append(f"    $value{j} = $this->request->param('field{j}', '', 'trim');")
+        if rng.random() < 0.7:
+            lines.insert(rng.randrange(3, len(lines)), "    if (!Session::get('admin_id')) { return $this->error(); }")
+        path = os.path.join(root, f"Controller{i}.php")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        paths.append(path)
+    return paths
+
+
+def measure(paths, pattern, options):
+    """返回 (CPU秒, 判定列表)"""
+    start = time.process_time()
+    verdicts = [match_file(p, pattern, options)[0] for p in paths]
+    return time.process_time() - start, verdicts
+
+
+def measure_allocations(paths, pattern, options):
+    """返回 (单个文件的最大峰值分配字节数, 总峰值分配字节数)"""
+    worst = 0
+    tracemalloc.start()
+    for path in paths:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        match_file(path, pattern, options)
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - before)
+    total_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return worst, total_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", metavar="DIR", help="在指定目录生成并保留测试文件")
+    args = parser.parse_args()
+
+    root = args.keep or tempfile.mkdtemp(prefix="phpauth_bench_")
+    os.makedirs(root, exist_ok=True)
+    try:
+        paths = generate_corpus(root, args.files, args.seed)
+        total_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+        print(f"测试文件: {len(paths)} 个，共 {total_mb:.1f} MB")
+
+        pattern = PHPAuthScanner().generate_matcher(KEYWORDS)
+        results = {}
+        for name, binary in (("文本解码", False), ("原始字节", True)):
+            scanner = PHPAuthScanner(bytes_matching=binary)
+            options = scanner._read_options(pattern)
+            measure(paths, pattern, options)  # 预热文件系统缓存
+            cpu, verdicts = measure(paths, pattern, options)
+            worst, peak = measure_allocations(paths, pattern, options)
+            results[name] = verdicts
+            print(f"{name}: CPU {cpu:.3f}s ({total_mb / cpu:.1f} MB/s)，"
+                  f"单文件峰值分配 {worst / 1024:.1f} KB，整体峰值 {peak / 1024:.1f} KB")
+        if results["文本解码"] != results["原始字节"]:
+            raise SystemExit("两种模式的判定结果不一致")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""对比框架规则包编译为同一个匹配引擎与每个规则包单独匹配一遍的耗时
+
+用法: python benchmarks/bench_rules.py [--files 2000] [--repeat 3]
+
+语料与 bench_scan 相同，文件内容预先读入内存，只比较匹配本身（与扫描默认方式相同，直接匹配原始字节）；
+同时给出规则包首次编译与命中缓存的耗时。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from bench_scan import timed  # noqa: E402
+from scanner_rules import BUILTIN_PACKS, compile_matcher  # noqa: E402
+
+
+def verdicts(patterns, contents):
+    """每个文件依次用各匹配引擎查找，任一命中即为已鉴权"""
+    return [any(p.search_bytes(content) is not None for p in patterns) for content in contents]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最短耗时（默认: %(default)s）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_rules_")
+    try:
+        manifest = corpus.generate_from_args(root, args)
+        contents = []
+        for directory in manifest["controller_dirs"]:
+            for dirpath, _, names in os.walk(directory):
+                for name in names:
+                    with open(os.path.join(dirpath, name), "rb") as f:
+                        contents.append(f.read())
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    keywords = manifest["keywords"]
+    packs = list(BUILTIN_PACKS.values())
+    print(f"语料: {len(contents)} 个文件 {sum(map(len, contents)) / 1e6:.1f} MB，关键词 {len(keywords)} 个，"
+          f"规则包 {len(packs)} 个")
+
+    started = time.perf_counter()
+    combined = compile_matcher(packs, keywords)
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    cached = compile_matcher(packs, keywords)
+    again = time.perf_counter() - started
+    assert cached is combined
+    print(f"编译 首次 {first * 1e3:8.3f}ms  缓存命中 {again * 1e6:8.1f}微秒  共 {len(combined.keywords)} 个关键词")
+
+    separate = [compile_matcher([], keywords)] + [compile_matcher([pack]) for pack in packs]
+    cases = [
+        ("仅关键词", separate[:1]),
+        ("逐个规则包", separate),
+        ("合并规则包", [combined]),
+    ]
+    expected = None
+    baseline = None
+    for label, patterns in cases:
+        seconds, result = timed(lambda: verdicts(patterns, contents), args.repeat)
+        baseline = baseline or seconds
+        if label != cases[0][0]:
+            if expected is not None and result != expected:
+                raise SystemExit("合并规则包与逐个规则包的判定结果不一致")
+            expected = result
+        print(f"{label:<6} {seconds:8.3f}s  {seconds / baseline:5.2f}x  {len(patterns)} 遍  已鉴权 {sum(result)}")
+
+
+if __name__ == "__main__":
+    main()
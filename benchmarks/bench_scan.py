@@ -0,0 +1,200 @@
+"""分阶段测量扫描耗时：正则生成、目录遍历、文件读取、关键词匹配和端到端扫描
+
+用法: python benchmarks/bench_scan.py [--files 5000] [--output result.json] [--baseline old.json]
+
+结果保存为JSON，使用 --baseline 与之前版本的结果对比。
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from scanner_core import VERDICT_NO_AUTH, PHPAuthScanner  # noqa: E402
+from scanner_reader import decode_text  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb(who="self"):
+    """当前进程（或已结束的子进程）的峰值常驻内存，平台不支持时返回None"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # Linux以KB为单位，macOS以字节为单位
+    scale = 1 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss * scale / 1e6
+
+
+def git_revision():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        return subprocess.run(["git", "-C", root, "describe", "--always", "--dirty"],
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def timed(fn, repeat):
+    """重复执行取最短耗时，返回 (秒, 最后一次的返回值)"""
+    best = None
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def phase(seconds, files=None, nbytes=None, **extra):
+    result = {"seconds": round(seconds, 6), "peak_rss_mb": peak_rss_mb()}
+    if files is not None:
+        result["files"] = files
+        result["files_per_sec"] = round(files / seconds, 1) if seconds else None
+    if nbytes is not None:
+        result["mb_per_sec"] = round(nbytes / 1e6 / seconds, 2) if seconds else None
+    result.update(extra)
+    return result
+
+
+def run(manifest, args):
+    scanner = PHPAuthScanner(workers=1)
+    keywords = manifest["keywords"]
+    directories = manifest["controller_dirs"]
+    results = {}
+
+    # 1. 正则生成（清空re模块缓存，测量完整编译开销）
+    def build_regex():
+        re.purge()
+        return scanner.generate_regex(keywords)
+
+    seconds, regex = timed(build_regex, args.repeat)
+    results["generate_regex"] = phase(seconds)
+
+    def build_matcher():
+        re.purge()
+        return scanner.generate_matcher(keywords)
+
+    seconds, matcher = timed(build_matcher, args.repeat)
+    results["generate_matcher"] = phase(seconds)
+
+    # 2. 目录遍历
+    seconds, paths = timed(lambda: [p for d in directories for p in scanner.iter_php_files(d)], args.repeat)
+    results["enumerate"] = phase(seconds, files=len(paths))
+
+    # 3. 文件读取（只读取字节）与解码
+    def read_all():
+        data = []
+        for path in paths:
+            with open(path, "rb") as f:
+                data.append(f.read())
+        return data
+
+    seconds, raw = timed(read_all, args.repeat)
+    nbytes = sum(len(r) for r in raw)
+    results["read"] = phase(seconds, files=len(paths), nbytes=nbytes)
+    seconds, contents = timed(lambda: [decode_text(r) for r in raw], args.repeat)
+    results["decode"] = phase(seconds, files=len(paths), nbytes=nbytes)
+
+    # 4. 关键词匹配（内容已在内存中，只计算CPU开销）
+    for name, fn in (
+        ("match_regex", lambda: [regex.search(c) is None for c in contents]),
+        ("match_matcher", lambda: [matcher.search(c) is None for c in contents]),
+        ("match_matcher_bytes", lambda: [matcher.search_bytes(r) is None for r in raw]),
+    ):
+        seconds, _ = timed(fn, args.repeat)
+        results[name] = phase(seconds, files=len(paths), nbytes=nbytes)
+    del raw, contents
+
+    # 5. 端到端扫描（含遍历、读取、匹配；多进程时统计子进程峰值内存）
+    expected = set(manifest["no_auth"])
+    for workers in sorted({1, args.workers}):
+        scanner = PHPAuthScanner(workers=workers)
+
+        def scan():
+            return [r for r in scanner.iter_records(directories, matcher) if r.verdict == VERDICT_NO_AUTH]
+
+        seconds, found = timed(scan, args.repeat)
+        found = {os.path.relpath(r.path, manifest["root"]) for r in found}
+        if found != expected:
+            raise SystemExit(f"扫描结果与语料清单不一致（workers={workers}）")
+        results[f"scan_workers_{workers}"] = phase(
+            seconds, files=len(paths), nbytes=nbytes, children_peak_rss_mb=peak_rss_mb("children")
+        )
+    return results
+
+
+def compare(results, baseline):
+    """打印与基线结果的耗时对比"""
+    print("\n与基线对比（耗时比，<1 表示变快）:")
+    for name, current in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old and old.get("seconds"):
+            print(f"  {name:<22} {current['seconds'] / old['seconds']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="端到端扫描的进程数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数，取最短耗时")
+    parser.add_argument("--corpus", metavar="DIR", help="使用已生成的语料（corpus.py的输出目录）")
+    parser.add_argument("--output", metavar="FILE", help="保存JSON结果")
+    parser.add_argument("--baseline", metavar="FILE", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    root = args.corpus or tempfile.mkdtemp(prefix="phpauth_bench_")
+    try:
+        if args.corpus:
+            with open(os.path.join(root, "corpus.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        else:
+            manifest = corpus.generate_from_args(root, args)
+        print(f"语料: {manifest['files']} 个控制器文件，{manifest['bytes'] / 1e6:.1f} MB，"
+              f"{len(manifest['no_auth'])} 个未鉴权")
+        results = run(manifest, args)
+    finally:
+        if not args.corpus:
+            shutil.rmtree(root, ignore_errors=True)
+
+    for name, r in results.items():
+        rates = []
+        if r.get("files_per_sec"):
+            rates.append(f"{r['files_per_sec']:.0f} 文件/秒")
+        if r.get("mb_per_sec"):
+            rates.append(f"{r['mb_per_sec']:.1f} MB/秒")
+        rss = f"峰值RSS {r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else ""
+        print(f"{name:<22} {r['seconds'] * 1000:9.2f} ms  {'  '.join(rates)}  {rss}")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": {k: manifest[k] for k in ("files", "bytes", "seed", "params")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""对比反复启动命令行扫描与向常驻扫描服务提交请求的耗时
+
+用法: python benchmarks/bench_service.py [--files 5000] [--rounds 5] [--workers 4]
+
+每轮扫描前随机改动少量文件，分别用命令行（不带缓存和带 --cache）和扫描服务扫描同一目录，
+核对三者判定一致。命令行每次都要重新启动解释器、创建进程池和编译匹配引擎，扫描服务只读取有改动的文件。
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import corpus  # noqa: E402
+from scanner_service import ScanService, make_server  # noqa: E402
+
+
+def cli_scan(directories, keywords, workers, cache=None):
+    command = [sys.executable, os.path.join(ROOT, "scanner_cli.py"), *directories, "-k", *keywords,
+               "-w", str(workers), "-f", "jsonl", "--all", "-q"]
+    if cache is not None:
+        command += ["--cache", cache]
+    output = subprocess.run(command, capture_output=True, text=True, encoding="utf-8").stdout
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def service_scan(port, directories, keywords):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("POST", "/scan", json.dumps({"directories": directories, "keywords": keywords, "all": True}))
+    job = json.loads(conn.getresponse().read())
+    records, offset = [], 0
+    while True:
+        conn.request("GET", f"/jobs/{job['id']}?offset={offset}&wait=5")
+        data = json.loads(conn.getresponse().read())
+        records += data["records"]
+        offset = data["next_offset"]
+        if data["state"] not in ("queued", "running") and offset >= data["results"]:
+            conn.close()
+            return records
+
+
+def verdicts(records):
+    return sorted((os.path.join(r["directory"], r["path"]), r["verdict"]) for r in records)
+
+
+def touch_files(directories, count, rng):
+    """在随机挑选的文件末尾追加一行注释"""
+    files = [os.path.join(dirpath, name) for directory in directories
+             for dirpath, _, names in os.walk(directory) for name in names]
+    for path in rng.sample(files, min(count, len(files))):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n// touched\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.set_defaults(files=5000)
+    parser.add_argument("--rounds", type=int, default=5, help="扫描轮数（默认: %(default)s）")
+    parser.add_argument("--touch", type=int, default=20, help="每轮之间改动的文件数（默认: %(default)s）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="扫描进程数（默认: %(default)s）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_service_")
+    service = ScanService(workers=args.workers)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        manifest = corpus.generate_from_args(os.path.join(root, "project"), args)
+        directories = manifest["controller_dirs"]
+        keywords = manifest["keywords"]
+        cache = os.path.join(root, "cache.sqlite3")
+        rng = random.Random(args.seed)
+        totals = [0.0, 0.0, 0.0]
+        for n in range(args.rounds):
+            if n:
+                touch_files(directories, args.touch, rng)
+            elapsed = []
+            results = []
+            for scan in (lambda: cli_scan(directories, keywords, args.workers),
+                         lambda: cli_scan(directories, keywords, args.workers, cache),
+                         lambda: service_scan(server.server_address[1], directories, keywords)):
+                started = time.perf_counter()
+                results.append(verdicts(scan()))
+                elapsed.append(time.perf_counter() - started)
+            if not results[0] or results[1] != results[0] or results[2] != results[0]:
+                raise SystemExit(f"第 {n + 1} 轮扫描服务与命令行的判定不一致")
+            totals = [total + t for total, t in zip(totals, elapsed)]
+            print(f"第 {n + 1} 轮 {len(results[0])} 个文件  命令行 {elapsed[0]:7.3f}s  "
+                  f"命令行 --cache {elapsed[1]:7.3f}s  扫描服务 {elapsed[2]:7.3f}s")
+        print(f"合计 {args.rounds} 轮  命令行 {totals[0]:7.3f}s  命令行 --cache {totals[1]:7.3f}s  "
+              f"扫描服务 {totals[2]:7.3f}s")
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""在本机模拟多节点分片扫描：对比单次扫描与多个分片进程并行扫描再合并的耗时
+
+用法: python benchmarks/bench_shard.py [--files 20000] [--shards 4] [--workers 4]
+
+单次扫描使用 --workers 个进程；分片扫描同时启动 --shards 个命令行进程（每个 --shard I/N，
+各自使用 max(1, workers // shards) 个进程），全部结束后用 scanner_shard.py 合并，核对两者的判定一致。
+单机上两者的总进程数相同，耗时接近；分片的意义在于各节点可以放到不同机器上执行。
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import corpus  # noqa: E402
+
+CLI = os.path.join(ROOT, "scanner_cli.py")
+MERGE = os.path.join(ROOT, "scanner_shard.py")
+
+
+def verdicts(path):
+    with open(path, encoding="utf-8") as f:
+        return sorted((r["directory"], r["path"], r["verdict"]) for r in map(json.loads, f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.set_defaults(files=20000)
+    parser.add_argument("--shards", type=int, default=4, help="分片数（默认: %(default)s）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="扫描进程总数（默认: %(default)s）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_shard_")
+    try:
+        manifest = corpus.generate_from_args(os.path.join(root, "project"), args)
+        common = [*manifest["controller_dirs"], "-k", *manifest["keywords"], "-q"]
+
+        full = os.path.join(root, "full.jsonl")
+        started = time.perf_counter()
+        subprocess.run([sys.executable, CLI, *common, "-w", str(args.workers), "-f", "jsonl", "--all", "-o", full])
+        single = time.perf_counter() - started
+
+        partials = [os.path.join(root, f"part{i}.jsonl") for i in range(args.shards)]
+        workers = str(max(1, args.workers // args.shards))
+        started = time.perf_counter()
+        procs = [subprocess.Popen([sys.executable, CLI, *common, "-w", workers, "--shard", f"{i}/{args.shards}",
+                                   "-o", path], stdout=subprocess.DEVNULL)
+                 for i, path in enumerate(partials)]
+        for proc in procs:
+            proc.wait()
+        scanned = time.perf_counter() - started
+        merged = os.path.join(root, "merged.jsonl")
+        result = subprocess.run([sys.executable, MERGE, *partials, "-o", merged, "-q"])
+        sharded = time.perf_counter() - started
+        if result.returncode not in (0, 1) or verdicts(merged) != verdicts(full):
+            raise SystemExit("合并后的分片结果与单次扫描不一致")
+        counts = [sum(1 for _ in open(path, encoding="utf-8")) - 2 for path in partials]
+        print(f"{sum(counts)} 个文件  单次扫描 {single:7.3f}s  {args.shards} 个分片并行 {scanned:7.3f}s  "
+              f"含合并与覆盖核对 {sharded:7.3f}s  各分片文件数 {min(counts)}~{max(counts)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
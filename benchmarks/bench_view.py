@@ -0,0 +1,64 @@
+"""测量结果列表在不同结果数量下添加、过滤、排序和取出一屏可见行的耗时
+
+用法: python benchmarks/bench_view.py [--counts 10000 100000 400000] [--dirs 200] [--repeat 3]
+
+结果为合成数据（不读取文件），只衡量界面使用的数据模型：
+取一屏可见行的耗时应与结果总数无关，界面绘制的也始终只有这一屏。
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scan import timed  # noqa: E402
+from scanner_reader import VERDICT_ERROR, VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED  # noqa: E402
+from scanner_results import ScanRecord  # noqa: E402
+from scanner_view import SORT_PATH, ResultStore  # noqa: E402
+
+PAGE = 40  # 一屏的行数
+
+
+def make_records(count, dirs, seed=0):
+    rng = random.Random(seed)
+    verdicts = (VERDICT_NO_AUTH,) * 8 + (VERDICT_SUPPRESSED_CHANGED, VERDICT_ERROR)
+    records = []
+    for i in range(count):
+        directory = f"/srv/www/project/app/module{rng.randrange(dirs)}/controller"
+        records.append(ScanRecord(directory, f"{directory}/sub{i % 7}/File{i}.php", rng.choice(verdicts)))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10000, 100000, 400000], help="结果数量")
+    parser.add_argument("--dirs", type=int, default=200, help="目录数（默认: %(default)s）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最短耗时（默认: %(default)s）")
+    args = parser.parse_args()
+
+    for count in args.counts:
+        records = make_records(count, args.dirs)
+        store = ResultStore()
+
+        def add():
+            store.clear()
+            for record in records:
+                store.add(record)
+
+        def page():
+            # 依次取出分布在整个列表中的100屏
+            step = max(1, store.row_count() // 100)
+            for top in range(0, store.row_count(), step):
+                store.rows(top, top + PAGE)
+
+        added, _ = timed(add, args.repeat)
+        scroll, _ = timed(page, args.repeat)
+        filtered, _ = timed(lambda: store.set_view(prefix="sub3/", verdicts=(VERDICT_NO_AUTH,)), args.repeat)
+        ordered, _ = timed(lambda: store.set_view(sort=SORT_PATH), args.repeat)
+        print(f"{count:>8} 个结果  添加 {added:7.3f}s  过滤 {filtered:7.3f}s  排序 {ordered:7.3f}s  "
+              f"取一屏 {scroll / 100 * 1e6:7.1f}微秒")
+
+
+if __name__ == "__main__":
+    main()
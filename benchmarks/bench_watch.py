@@ -0,0 +1,72 @@
+"""对比监视模式下修改少量文件后的增量判定与重新完整扫描的耗时
+
+用法: python benchmarks/bench_watch.py [--files 5000] [--edits 1 10 100] [--poll-interval 0.2]
+
+每轮向若干文件追加一行代码，记录从写完文件到收到增量结果的延迟，
+以及其中重新判定所用的时间。默认使用inotify，指定 --poll-interval 时改为轮询。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from scanner_core import PHPAuthScanner  # noqa: E402
+from scanner_watch import ScanWatcher  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.set_defaults(files=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="扫描进程数（默认: %(default)s）")
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 10, 100], help="每轮修改的文件数")
+    parser.add_argument("--poll-interval", type=float, default=None, metavar="SECONDS", help="改为按该间隔轮询")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="phpauth_watch_")
+    try:
+        manifest = corpus.generate_from_args(root, args)
+        directories = manifest["controller_dirs"]
+        keyword = manifest["keywords"][0]
+        scanner = PHPAuthScanner(workers=args.workers)
+        pattern = scanner.generate_matcher(manifest["keywords"])
+
+        started = time.perf_counter()
+        full = sum(1 for _ in scanner.iter_records(directories, pattern))
+        print(f"完整扫描 {full} 个文件  {time.perf_counter() - started:8.3f}s")
+
+        watcher = ScanWatcher(scanner, directories, pattern, args.poll_interval)
+        try:
+            sum(1 for _ in watcher.iter_records())
+            files = sorted(watcher.records)
+            print(f"监视方式: {watcher.backend_name}")
+            for count in args.edits:
+                targets = files[:count]
+                started = time.perf_counter()
+                for i, path in enumerate(targets):
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(f"\n${keyword}{i} = 1;\n")
+                rescanned = 0
+                rescan = 0.0
+                deadline = time.perf_counter() + 10 + (args.poll_interval or 0) * 2
+                while rescanned < count and time.perf_counter() < deadline:
+                    watcher.wait(0.5)
+                    if watcher.last_rescan is not None:
+                        rescanned += watcher.last_rescan[0]
+                        rescan += watcher.last_rescan[1]
+                        watcher.last_rescan = None
+                latency = time.perf_counter() - started
+                print(f"修改 {count:>4} 个文件  收到结果 {latency * 1000:9.1f}ms  其中重新判定 {rescan * 1000:8.1f}ms")
+        finally:
+            watcher.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
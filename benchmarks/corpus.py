@@ -0,0 +1,242 @@
+"""生成ThinkPHP目录结构的合成PHP项目，供基准测试使用（完全离线，结果由随机种子决定）
+
+用法: python benchmarks/corpus.py OUTPUT_DIR [--files 10000] [--no-auth-ratio 0.2]
+"""
+import argparse
+import json
+import os
+import random
+
+KEYWORDS = ["session", "auth", "login", "AdminBase", "AuthBase"]
+
+# 填充代码使用的标识符，均不包含任何默认关键词
+WORDS = [
+    "user", "order", "goods", "page", "limit", "status", "param", "data", "list", "info",
+    "title", "content", "price", "category", "config", "result", "item", "total", "type", "name",
+]
+
+MODULES = ["admin", "api", "index", "shop", "member", "cms", "pay", "wechat"]
+
+# 未鉴权文件之外，每种鉴权写法的模板（{kw}为关键词）
+AUTH_TEMPLATES = [
+    "        if (!Session::get('{kw}_id')) {{ return $this->error('请先登录'); }}",
+    "        $uid = $_SESSION['{kw}'] ?? 0;",
+    "        $this->{kw}();",
+    "        require_once APP_PATH . 'common/{kw}.php';",
+    "        if (${kw} == 1) {{ $this->redirect('index/index'); }}",
+]
+
+# 未鉴权文件中只在注释里提到关键词的写法（纯文本匹配会误判为已鉴权）
+DECOY_TEMPLATES = [
+    "        // TODO: 这里还没有做{kw}校验",
+    "        /* 原来的{kw}检查已移到中间件（尚未完成） */",
+    "        # {kw} 暂时关闭",
+]
+
+# 公共鉴权文件（放在扫描目录之外），部分未鉴权控制器通过继承基类或include获得鉴权
+COMMON_FILES = {
+    "app/common/controller/Backend.php": (
+        "<?php\nnamespace app\\common\\controller;\n\nuse think\\Controller;\n\n"
+        "class Backend extends Controller\n{{\n    public function initialize()\n    {{\n{auth}\n    }}\n}}\n"
+    ),
+    "app/common/controller/ListBase.php": (
+        "<?php\nnamespace app\\common\\controller;\n\nclass ListBase extends Backend\n{{\n"
+        "    protected $pageSize = 20;\n}}\n"
+    ),
+    "app/common/common.php": "<?php\n{auth}\n",
+}
+
+CLASS_HEADERS = [
+    "class {name} extends AdminBase",
+    "class {name} extends AuthBase",
+    "class {name} extends Controller",
+]
+
+
+def _filler_line(rng, j):
+    a, b = rng.choice(WORDS), rng.choice(WORDS)
+    choice = rng.random()
+    if choice < 0.1:
+        return f"        // 处理第{j}个{a}参数，返回格式化后的{b}"
+    if choice < 0.4:
+        return f"        ${a}{j} = $this->request->param('{b}', '', 'trim');"
+    if choice < 0.7:
+        return f"        ${a}List = Db::name('{b}')->where('{a}_id', ${a}{j})->limit(10)->select();"
+    return f"        $this->assign('{a}', ${b}{j} ?? []);"
+
+
+def _controller_source(rng, name, target_size, authenticated, keyword_density, keywords, decoy=False,
+                       inherit=None, namespace="app\\controller"):
+    """生成单个控制器源码：target_size为目标字节数，keyword_density为鉴权文件中每行出现关键词的概率
+
+    decoy为True时在（未鉴权的）源码中插入一行提到关键词的注释；inherit为"extends"时继承公共基类，
+    为其他字符串时作为include语句插入到类定义之前。
+    """
+    header = ["<?php", f"namespace {namespace};", "", "use think\\Db;", "use think\\Controller;", ""]
+    if inherit == "extends":
+        header[4:5] = ["use app\\common\\controller\\ListBase;"]
+        header.append(f"class {name} extends ListBase")
+    elif inherit is not None:
+        header.extend([inherit, ""])
+        header.append(CLASS_HEADERS[2].format(name=name))
+    elif authenticated and rng.random() < 0.3:
+        header.append(rng.choice(CLASS_HEADERS[:2]).format(name=name))
+    else:
+        header.append(CLASS_HEADERS[2].format(name=name))
+    header.append("{")
+    body = []
+    size = sum(len(line) + 1 for line in header)
+    j = 0
+    while size < target_size:
+        if j % 20 == 0:
+            line = f"    public function {rng.choice(WORDS)}{j}()\n    {{"
+        elif j % 20 == 19:
+            line = "    }"
+        else:
+            line = _filler_line(rng, j)
+        body.append(line)
+        size += len(line.encode("utf-8")) + 1
+        j += 1
+    if authenticated:
+        # 至少一处鉴权代码，位置随机（影响命中后提前结束的收益）
+        hits = 1 + sum(1 for _ in body if rng.random() < keyword_density)
+        for _ in range(hits):
+            line = rng.choice(AUTH_TEMPLATES).format(kw=rng.choice(keywords))
+            body.insert(rng.randrange(len(body) + 1), line)
+    elif decoy:
+        line = rng.choice(DECOY_TEMPLATES).format(kw=rng.choice(keywords))
+        body.insert(rng.randrange(len(body) + 1), line)
+    return "\n".join(header + body + ["    }", "}", ""])
+
+
+def generate_project(root, files=2000, modules=4, size_median=6.0, size_sigma=0.9, max_size=2048.0,
+                     no_auth_ratio=0.2, keyword_density=0.002, extra_ratio=0.3, seed=1, keywords=KEYWORDS,
+                     decoy_ratio=0.0, inherited_ratio=0.0):
+    """生成ThinkPHP 5.x/6.x风格的项目，返回描述语料的清单字典
+
+    files: 控制器文件数  size_median/size_sigma/max_size: 文件大小的对数正态分布参数（KB）
+    no_auth_ratio: 未鉴权控制器的比例  extra_ratio: model/view/vendor等非控制器文件相对控制器的比例
+    decoy_ratio: 未鉴权控制器中只在注释里提到关键词的比例
+    inherited_ratio: 未鉴权控制器中通过继承公共基类或include公共文件获得鉴权的比例
+    """
+    rng = random.Random(seed)
+    modules = MODULES[:max(1, min(modules, len(MODULES)))]
+    controller_dirs = [os.path.join(root, "app", m, "controller") for m in modules]
+    for d in controller_dirs:
+        os.makedirs(d, exist_ok=True)
+    no_auth = []
+    decoys = []
+    inherited = []
+    if inherited_ratio > 0:
+        auth = AUTH_TEMPLATES[0].format(kw=keywords[0])
+        for relpath, template in COMMON_FILES.items():
+            path = os.path.join(root, *relpath.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8", newline="\n") as f:
+                f.write(template.format(auth=auth))
+    total_bytes = 0
+    for i in range(files):
+        directory = controller_dirs[i % len(controller_dirs)]
+        name = f"{rng.choice(WORDS).title()}{i}"
+        # 一部分控制器放在子目录中（多级控制器）
+        if rng.random() < 0.1:
+            directory = os.path.join(directory, rng.choice(WORDS))
+            os.makedirs(directory, exist_ok=True)
+        target = min(rng.lognormvariate(0, size_sigma) * size_median, max_size) * 1024
+        authenticated = rng.random() >= no_auth_ratio
+        # 比例为0时不消耗随机数，保证同一种子生成的语料与之前一致
+        decoy = not authenticated and decoy_ratio > 0 and rng.random() < decoy_ratio
+        inherit = None
+        if not authenticated and not decoy and inherited_ratio > 0 and rng.random() < inherited_ratio:
+            if rng.random() < 0.5:
+                inherit = "extends"
+            else:
+                common = os.path.relpath(os.path.join(root, "app", "common", "common.php"), directory)
+                inherit = f"require_once __DIR__ . '/{common.replace(os.sep, '/')}';"
+        # 命名空间与目录对应（ThinkPHP 6多应用模式）
+        namespace = "app\\" + os.path.relpath(directory, os.path.join(root, "app")).replace(os.sep, "\\")
+        source = _controller_source(rng, name, target, authenticated, keyword_density, keywords, decoy, inherit,
+                                    namespace)
+        path = os.path.join(directory, f"{name}.php")
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(source)
+        total_bytes += len(source.encode("utf-8"))
+        if not authenticated:
+            no_auth.append(os.path.relpath(path, root))
+        if decoy:
+            decoys.append(os.path.relpath(path, root))
+        if inherit is not None:
+            inherited.append(os.path.relpath(path, root))
+    # 非控制器文件：模型、模板和第三方依赖，用于衡量目录遍历与排除规则
+    for i in range(int(files * extra_ratio)):
+        kind = rng.choice(["model", "view", "vendor"])
+        if kind == "vendor":
+            directory = os.path.join(root, "vendor", rng.choice(WORDS), "src")
+        else:
+            directory = os.path.join(root, "app", rng.choice(modules), kind)
+        os.makedirs(directory, exist_ok=True)
+        ext = ".html" if kind == "view" else ".php"
+        with open(os.path.join(directory, f"{rng.choice(WORDS)}{i}{ext}"), "w", encoding="utf-8") as f:
+            f.write("<?php\n" + "\n".join(_filler_line(rng, j) for j in range(rng.randint(5, 80))) + "\n")
+    # 只有起始标签的空文件，不参与判断
+    with open(os.path.join(controller_dirs[0], "Empty.php"), "w", encoding="utf-8") as f:
+        f.write("<?php\n")
+    return {
+        "root": root,
+        "seed": seed,
+        "keywords": list(keywords),
+        "controller_dirs": controller_dirs,
+        "files": files,
+        "bytes": total_bytes,
+        "no_auth": sorted(no_auth),
+        "decoys": sorted(decoys),
+        "inherited": sorted(inherited),
+        "params": {
+            "modules": len(modules), "size_median_kb": size_median, "size_sigma": size_sigma,
+            "max_size_kb": max_size, "no_auth_ratio": no_auth_ratio,
+            "keyword_density": keyword_density, "extra_ratio": extra_ratio, "decoy_ratio": decoy_ratio,
+            "inherited_ratio": inherited_ratio,
+        },
+    }
+
+
+def add_arguments(parser):
+    """注册语料参数，供各基准脚本复用"""
+    parser.add_argument("--files", type=int, default=2000, help="控制器文件数（默认: %(default)s）")
+    parser.add_argument("--modules", type=int, default=4, help="应用模块数（默认: %(default)s）")
+    parser.add_argument("--size-median", type=float, default=6.0, help="文件大小中位数KB（默认: %(default)s）")
+    parser.add_argument("--size-sigma", type=float, default=0.9, help="文件大小对数标准差（默认: %(default)s）")
+    parser.add_argument("--max-file-kb", type=float, default=2048.0, help="单文件大小上限KB（默认: %(default)s）")
+    parser.add_argument("--no-auth-ratio", type=float, default=0.2, help="未鉴权文件比例（默认: %(default)s）")
+    parser.add_argument("--keyword-density", type=float, default=0.002,
+                        help="鉴权文件中每行额外出现关键词的概率（默认: %(default)s）")
+    parser.add_argument("--decoy-ratio", type=float, default=0.0,
+                        help="未鉴权文件中只在注释里提到关键词的比例（默认: %(default)s）")
+    parser.add_argument("--inherited-ratio", type=float, default=0.0,
+                        help="未鉴权文件中通过继承基类或include公共文件获得鉴权的比例（默认: %(default)s）")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def generate_from_args(root, args):
+    return generate_project(
+        root, files=args.files, modules=args.modules, size_median=args.size_median,
+        size_sigma=args.size_sigma, max_size=args.max_file_kb, no_auth_ratio=args.no_auth_ratio,
+        keyword_density=args.keyword_density, seed=args.seed, decoy_ratio=args.decoy_ratio,
+        inherited_ratio=args.inherited_ratio
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="生成目录")
+    add_arguments(parser)
+    args = parser.parse_args()
+    manifest = generate_from_args(args.output, args)
+    with open(os.path.join(args.output, "corpus.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"已生成 {manifest['files']} 个控制器文件（{manifest['bytes'] / 1e6:.1f} MB），"
+          f"其中 {len(manifest['no_auth'])} 个未鉴权")
+
+
+if __name__ == "__main__":
+    main()
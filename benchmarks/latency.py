@@ -0,0 +1,49 @@
+"""模拟高延迟文件系统，供异步扫描的基准测试和自动化测试使用
+
+在同一进程内替换scanner_reader中的open，为每次打开文件增加延迟，可选地注入瞬时错误和长时间卡顿。
+"""
+import random
+import threading
+import time
+
+import scanner_reader
+
+
+class LatencyShim:
+    """模拟高延迟文件系统：为scanner_reader中的每次文件打开增加延迟，可选地注入瞬时错误和长时间卡顿
+
+    用法:
+        with LatencyShim(latency=0.02):
+            ...  # 在此期间的扫描（同一进程内）都会变慢
+    """
+
+    def __init__(self, latency=0.01, jitter=0.0, error_rate=0.0, stall_rate=0.0, stall=1.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate  # 打开文件时抛出OSError的概率
+        self.stall_rate = stall_rate  # 打开文件时卡顿stall秒的概率，用于测试超时
+        self.stall = stall
+        self.opened = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _open(self, file, *args, **kwargs):
+        with self._lock:
+            self.opened += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            time.sleep(delay)
+            raise OSError(f"模拟的瞬时读取错误: {file}")
+        if roll < self.error_rate + self.stall_rate:
+            delay += self.stall
+        time.sleep(delay)
+        return open(file, *args, **kwargs)
+
+    def __enter__(self):
+        # scanner_reader中的open按模块全局名称查找，在此覆盖即可
+        scanner_reader.open = self._open
+        return self
+
+    def __exit__(self, *exc):
+        del scanner_reader.open
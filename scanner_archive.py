@@ -0,0 +1,352 @@
+import bz2
+import io
+import os
+import struct
+import tarfile
+import time
+import zipfile
+import zlib
+from contextlib import ExitStack
+
+from scanner_reader import VERDICT_ERROR, VERDICT_TOO_LARGE, PhaseTimer, match_stream
+from scanner_results import ScanRecord, make_record
+
+# 可以直接扫描的压缩包扩展名（实际格式按文件内容识别，.phar可以是原生、zip或tar格式）
+ARCHIVE_EXTENSIONS = ('.zip', '.phar', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# 压缩的tar只能顺序解压，成员内容在当前进程读出后随批次提交；尚未处理完的内容超过该字节数时先等待
+MAX_BUFFERED_BYTES = 64 * 1024 * 1024
+
+# 读取压缩包时可能出现的错误（格式损坏、解压失败等）
+ARCHIVE_ERRORS = (OSError, EOFError, ValueError, KeyError, zlib.error, zipfile.BadZipFile, tarfile.TarError,
+                  struct.error)
+
+# PHAR原生格式: 存根结束标记，以及成员的压缩标志
+_PHAR_HALT = b'__HALT_COMPILER();'
+_PHAR_GZ = 0x1000
+_PHAR_BZ2 = 0x2000
+
+# 可流式读取的成员压缩方式（使用zip的压缩方法编号）
+_STORED = 0
+_DEFLATED = 8
+_BZIP2 = 12
+
+# 流式读取成员时每次读取的字节数
+_READ_SIZE = 64 * 1024
+
+
+def is_archive(path):
+    """按扩展名判断是否为可以直接扫描的压缩包文件"""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+
+def member_path(archive, rel_path):
+    """压缩包成员在结果中的路径：拼接在压缩包路径之后，相对压缩包的路径即为包内路径"""
+    return os.path.join(archive, *rel_path.split('/'))
+
+
+def _clean_name(name):
+    """去掉包内路径开头的 ./ 和 /，统一使用/分隔"""
+    return '/'.join(part for part in name.replace('\\', '/').split('/') if part not in ('', '.'))
+
+
+class _ZipArchive:
+    """zip压缩包（含zip格式的phar）：成员位置来自中央目录，数据位于各成员的本地文件头之后"""
+
+    def __init__(self, path):
+        self._zip = zipfile.ZipFile(path)
+
+    def entries(self):
+        """产出 (包内名称, 解压后大小, 成员位置)，加密或压缩方式不支持流式读取的成员位置为None"""
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+            location = None
+            if info.compress_type in (_STORED, _DEFLATED, _BZIP2) and not info.flag_bits & 0x1:
+                location = (info.header_offset, info.compress_size, info.compress_type, True)
+            yield info.filename, info.file_size, location
+
+    def close(self):
+        self._zip.close()
+
+
+class _TarArchive:
+    """未压缩的tar（含tar格式的phar）：成员内容原样连续存放，可按偏移直接读取"""
+
+    def __init__(self, path):
+        self._tar = tarfile.open(path, 'r:')
+
+    def entries(self):
+        for info in self._tar:
+            if info.isfile():
+                # 稀疏文件的内容不连续存放，由tarfile读出
+                location = None if info.issparse() else (info.offset_data, info.size, _STORED, False)
+                yield info.name, info.size, location
+
+    def read(self, name):
+        return self._tar.extractfile(name).read()
+
+    def close(self):
+        self._tar.close()
+
+
+class _PharArchive:
+    """PHAR原生格式：PHP存根之后是成员清单，成员内容按清单顺序依次存放（可单独用zlib或bzip2压缩）"""
+
+    def __init__(self, path):
+        self._f = open(path, 'rb')
+        try:
+            self._members = self._parse()
+        except Exception:
+            self._f.close()
+            raise
+
+    def _find_halt(self):
+        """查找存根结束标记，返回清单开始的位置"""
+        f = self._f
+        tail = b''
+        consumed = 0
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                raise ValueError("不是有效的PHAR文件（未找到 __HALT_COMPILER();）")
+            window = tail + chunk
+            pos = window.find(_PHAR_HALT)
+            if pos >= 0:
+                offset = consumed - len(tail) + pos + len(_PHAR_HALT)
+                break
+            tail = window[-len(_PHAR_HALT):]
+            consumed += len(chunk)
+        # 标记之后可以跟 " ?>" 及一个换行（与PHP的解析规则一致）
+        f.seek(offset)
+        follow = f.read(5)
+        if follow[:3] in (b' ?>', b'\n?>'):
+            offset += 3
+            if follow[3:5] == b'\r\n':
+                offset += 2
+            elif follow[3:4] == b'\n':
+                offset += 1
+        return offset
+
+    def _parse(self):
+        f = self._f
+        offset = self._find_halt()
+        f.seek(offset)
+        manifest_length, = struct.unpack('<I', f.read(4))
+        manifest = f.read(manifest_length)
+        if len(manifest) != manifest_length:
+            raise ValueError("PHAR成员清单不完整")
+        count, = struct.unpack_from('<I', manifest, 0)
+        pos = 4 + 2 + 4  # 成员数、API版本、全局标志
+        alias_length, = struct.unpack_from('<I', manifest, pos)
+        pos += 4 + alias_length
+        metadata_length, = struct.unpack_from('<I', manifest, pos)
+        pos += 4 + metadata_length
+        data_offset = offset + 4 + manifest_length
+        members = {}
+        for _ in range(count):
+            name_length, = struct.unpack_from('<I', manifest, pos)
+            pos += 4
+            name = manifest[pos:pos + name_length].decode('utf-8', errors='replace')
+            pos += name_length
+            size, _, compressed_size, _, flags, metadata_length = struct.unpack_from('<6I', manifest, pos)
+            pos += 24 + metadata_length
+            # gz压缩的成员是不带头尾的deflate数据，与zip的deflate相同
+            method = _DEFLATED if flags & _PHAR_GZ else _BZIP2 if flags & _PHAR_BZ2 else _STORED
+            members[name] = (size, (data_offset, compressed_size, method, False))
+            data_offset += compressed_size
+        return members
+
+    def entries(self):
+        for name, (size, location) in self._members.items():
+            if not name.endswith('/'):
+                yield name, size, location
+
+    def close(self):
+        self._f.close()
+
+
+def _open_indexed(path):
+    """打开可按位置读取成员的压缩包（zip、未压缩的tar或PHAR原生格式），压缩的tar返回None"""
+    if zipfile.is_zipfile(path):
+        return _ZipArchive(path)
+    if tarfile.is_tarfile(path):
+        try:
+            return _TarArchive(path)
+        except tarfile.ReadError:
+            return None
+    return _PharArchive(path)
+
+
+def iter_members(archive, accept, max_file_size=None):
+    """按包内顺序产出需要扫描的成员 (包内名称, 包内路径, 大小, 内容, 成员位置)
+
+    accept(包内路径) 判断成员是否需要扫描（扩展名和包含/排除规则）。zip、未压缩的tar和phar只读取
+    成员清单，内容为None，由工作进程按成员位置 (偏移, 存储长度, 压缩方式, 是否从zip本地文件头开始)
+    打开压缩包流式读取；压缩的tar无法按位置读取，只能顺序解压，直接读出内容（超过max_file_size的不读取）。
+    """
+    source = _open_indexed(archive)
+    if source is None:
+        with tarfile.open(archive, 'r|*') as tar:
+            for info in tar:
+                rel_path = _clean_name(info.name)
+                if not info.isfile() or not accept(rel_path):
+                    continue
+                if max_file_size is not None and info.size > max_file_size:
+                    yield info.name, rel_path, info.size, None, None
+                    continue
+                yield info.name, rel_path, info.size, tar.extractfile(info).read(), None
+        return
+    try:
+        for name, size, location in source.entries():
+            rel_path = _clean_name(name)
+            if not accept(rel_path):
+                continue
+            data = None
+            if location is None and isinstance(source, _TarArchive):
+                data = source.read(name) if max_file_size is None or size <= max_file_size else None
+            yield name, rel_path, size, data, location
+    finally:
+        source.close()
+
+
+class _Slice(io.RawIOBase):
+    """压缩包文件中从start开始、长度为length的一段字节的只读视图（同一批次的成员共用一个已打开的文件）"""
+
+    def __init__(self, f, start, length):
+        self._f = f
+        self._start = start
+        self._length = length
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), self._length - self._pos)
+        if n <= 0:
+            return 0
+        self._f.seek(self._start + self._pos)
+        n = self._f.readinto(memoryview(b)[:n])
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._length}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+class _Inflater(io.RawIOBase):
+    """压缩成员的流式解压视图：每次只解压一块；向回seek时从头重新解压（只在命中后换算字符偏移等少数情况下发生）"""
+
+    def __init__(self, raw, new_decompressor):
+        self._raw = raw
+        self._new_decompressor = new_decompressor
+        self._restart()
+
+    def _restart(self):
+        self._raw.seek(0)
+        self._decompressor = self._new_decompressor()
+        self._buffer = b''
+        self._offset = 0
+        self._pos = 0
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        while self._offset >= len(self._buffer) and not self._eof:
+            chunk = self._raw.read(_READ_SIZE)
+            if chunk:
+                self._buffer = self._decompressor.decompress(chunk)
+            else:
+                self._eof = True
+                flush = getattr(self._decompressor, 'flush', None)
+                self._buffer = flush() if flush is not None else b''
+            self._offset = 0
+        n = min(len(b), len(self._buffer) - self._offset)
+        b[:n] = self._buffer[self._offset:self._offset + n]
+        self._offset += n
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("压缩成员不支持从末尾定位")
+        if offset < self._pos:
+            self._restart()
+        while self._pos < offset and self.read(min(offset - self._pos, _READ_SIZE)):
+            pass
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+def _open_member(f, location):
+    """按成员位置打开压缩包f中的成员，返回可seek的二进制流（内容边读边解压，不整体读入内存）"""
+    offset, length, method, local_header = location
+    if local_header:
+        # zip本地文件头中的文件名和扩展字段长度可能与中央目录不同，以本地文件头为准
+        f.seek(offset)
+        header = f.read(30)
+        if len(header) != 30 or header[:4] != b'PK\x03\x04':
+            raise ValueError("zip成员的本地文件头已损坏")
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        offset += 30 + name_length + extra_length
+    raw = _Slice(f, offset, length)
+    if method == _DEFLATED:
+        raw = _Inflater(raw, lambda: zlib.decompressobj(-15))
+    elif method == _BZIP2:
+        raw = _Inflater(raw, bz2.BZ2Decompressor)
+    return io.BufferedReader(raw, _READ_SIZE)
+
+
+def scan_members(archive, members, pattern, options):
+    """扫描一批压缩包成员（可在工作进程中执行），返回ScanRecord列表，路径见member_path
+
+    成员按位置从压缩包中流式读取并分块匹配，压缩包文件在本批次结束时关闭。
+    """
+    results = []
+    with ExitStack() as stack:
+        f = None
+        fallback = None
+        for name, rel_path, size, data, location in members:
+            file_path = member_path(archive, rel_path)
+            timer = PhaseTimer() if options.timing else None
+            started = time.perf_counter()
+            if options.max_file_size is not None and size > options.max_file_size:
+                results.append(ScanRecord(archive, file_path, VERDICT_TOO_LARGE, size=size))
+                continue
+            try:
+                if data is not None:
+                    stream = io.BytesIO(data)
+                elif location is not None:
+                    if f is None:
+                        f = stack.enter_context(open(archive, 'rb'))
+                    stream = _open_member(f, location)
+                else:
+                    # 加密或使用其他压缩方式的zip成员，交给zipfile读取
+                    if fallback is None:
+                        fallback = stack.enter_context(zipfile.ZipFile(archive))
+                    stream = fallback.open(name)
+                with stream:
+                    verdict, hit, size = match_stream(stream, size, pattern, options, timer=timer)
+                results.append(make_record(archive, file_path, verdict, hit, size, time.perf_counter() - started,
+                                           timer))
+            except Exception as e:
+                results.append(ScanRecord(archive, file_path, VERDICT_ERROR, error=str(e)))
+    return results
@@ -0,0 +1,131 @@
+import asyncio
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner_reader import VERDICT_ERROR, VERDICT_NO_AUTH, PhaseTimer, match_file
+from scanner_results import ScanRecord, make_record
+
+# 同时进行中的文件读取数，网络文件系统上每次打开文件都要等待往返延迟，并发数越高吞吐越高
+DEFAULT_CONCURRENCY = 32
+
+# 每次在线程池中遍历目录时取出的文件数
+WALK_CHUNK = 256
+
+_DONE = object()
+
+
+def _scan_one(directory, file_path, pattern, options):
+    """扫描单个文件（在线程池中执行）"""
+    timer = PhaseTimer() if options.timing else None
+    started = time.perf_counter()
+    verdict, hit, size = match_file(file_path, pattern, options, timer=timer)
+    return make_record(directory, file_path, verdict, hit, size, time.perf_counter() - started, timer)
+
+
+async def _scan_with_retry(loop, executor, directory, file_path, pattern, options, timeout, retries):
+    """带超时和重试的单文件扫描，最终失败时返回错误结果而不是抛出异常
+
+    超时只会放弃等待，线程池中的读取无法被中断，会继续占用线程直到系统调用返回。
+    """
+    error = None
+    for attempt in range(retries + 1):
+        future = loop.run_in_executor(executor, _scan_one, directory, file_path, pattern, options)
+        try:
+            return await (asyncio.wait_for(future, timeout) if timeout else future)
+        except asyncio.TimeoutError:
+            error = f"读取超时（{timeout} 秒）"
+        except OSError as e:
+            # 网络文件系统上的瞬时错误，重试
+            error = str(e)
+        except Exception as e:
+            return ScanRecord(directory, file_path, VERDICT_ERROR, error=str(e))
+    if retries:
+        error = f"{error}，已重试 {retries} 次"
+    return ScanRecord(directory, file_path, VERDICT_ERROR, error=error)
+
+
+async def iter_records_async(scanner, directories, pattern, concurrency=DEFAULT_CONCURRENCY,
+                             timeout=None, retries=0, executor=None):
+    """异步扫描多个目录，以异步生成器逐个产出ScanRecord（按完成顺序，不保证目录顺序）
+
+    最多concurrency个文件同时读取；消费方处理变慢时，已完成的结果最多积压concurrency条，
+    之后停止提交新的读取（背压）。不使用扫描缓存。
+    """
+    loop = asyncio.get_running_loop()
+    own_executor = executor is None
+    if own_executor:
+        # 额外一个线程用于目录遍历，避免被进行中的读取占满
+        executor = ThreadPoolExecutor(max_workers=concurrency + 1, thread_name_prefix="phpauth-io")
+    options = scanner._read_options(pattern)
+    resolve = scanner._keyword_resolver(pattern)
+    profile = scanner.profile
+    on_file_start = scanner.on_file_start
+    on_file_finish = scanner.on_file_finish
+    suppressions = scanner.suppressions
+    results = asyncio.Queue(maxsize=concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+    scanner.files_discovered = 0
+    if profile is not None:
+        profile.reset(scanner._pattern_keywords_of(pattern))
+
+    async def scan(directory, file_path):
+        try:
+            record = await _scan_with_retry(loop, executor, directory, file_path, pattern, options,
+                                            timeout, retries)
+            await results.put(record)
+        finally:
+            # 结果交给消费方之后才释放名额，积压的结果也计入并发上限
+            slots.release()
+
+    async def produce():
+        error = None
+        try:
+            for directory in directories:
+                files = iter(scanner.iter_php_files(directory))
+                while True:
+                    # 目录遍历在网络文件系统上同样受延迟影响，放到线程池中分批进行
+                    paths = await loop.run_in_executor(executor, list, itertools.islice(files, WALK_CHUNK))
+                    if not paths:
+                        break
+                    for file_path in paths:
+                        await slots.acquire()
+                        if on_file_start is not None:
+                            on_file_start(file_path)
+                        scanner.files_discovered += 1
+                        task = loop.create_task(scan(directory, file_path))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*list(tasks))
+        except Exception as e:
+            error = e
+        await results.put((_DONE, error))
+
+    producer = loop.create_task(produce())
+    try:
+        while True:
+            record = await results.get()
+            if isinstance(record, tuple) and record[0] is _DONE:
+                if record[1] is not None:
+                    raise record[1]
+                break
+            if resolve is not None and record.matched is not None and record.keyword is None:
+                record = record._replace(keyword=resolve(record.matched))
+            if suppressions is not None and record.verdict == VERDICT_NO_AUTH:
+                record = suppressions.apply(record)
+            if profile is not None:
+                profile.add_record(record)
+            if on_file_finish is not None:
+                on_file_finish(record)
+            yield record
+    finally:
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
+        if profile is not None:
+            profile.finish()
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# 缓存默认保存位置与容量上限（按文件条目计）
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".phpauthscanner", "scan_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 500000
+
+
+def new_hasher():
+    """创建内容摘要计算对象，可分块update"""
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_digest(data):
+    """计算文件内容摘要"""
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def pattern_fingerprint(source, flags=0):
+    """计算正则表达式指纹，正则生成规则变化时指纹随之变化"""
+    return hashlib.sha1(f"{flags}:{source}".encode("utf-8")).hexdigest()
+
+
+class ScanCache:
+    """持久化扫描缓存：按 路径+mtime+大小+内容摘要 记录每个关键词的匹配结论"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                skip INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS verdicts (
+                path TEXT NOT NULL,
+                unit TEXT NOT NULL,
+                matched INTEGER NOT NULL,
+                PRIMARY KEY (path, unit)
+            );
+            CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used);
+        """)
+
+    def lookup(self, file_path):
+        """查询文件记录，返回 (mtime_ns, size, digest, skip, {指纹: 是否匹配}) 或 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, digest, skip FROM files WHERE path = ?", (file_path,)
+            ).fetchone()
+            if row is None:
+                return None
+            verdicts = dict(self._conn.execute(
+                "SELECT unit, matched FROM verdicts WHERE path = ?", (file_path,)
+            ).fetchall())
+        return row[0], row[1], row[2], bool(row[3]), {unit: bool(m) for unit, m in verdicts.items()}
+
+    def touch(self, file_paths):
+        """刷新命中条目的使用时间，供淘汰策略使用"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE files SET last_used = ? WHERE path = ?", [(now, p) for p in file_paths]
+            )
+
+    def store(self, file_path, mtime_ns, size, digest, skip, verdicts, content_changed):
+        """写入文件记录；内容变化时清空该文件已有的关键词结论"""
+        with self._lock:
+            if content_changed:
+                self._conn.execute("DELETE FROM verdicts WHERE path = ?", (file_path,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest, skip, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (file_path, mtime_ns, size, digest, int(skip), time.time())
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO verdicts (path, unit, matched) VALUES (?, ?, ?)",
+                [(file_path, unit, int(matched)) for unit, matched in verdicts.items()]
+            )
+
+    def flush(self):
+        """提交写入并按最近使用时间淘汰超出上限的条目"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM verdicts WHERE path IN "
+                    "(SELECT path FROM files ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                self._conn.execute(
+                    "DELETE FROM files WHERE path IN "
+                    "(SELECT path FROM files ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+            self._conn.commit()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM verdicts")
+            self._conn.execute("DELETE FROM files")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        """提交并关闭缓存数据库"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,399 @@
+"""PHP鉴权代码扫描器 - 命令行模式（用于CI/CD流水线，不依赖任何GUI组件）
+
+用法示例:
+    python scanner_cli.py ./app/admin/controller ./app/api/controller -k session auth -w 4
+    python scanner_cli.py ./src --format jsonl > results.jsonl
+    python scanner_cli.py ./src --format sarif -o results.sarif
+    python scanner_cli.py /mnt/nfs/app --async 64 --timeout 10 --retries 2
+    python scanner_cli.py ./app --changed-from origin/main...HEAD --baseline baseline.jsonl
+    git diff --name-only HEAD~1 | python scanner_cli.py ./app --changed-list -
+    python scanner_cli.py ./app --suppress-import results.txt
+    python scanner_cli.py ./app --suppressions
+    python scanner_cli.py ./app --watch
+    python scanner_cli.py ./app/Http/Controllers --rules laravel
+    python scanner_cli.py ./src/Controller --rules auto ./rules/company.json --lexer comments
+    python scanner_cli.py ./app --index -k checkLogin isLogin
+    python scanner_cli.py ./tenants/*/app/controller --dedup
+    python scanner_cli.py customer_drop.zip release.tar.gz tool.phar
+    python scanner_cli.py ./repos --shard 0/4 -o part0.jsonl
+
+退出码: 0 未发现未鉴权文件，1 发现未鉴权文件（指定基线时只计基线之外新增的，已忽略但内容有改动的文件也计入），2 参数错误
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from scanner_archive import is_archive
+from scanner_async import DEFAULT_CONCURRENCY
+from scanner_cache import DEFAULT_CACHE_PATH, ScanCache
+from scanner_diff import git_changed_files, git_toplevel, in_baseline, load_baseline, read_path_list
+from scanner_core import (
+    DEFAULT_KEYWORDS, VERDICT_ERROR, VERDICT_INHERITED, VERDICT_NO_AUTH, VERDICT_SUPPRESSED, VERDICT_SUPPRESSED_CHANGED,
+    VERDICT_TOO_LARGE, PHPAuthScanner
+)
+from scanner_index import DEFAULT_INDEX_PATH, IdentifierIndex
+from scanner_lexer import LEXER_MODES
+from scanner_profile import DEFAULT_TOP_N, ScanProfile
+from scanner_results import FORMATS, open_writer
+from scanner_rules import BUILTIN_PACKS, detect_enclosing_packs, resolve_packs
+from scanner_shard import PartialWriter, parse_shard, shard_header
+from scanner_suppress import DEFAULT_SUPPRESSIONS_PATH, SuppressionIndex
+from scanner_walk import COMMON_EXCLUDES, DEFAULT_EXTENSIONS, FileWalker
+from scanner_watch import ScanWatcher
+
+EXIT_OK = 0
+EXIT_FOUND = 1
+EXIT_USAGE = 2
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="scanner_cli",
+        description="扫描PHP文件中缺少鉴权代码的文件（无界面模式）"
+    )
+    parser.add_argument("directories", nargs="+",
+                        help="要扫描的目录，或zip/tar(.gz/.bz2/.xz)/phar压缩包（在内存中扫描，不解压到磁盘）")
+    parser.add_argument("-k", "--keywords", nargs="+", default=DEFAULT_KEYWORDS,
+                        help="鉴权关键词（默认: %(default)s）")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="并行扫描进程数（默认: CPU核心数）")
+    parser.add_argument("-f", "--format", choices=["text", *FORMATS], default="text",
+                        help="输出格式（默认: %(default)s）")
+    parser.add_argument("-o", "--output", default=None, metavar="PATH",
+                        help="结果写入文件（默认输出到标准输出）")
+    parser.add_argument("--all", action="store_true",
+                        help="结构化格式下同时输出已鉴权和空文件的结果")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None, metavar="PATH",
+                        help="启用增量扫描缓存，可指定缓存文件路径")
+    parser.add_argument("--index", nargs="?", const=DEFAULT_INDEX_PATH, default=None, metavar="PATH",
+                        help="使用标识符索引（代替 --cache）：记录每个文件中的标识符，之后修改关键词时直接由索引得出判定，"
+                             "只读取有改动的文件和需要确认的少数文件，可指定索引文件路径")
+    parser.add_argument("-e", "--exclude", action="append", default=[], metavar="PATTERN",
+                        help="排除匹配的目录或文件（通配符，re:开头为正则），可重复指定")
+    parser.add_argument("--exclude-common", action="store_true",
+                        help=f"排除常见的非业务目录: {' '.join(COMMON_EXCLUDES)}")
+    parser.add_argument("-i", "--include", action="append", default=[], metavar="PATTERN",
+                        help="只扫描匹配的文件（通配符，re:开头为正则），可重复指定")
+    parser.add_argument("--ext", nargs="+", default=list(DEFAULT_EXTENSIONS), metavar="EXT",
+                        help="扫描的文件扩展名（默认: %(default)s）")
+    parser.add_argument("--follow-symlinks", action="store_true", help="进入符号链接指向的目录")
+    parser.add_argument("--max-size", type=int, default=None, metavar="BYTES",
+                        help="跳过超过该大小的文件（字节）")
+    parser.add_argument("--lexer", choices=LEXER_MODES, default=None,
+                        help="匹配前去除注释（comments），或同时去除字符串和标签外的HTML（strings），"
+                             "避免注释中的关键词被当作鉴权代码")
+    parser.add_argument("--rules", nargs="+", default=[], metavar="PACK",
+                        help=f"框架规则包，与关键词合并为一次匹配: {', '.join(BUILTIN_PACKS)}、规则包JSON文件路径，"
+                             "或 auto（按扫描目录所在项目自动识别）")
+    parser.add_argument("--dedup", action="store_true",
+                        help="内容完全相同的文件只评估一次（先按大小分组，只对大小相同的文件计算摘要），"
+                             "其余文件沿用其判定并注明内容相同的首个文件")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="分片扫描（拆到多台机器上执行）：只扫描按路径哈希分到第I个分片（共N个，从0开始）的文件，"
+                             "全部结果连同匹配规则指纹写入 -o 指定的分片结果文件，之后用 scanner_shard.py 合并")
+    parser.add_argument("--follow-includes", action="store_true",
+                        help="include/require的文件或父类中有鉴权代码时视为已鉴权（结果在全部扫描结束后输出）")
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument("--changed-from", metavar="REF",
+                         help="只扫描相对REF有改动的文件（git diff，可用 base...HEAD 表示合并请求的改动）")
+    changes.add_argument("--changed-list", metavar="FILE",
+                         help="只扫描列表中的文件（每行一个路径，- 表示从标准输入读取）")
+    parser.add_argument("--untracked", action="store_true", help="配合 --changed-from，同时扫描未纳入git的新文件")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="基线结果文件（save_results报告或jsonl/csv），只报告基线之外新增的未鉴权文件")
+    parser.add_argument("--suppressions", nargs="?", const=DEFAULT_SUPPRESSIONS_PATH, default=None, metavar="PATH",
+                        help="使用忽略列表，不再报告已确认无需鉴权的文件（内容有改动时仍会报告）")
+    parser.add_argument("--suppress-import", metavar="REPORT",
+                        help="把结果文件（save_results报告或jsonl/csv）中的未鉴权文件导入忽略列表后退出")
+    parser.add_argument("--async", dest="io_concurrency", nargs="?", type=int, const=DEFAULT_CONCURRENCY,
+                        default=None, metavar="N",
+                        help=f"异步读取模式（适用于NFS/SMB等网络文件系统），N为同时读取的文件数（默认: {DEFAULT_CONCURRENCY}）")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                        help="异步模式下单个文件的读取超时（秒）")
+    parser.add_argument("--retries", type=int, default=0, help="异步模式下读取超时或失败后的重试次数")
+    parser.add_argument("--watch", action="store_true",
+                        help="首次扫描后持续监视文件变化，只重新判定变化的文件，以 +/- 输出增量结果（Ctrl+C 退出）")
+    parser.add_argument("--poll-interval", type=float, default=None, metavar="SECONDS",
+                        help="监视模式改为按该间隔轮询（默认在Linux上使用inotify，网络文件系统上需要轮询）")
+    parser.add_argument("--profile", nargs="?", type=int, const=DEFAULT_TOP_N, default=None, metavar="N",
+                        help="扫描结束后输出分阶段耗时、最慢的N个文件和耗时最多的正则分支")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出读取错误和统计信息")
+    return parser
+
+
+def format_record(record):
+    """格式化单条文本结果"""
+    if record.verdict == VERDICT_ERROR:
+        return f"⚠️ 无法读取文件 {record.path}: {record.error}"
+    if record.verdict == VERDICT_TOO_LARGE:
+        return f"⚠️ 跳过过大文件 {record.path}: {record.size} 字节"
+    if record.verdict == VERDICT_SUPPRESSED_CHANGED:
+        return f"{record.path}（已忽略，但内容有改动）"
+    if record.duplicate_of is not None:
+        return f"{record.path}（与 {record.duplicate_of} 内容相同）"
+    return record.path
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    missing = [d for d in args.directories if not os.path.isdir(d) and not is_archive(d)]
+    if missing:
+        print(f"错误: 目录不存在: {', '.join(missing)}", file=sys.stderr)
+        return EXIT_USAGE
+    archives = [d for d in args.directories if is_archive(d)]
+
+    changed = None
+    baseline = None
+    try:
+        if args.changed_from:
+            changed = git_changed_files(args.changed_from, include_untracked=args.untracked)
+        elif args.changed_list:
+            # 相对路径按git仓库根目录解析（与 git diff --name-only 的输出一致），不在仓库中时按当前目录
+            base = git_toplevel()
+            if args.changed_list == "-":
+                changed = read_path_list(sys.stdin, base)
+            else:
+                with open(args.changed_list, encoding="utf-8") as f:
+                    changed = read_path_list(f, base)
+        if args.baseline:
+            baseline = load_baseline(args.baseline)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if baseline is not None:
+        ambiguous = baseline.ambiguous(args.directories)
+        if ambiguous:
+            shown = "、".join(ambiguous[:5]) + (" 等" if len(ambiguous) > 5 else "")
+            print(f"警告: 文本报告基线不含扫描目录，{len(ambiguous)} 个路径在多个扫描目录下都存在，"
+                  f"这些目录中的同名文件都将视为基线已有: {shown}（建议使用jsonl/csv基线）", file=sys.stderr)
+    if args.suppress_import:
+        suppressions = SuppressionIndex(args.suppressions or DEFAULT_SUPPRESSIONS_PATH)
+        try:
+            imported, not_found = suppressions.import_report(args.suppress_import, args.directories)
+            suppressions.save()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"错误: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        print(f"已导入 {imported} 个文件到忽略列表 {suppressions.path}（共 {len(suppressions)} 个），"
+              f"{not_found} 个文件未找到", file=sys.stderr)
+        return EXIT_OK
+    if changed is not None and args.io_concurrency:
+        print("错误: --async 不能与 --changed-from/--changed-list 同时使用", file=sys.stderr)
+        return EXIT_USAGE
+    if args.index and (args.cache or args.io_concurrency):
+        print("错误: --index 不能与 --cache、--async 同时使用", file=sys.stderr)
+        return EXIT_USAGE
+    if (args.follow_includes or args.dedup or args.cache) and args.io_concurrency:
+        print("错误: --async 不能与 --follow-includes、--dedup、--cache 同时使用", file=sys.stderr)
+        return EXIT_USAGE
+    if archives and (args.io_concurrency or args.watch or changed is not None):
+        print("错误: 压缩包不能与 --async、--watch、--changed-from/--changed-list 同时使用", file=sys.stderr)
+        return EXIT_USAGE
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            print(f"错误: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        if not args.output or args.format != "text" or args.watch or args.follow_includes or archives \
+                or changed is not None:
+            print("错误: --shard 需要用 -o 指定分片结果文件，且不能与 -f/--format、--watch、--follow-includes、"
+                  "--changed-from/--changed-list 及压缩包同时使用", file=sys.stderr)
+            return EXIT_USAGE
+    if args.watch and (args.io_concurrency or changed is not None or args.format != "text"):
+        print("错误: --watch 只能用于文本输出，且不能与 --async、--changed-from/--changed-list 同时使用",
+              file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        names = [name for name in args.rules if name != "auto"]
+        if "auto" in args.rules:
+            names += [pack.name for d in args.directories for pack in detect_enclosing_packs(d)]
+        packs = resolve_packs(names)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        walker = FileWalker(
+            extensions=args.ext,
+            exclude=args.exclude + (list(COMMON_EXCLUDES) if args.exclude_common else []),
+            include=args.include,
+            follow_symlinks=args.follow_symlinks,
+            shard=shard
+        )
+    except ValueError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    cache = ScanCache(args.cache) if args.cache else None
+    index = IdentifierIndex(args.index) if args.index else None
+    profile = ScanProfile(args.profile) if args.profile is not None else None
+    scanner = PHPAuthScanner(workers=args.workers, cache=cache, max_file_size=args.max_size, walker=walker,
+                             profile=profile, lexer=args.lexer, follow_includes=args.follow_includes)
+    scanner.index = index
+    scanner.dedup = args.dedup
+    if args.suppressions:
+        try:
+            scanner.suppressions = SuppressionIndex(args.suppressions)
+        except (OSError, ValueError) as e:
+            print(f"错误: 无法读取忽略列表: {e}", file=sys.stderr)
+            return EXIT_USAGE
+    pattern = scanner.generate_matcher(args.keywords, packs)
+    if packs and not args.quiet:
+        titles = ', '.join(f"{pack.title} v{pack.version}" for pack in packs)
+        print(f"规则包: {titles}（与关键词合并后共 {len(pattern.keywords)} 个）", file=sys.stderr)
+
+    watcher = ScanWatcher(scanner, args.directories, pattern, args.poll_interval) if args.watch else None
+    partial = None
+    if shard is not None:
+        # 分片结果文件记录该分片覆盖的全部文件，未鉴权文件仍逐条输出到标准输出
+        header = shard_header(*shard, args.directories, args.keywords, packs, pattern, scanner)
+        partial = PartialWriter(open(args.output, "w", encoding="utf-8"), header)
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output and partial is None else sys.stdout
+    writer = open_writer(args.format, output) if args.format != "text" else None
+    counts = {VERDICT_NO_AUTH: 0, VERDICT_SUPPRESSED_CHANGED: 0, VERDICT_ERROR: 0, VERDICT_TOO_LARGE: 0}
+    suppressed = 0
+    inherited = 0
+    known = 0
+
+    def reported(record):
+        """是否计入未鉴权结果（基线中已有的不计）"""
+        return record.verdict != VERDICT_NO_AUTH or baseline is None or not in_baseline(record, baseline)
+
+    def emit(record):
+        nonlocal known, suppressed, inherited
+        verdict = record.verdict
+        if partial is not None:
+            partial.write(record)
+        if verdict == VERDICT_SUPPRESSED:
+            suppressed += 1
+        elif verdict == VERDICT_INHERITED:
+            inherited += 1
+        if not reported(record):
+            # 基线中已有的未鉴权文件不再报告
+            known += 1
+            return
+        if verdict in counts:
+            counts[verdict] += 1
+        elif writer is None or not args.all:
+            return
+        if writer is not None:
+            writer.write(record)
+        elif verdict in (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED):
+            print(format_record(record), file=output, flush=True)
+        elif not args.quiet:
+            print(format_record(record), file=sys.stderr)
+
+    def emit_update(update):
+        """监视模式下输出一个文件的判定变化：+ 新出现的未鉴权文件，- 已加上鉴权或已删除的文件"""
+        for record, delta in ((update.previous, -1), (update.record, 1)):
+            if record is not None and record.verdict in counts and reported(record):
+                counts[record.verdict] += delta
+        flagged = (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED)
+        record, previous = update.record, update.previous
+        was = previous is not None and previous.verdict in flagged and reported(previous)
+        now = record is not None and record.verdict in flagged and reported(record)
+        if now:
+            print(f"+ {format_record(record)}", file=output, flush=True)
+        elif was:
+            print(f"- {previous.path}", file=output, flush=True)
+        elif record is not None and record.verdict in counts and not args.quiet:
+            print(format_record(record), file=sys.stderr)
+
+    def watch():
+        if not args.quiet:
+            found = counts[VERDICT_NO_AUTH] + counts[VERDICT_SUPPRESSED_CHANGED]
+            print(f"首次扫描完成: {found} 个文件未检测到鉴权代码，开始监视文件变化（{watcher.backend_name}），"
+                  f"按 Ctrl+C 退出", file=sys.stderr)
+        try:
+            for updates in watcher.watch():
+                for update in updates:
+                    emit_update(update)
+                if not args.quiet:
+                    files, seconds = watcher.last_rescan
+                    print(f"[{time.strftime('%H:%M:%S')}] {files} 个文件有变化，{len(updates)} 个判定改变，"
+                          f"用时 {seconds * 1000:.1f}ms", file=sys.stderr)
+        except KeyboardInterrupt:
+            pass
+
+    async def emit_async():
+        records = scanner.aiter_records(args.directories, pattern, args.io_concurrency, args.timeout, args.retries)
+        async for record in records:
+            emit(record)
+
+    try:
+        if args.io_concurrency:
+            asyncio.run(emit_async())
+        elif changed is not None:
+            for record in scanner.iter_changed_records(args.directories, pattern, changed):
+                emit(record)
+        elif watcher is not None:
+            for record in watcher.iter_records():
+                emit(record)
+            watch()
+        else:
+            for record in scanner.iter_records(args.directories, pattern):
+                emit(record)
+        if writer is not None:
+            writer.close()
+        if partial is not None:
+            partial.close()
+    finally:
+        if partial is not None:
+            partial.stream.close()
+        if watcher is not None:
+            watcher.close()
+        if cache is not None:
+            cache.close()
+        if index is not None:
+            index.close()
+        if output is not sys.stdout:
+            output.close()
+
+    found = counts[VERDICT_NO_AUTH] + counts[VERDICT_SUPPRESSED_CHANGED]
+    if not args.quiet:
+        print(f"扫描完成: {found} 个文件未检测到鉴权代码，{counts[VERDICT_ERROR]} 个文件读取失败，"
+              f"{counts[VERDICT_TOO_LARGE]} 个文件因过大被跳过", file=sys.stderr)
+        if changed is not None:
+            print(f"变更文件 {len(changed)} 个，其中 {scanner.files_discovered} 个在扫描范围内", file=sys.stderr)
+        if scanner.auth_graph is not None:
+            graph = scanner.auth_graph
+            print(f"{inherited} 个文件经由include/继承获得鉴权（依赖图 {graph.nodes} 个文件、{graph.edges} 条依赖，"
+                  f"读取 {graph.files_read} 个文件）", file=sys.stderr)
+        if baseline is not None:
+            print(f"基线中已有 {known} 个未鉴权文件，未重复报告", file=sys.stderr)
+        if scanner.suppressions is not None:
+            print(f"忽略列表中 {suppressed} 个文件未报告，{counts[VERDICT_SUPPRESSED_CHANGED]} 个已忽略的文件内容有改动",
+                  file=sys.stderr)
+        if partial is not None:
+            print(f"分片 {shard[0]}/{shard[1]}: 覆盖 {partial.files} 个文件，分片结果已写入 {args.output}",
+                  file=sys.stderr)
+        if args.dedup:
+            stats = scanner.dedup_stats
+            print(f"{stats['duplicates']} 个文件与其他文件内容相同，沿用了首个文件的判定（计算摘要 {stats['hashed']} 个文件）",
+                  file=sys.stderr)
+        if cache is not None:
+            stats = scanner.cache_stats
+            print(f"缓存命中 {stats['cached']} 个文件，重新扫描 {stats['rescanned']} 个文件", file=sys.stderr)
+        if index is not None:
+            stats = scanner.index_stats
+            print(f"索引直接得出 {stats['answered']} 个文件的判定，读取确认 {stats['read']} 个文件，"
+                  f"新建或更新索引 {stats['indexed']} 个文件", file=sys.stderr)
+    if profile is not None:
+        print(profile.report(), file=sys.stderr)
+    return EXIT_FOUND if found else EXIT_OK
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # 输出被管道提前关闭（如 | head），按正常结束处理
+        sys.stderr.close()
+        sys.exit(EXIT_OK)
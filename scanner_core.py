@@ -1,53 +1,864 @@
 import os
 import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 
+from scanner_archive import ARCHIVE_ERRORS, MAX_BUFFERED_BYTES, is_archive, iter_members, member_path, scan_members
+from scanner_async import DEFAULT_CONCURRENCY, iter_records_async
+from scanner_cache import new_hasher, pattern_fingerprint
+from scanner_graph import AuthGraph
+from scanner_index import file_tokens, keyword_terms
+from scanner_matcher import KeywordMatcher, keyword_patterns
+from scanner_reader import (
+    DEFAULT_CHUNK_SIZE, FULL_READ, VERDICT_AUTH, VERDICT_EMPTY, VERDICT_ERROR, VERDICT_INHERITED, VERDICT_NO_AUTH,
+    VERDICT_SUPPRESSED, VERDICT_SUPPRESSED_CHANGED, VERDICT_TOO_LARGE, PhaseTimer, ReadOptions, is_empty_php,
+    match_file
+)
+from scanner_results import ScanRecord, format_for_path, make_record, open_writer
+from scanner_rules import BUILTIN_PACKS, app_dirs, compile_matcher
+from scanner_suppress import file_digest
+from scanner_walk import FileWalker
+
+# 未指定关键词时使用的默认鉴权关键词（命令行、图形界面和扫描服务共用）
+DEFAULT_KEYWORDS = ["session", "auth", "login", "AdminBase", "AuthBase"]
+
+# 每个任务批次包含的文件数，批次越大进程间通信开销越小
+DEFAULT_BATCH_SIZE = 256
+
+# ThinkPHP项目中存放应用代码的目录：app（5.x/6.x）、application（3.2）
+THINKPHP_APP_DIRS = BUILTIN_PACKS['thinkphp'].app_dirs
+
+
+def check_file(file_path, pattern, options=FULL_READ):
+    """检测单个PHP文件，返回True表示未检测到鉴权代码"""
+    return match_file(file_path, pattern, options)[0] == VERDICT_NO_AUTH
+
+
+def _scan_batch(directory, file_paths, pattern, options, hashed=()):
+    """扫描一批文件（可在工作进程中执行），返回ScanRecord列表
+
+    hashed中的文件（忽略列表中需要校验内容的文件）在同一次读取中计算内容摘要，未鉴权时记入结果的digest。
+    """
+    results = []
+    for file_path in file_paths:
+        timer = PhaseTimer() if options.timing else None
+        hasher = new_hasher() if file_path in hashed else None
+        started = time.perf_counter()
+        try:
+            verdict, hit, size = match_file(file_path, pattern, options, hasher, timer)
+            record = make_record(directory, file_path, verdict, hit, size, time.perf_counter() - started, timer)
+            if hasher is not None and verdict == VERDICT_NO_AUTH:
+                record = record._replace(digest=hasher.hexdigest())
+            results.append(record)
+        except Exception as e:
+            results.append(ScanRecord(directory, file_path, VERDICT_ERROR, error=str(e)))
+    return results
+
+
+def _index_batch(directory, file_paths, pattern, options, hashed=()):
+    """扫描一批文件并提取标识符（可在工作进程中执行），返回 [(ScanRecord, mtime_ns, 是否为空文件, 标识符集合)]
+
+    读取失败或过大跳过的文件不写入索引，此时后三项为None。
+    """
+    results = []
+    for record in _scan_batch(directory, file_paths, pattern, options, hashed):
+        if record.verdict in (VERDICT_ERROR, VERDICT_TOO_LARGE):
+            results.append((record, None, None, None))
+            continue
+        try:
+            # 先取mtime再读取内容，期间文件被修改时下次扫描会因mtime不同而重新索引
+            mtime_ns = os.stat(record.path).st_mtime_ns
+            with open(record.path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            results.append((record, None, None, None))
+            continue
+        results.append((record, mtime_ns, *file_tokens(raw, options.lexer)))
+    return results
+
+
+def _hash_batch(file_paths):
+    """计算一批文件的内容摘要（可在工作进程中执行），返回 [(文件路径, 摘要)]，读取失败时摘要为None"""
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append((file_path, file_digest(file_path)))
+        except OSError:
+            results.append((file_path, None))
+    return results
+
+
+def _scan_cached_batch(tasks, patterns, options):
+    """带缓存校验的批次扫描，返回 (文件路径, 内容摘要, 内容未变, 判定, 正则序号, 命中信息, 文件大小, 耗时, 计时) 列表
+
+    每个任务为 (文件路径, 缓存摘要, 内容未变时使用的正则序号, 内容变化时使用的正则序号)，
+    序号为None表示无需执行正则匹配，此时判定为None；读取失败时命中信息为错误信息。
+    """
+    results = []
+    for file_path, known_digest, same_index, full_index in tasks:
+        timer = PhaseTimer() if options.timing else None
+        started = time.perf_counter()
+        try:
+            hasher = new_hasher()
+            if known_digest is None:
+                verdict, hit, size = match_file(file_path, patterns[full_index], options, hasher, timer)
+                results.append((file_path, hasher.hexdigest(), False, verdict, full_index, hit, size,
+                                time.perf_counter() - started, timer))
+                continue
+            # 先校验内容摘要，再决定需要评估哪些关键词
+            verdict, hit, size = match_file(file_path, None, options, hasher, timer)
+            digest = hasher.hexdigest()
+            unchanged = digest == known_digest
+            index = same_index if unchanged else full_index
+            if verdict is None and index is not None:
+                verdict, hit, size = match_file(file_path, patterns[index], options, timer=timer)
+            results.append((file_path, digest, unchanged, verdict, index, hit, size, time.perf_counter() - started,
+                            timer))
+        except Exception as e:
+            results.append((file_path, None, False, VERDICT_ERROR, None, str(e), None, None, None))
+    return results
+
+
+class _Done:
+    """已完成的任务结果（顺序执行时代替Future）"""
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+
+def _run_inline(fn, *args):
+    """在当前进程中立即执行任务"""
+    return _Done(fn(*args))
+
+
+class _CachePlan:
+    """单次扫描的缓存计划：已知结论的文件直接返回，其余文件只评估缓存中缺失的关键词"""
+
+    def __init__(self, cache, units, build_pattern):
+        self.cache = cache
+        self.units = units  # [(关键词, 指纹)]，关键词为None表示整个正则作为一个单元
+        self.build_pattern = build_pattern
+        self.cached = 0
+        self.rescanned = 0
+        self._patterns = []
+        self._pattern_units = []
+        self._pattern_index = {}
+
+    def _index_for(self, units):
+        """获取（必要时编译）覆盖指定关键词单元的正则序号"""
+        key = tuple(fp for _, fp in units)
+        if key not in self._pattern_index:
+            self._pattern_index[key] = len(self._patterns)
+            self._patterns.append(self.build_pattern([kw for kw, _ in units]))
+            self._pattern_units.append(units)
+        return self._pattern_index[key]
+
+    def _known_verdict(self, verdicts):
+        """根据已缓存的关键词结论推断是否未鉴权，结论不完整时返回None"""
+        if any(verdicts.get(fp) for _, fp in self.units):
+            return False
+        if all(fp in verdicts for _, fp in self.units):
+            return True
+        return None
+
+    def _same_index(self, skip, verdicts):
+        """内容未变时需要执行的正则序号"""
+        if skip or self._known_verdict(verdicts) is not None:
+            return None
+        return self._index_for([u for u in self.units if u[1] not in verdicts])
+
+    def submit(self, submit, directory, batch, options, hashed=()):
+        """查询缓存并提交未命中文件，返回按原顺序给出批次结果的函数
+
+        缓存校验本身就会计算内容摘要，结果总是带有摘要，无需使用hashed。
+        """
+        entries = []
+        tasks = []
+        context = {}
+        hits = []
+        full_index = self._index_for(self.units)
+        for file_path in batch:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                st = None
+            if st is not None and options.max_file_size is not None and st.st_size > options.max_file_size:
+                entries.append(ScanRecord(directory, file_path, VERDICT_TOO_LARGE, size=st.st_size))
+                continue
+            row = self.cache.lookup(os.path.abspath(file_path)) if st is not None else None
+            if row is None:
+                tasks.append((file_path, None, None, full_index))
+                context[file_path] = (st, {})
+                entries.append(None)
+                continue
+            mtime_ns, size, digest, skip, verdicts = row
+            same_index = self._same_index(skip, verdicts)
+            if mtime_ns == st.st_mtime_ns and size == st.st_size and same_index is None:
+                hits.append(os.path.abspath(file_path))
+                entries.append(ScanRecord(directory, file_path, VERDICT_EMPTY if skip else self._verdict(verdicts),
+                                          size=st.st_size, digest=digest))
+                continue
+            tasks.append((file_path, digest, same_index, full_index))
+            context[file_path] = (st, verdicts)
+            entries.append(None)
+        if hits:
+            self.cache.touch(hits)
+            self.cached += len(hits)
+        future = submit(_scan_cached_batch, tasks, list(self._patterns), options) if tasks else None
+
+        def result():
+            if future is None:
+                return entries
+            records = iter(future.result())
+            return [entry if entry is not None else self._record(directory, next(records), context)
+                    for entry in entries]
+
+        return result
+
+    def _verdict(self, verdicts):
+        """由完整的关键词结论得到文件判定"""
+        return VERDICT_NO_AUTH if self._known_verdict(verdicts) else VERDICT_AUTH
+
+    def _record(self, directory, record, context):
+        """写回单个文件的扫描结论，返回ScanRecord"""
+        file_path, digest, unchanged, verdict, index, hit, size, scan_time, timer = record
+        if verdict == VERDICT_ERROR:
+            return ScanRecord(directory, file_path, verdict, error=hit)
+        if verdict == VERDICT_TOO_LARGE:
+            return make_record(directory, file_path, verdict, None, size, scan_time, timer)
+        st, known = context[file_path]
+        verdicts = dict(known) if unchanged else {}
+        if index is None and unchanged:
+            self.cached += 1
+        else:
+            self.rescanned += 1
+        skip = verdict == VERDICT_EMPTY
+        if not skip and index is not None:
+            units = self._pattern_units[index]
+            if verdict == VERDICT_NO_AUTH:
+                verdicts.update((fp, False) for _, fp in units)
+            else:
+                # 每个正则分支都包含关键词本身，匹配文本中出现的关键词即为命中的关键词
+                text = hit.text.lower()
+                verdicts.update((fp, True) for kw, fp in units if kw is None or kw.lower() in text)
+        if st is not None:
+            self.cache.store(os.path.abspath(file_path), st.st_mtime_ns, st.st_size, digest, skip, verdicts,
+                             content_changed=not unchanged)
+        if skip:
+            return make_record(directory, file_path, VERDICT_EMPTY, None, size, scan_time, timer)
+        if verdict == VERDICT_AUTH:
+            return make_record(directory, file_path, VERDICT_AUTH, hit, size, scan_time, timer)
+        if index is None:
+            # 内容未变，结论来自缓存
+            return ScanRecord(directory, file_path, self._verdict(verdicts), size=size, digest=digest)
+        return make_record(directory, file_path, self._verdict(verdicts), None, size, scan_time, timer)._replace(
+            digest=digest)
+
+    def finish(self):
+        """提交缓存写入"""
+        self.cache.flush()
+
+
+class _IndexPlan:
+    """单次扫描的索引计划：内容未变的文件由标识符集合运算直接得出判定，其余文件读取后补入索引
+
+    只由标识符字符组成的关键词可由索引精确回答；其他关键词（如 Auth::check）按其中的标识符片段
+    选出候选文件，只有尚未由前者判定为已鉴权的候选文件才需要读取确认。
+    """
+
+    def __init__(self, index, pattern, keywords, annotations, lexer):
+        self.index = index
+        self.pattern = pattern
+        index.use_lexer(lexer)
+        self.files = index.files()
+        self.answered = 0
+        self.read = 0
+        self.indexed = 0
+        self.auth = {}  # 文件id -> 命中的关键词（按关键词顺序取第一个）
+        self.candidates = set()  # 需要读取确认的文件id，None表示全部
+        for keyword in keywords:
+            pieces, exact = keyword_terms(keyword, lexer, keyword in annotations)
+            if exact:
+                for file_id in index.find(pieces[0]):
+                    self.auth.setdefault(file_id, keyword)
+            elif not pieces:
+                self.candidates = None
+            elif self.candidates is not None:
+                self.candidates |= set.intersection(*(index.find(piece) for piece in pieces))
+
+    def _answer(self, directory, file_path, known):
+        """由索引得出判定，需要读取确认时返回None"""
+        file_id, _, size, empty = known
+        if empty:
+            return ScanRecord(directory, file_path, VERDICT_EMPTY, size=size)
+        keyword = self.auth.get(file_id)
+        if keyword is not None:
+            return ScanRecord(directory, file_path, VERDICT_AUTH, keyword=keyword, size=size)
+        if self.candidates is None or file_id in self.candidates:
+            return None
+        return ScanRecord(directory, file_path, VERDICT_NO_AUTH, size=size)
+
+    def submit(self, submit, directory, batch, options, hashed=()):
+        """由索引回答能回答的文件，其余文件提交扫描，返回按原顺序给出批次结果的函数
+
+        hashed中的文件由索引判定为未鉴权时仍提交读取，以便在工作进程中计算内容摘要。
+        """
+        entries = []
+        reread = []
+        reindex = []
+        # 扫描目录已是规范的绝对路径时，其下的文件路径无需逐个转换
+        absolute = os.path.abspath(directory) == directory
+        for file_path in batch:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                st = None
+            if st is not None and options.max_file_size is not None and st.st_size > options.max_file_size:
+                entries.append(ScanRecord(directory, file_path, VERDICT_TOO_LARGE, size=st.st_size))
+                continue
+            known = self.files.get(file_path if absolute else os.path.abspath(file_path)) if st is not None else None
+            if known is None or known[1] != st.st_mtime_ns or known[2] != st.st_size:
+                reindex.append(file_path)
+                entries.append(None)
+                continue
+            record = self._answer(directory, file_path, known)
+            if record is None or (record.verdict == VERDICT_NO_AUTH and file_path in hashed):
+                record = None
+                reread.append(file_path)
+            entries.append(record)
+        self.answered += len(batch) - len(reread) - len(reindex)
+        self.read += len(reread)
+        self.indexed += len(reindex)
+        scanned = submit(_scan_batch, directory, reread, self.pattern, options, hashed) if reread else None
+        indexed = submit(_index_batch, directory, reindex, self.pattern, options, hashed) if reindex else None
+
+        def result():
+            if scanned is None and indexed is None:
+                return entries
+            fresh = {}
+            if scanned is not None:
+                fresh.update((record.path, record) for record in scanned.result())
+            if indexed is not None:
+                for record, mtime_ns, empty, tokens in indexed.result():
+                    fresh[record.path] = record
+                    if mtime_ns is not None:
+                        self.index.store(os.path.abspath(record.path), mtime_ns, record.size, empty, tokens)
+            return [entry if entry is not None else fresh[file_path] for entry, file_path in zip(entries, batch)]
+
+        return result
+
+    def finish(self):
+        """写入索引"""
+        self.index.flush()
+
+
+class _DedupPlan:
+    """单次扫描的去重计划：内容完全相同的文件只评估一次，其余文件沿用首个文件的结果（duplicate_of指向它）
+
+    先遍历所有目录并按文件大小分组，只有大小与其他文件相同的才需要计算内容摘要；
+    去重后的文件交给内层计划（缓存或索引），没有内层计划时直接扫描。
+    """
+
+    def __init__(self, inner, pattern):
+        self.inner = inner
+        self.pattern = pattern
+        self.files = {}  # 目录 -> [文件路径]
+        self.original = {}  # 文件路径 -> 内容相同的首个文件路径
+        self.hashed = 0
+        self.digests = {}  # 文件路径 -> 内容摘要（只含大小与其他文件相同的文件）
+        self._shared = set()  # 有内容相同文件的首个文件
+        self._records = {}  # 首个文件路径 -> ScanRecord
+
+    def prepare(self, directories, list_files, submit, max_file_size, batch_size):
+        """遍历所有目录，找出内容相同的文件（摘要计算分批提交到进程池）"""
+        by_size = {}
+        for directory in directories:
+            files = self.files[directory] = list(list_files(directory))
+            for file_path in files:
+                try:
+                    size = os.path.getsize(file_path)
+                except OSError:
+                    continue
+                if max_file_size is None or size <= max_file_size:
+                    # 目录互相包含时同一文件可能出现多次，只记录一次
+                    by_size.setdefault(size, {})[file_path] = None
+        groups = [(size, list(paths)) for size, paths in by_size.items() if len(paths) > 1]
+        # 空文件内容必然相同，无需计算摘要
+        pending = [file_path for size, paths in groups if size for file_path in paths]
+        getters = [submit(_hash_batch, pending[i:i + batch_size]) for i in range(0, len(pending), batch_size)]
+        digests = self.digests = dict(pair for get in getters for pair in get.result())
+        self.hashed = len(pending)
+        for size, paths in groups:
+            first = {}
+            for file_path in paths:
+                digest = digests.get(file_path) if size else ''
+                if digest is None:
+                    continue
+                original = first.setdefault(digest, file_path)
+                if original != file_path:
+                    self.original[file_path] = original
+                    self._shared.add(original)
+
+    @property
+    def duplicates(self):
+        return len(self.original)
+
+    def submit(self, submit, directory, batch, options, hashed=()):
+        """只提交各内容的首个文件，返回按原顺序给出批次结果（含内容相同的文件）的函数
+
+        内容相同的文件在prepare中已计算过摘要，直接记入结果。
+        """
+        unique = [file_path for file_path in batch if file_path not in self.original]
+        if not unique:
+            scanned = None
+        elif self.inner is None:
+            scanned = submit(_scan_batch, directory, unique, self.pattern, options, hashed).result
+        else:
+            scanned = self.inner.submit(submit, directory, unique, options, hashed)
+
+        def result():
+            # 首个文件按发现顺序先于内容相同的文件产出，此时其结果已经取得
+            records = iter(scanned() if scanned is not None else ())
+            results = []
+            for file_path in batch:
+                original = self.original.get(file_path)
+                if original is None:
+                    record = next(records)
+                    if file_path in self._shared:
+                        record = record._replace(digest=self.digests.get(file_path, record.digest))
+                        self._records[file_path] = record
+                else:
+                    record = self._records[original]._replace(
+                        directory=directory, path=file_path, scan_time=None, timings=None, duplicate_of=original
+                    )
+                results.append(record)
+            return results
+
+        return result
+
 
 class PHPAuthScanner:
-    def __init__(self):
+    def __init__(self, workers=1, batch_size=DEFAULT_BATCH_SIZE, cache=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_file_size=None, bytes_matching=True, walker=None,
+                 profile=None, lexer=None, follow_includes=False):
         self.scan_results = []
+        self.walker = walker or FileWalker()  # 目录遍历与包含/排除规则
+        self.workers = max(1, workers or 1)
+        self.batch_size = max(1, batch_size)
+        self.chunk_size = chunk_size  # 分块读取的块大小，None表示整文件读取
+        self.max_file_size = max_file_size  # 超过该字节数的文件直接跳过，None表示不限制
+        self.bytes_matching = bytes_matching  # 关键词均为ASCII时直接匹配原始字节，跳过解码
+        self.lexer = lexer  # 匹配前去除注释（STRIP_COMMENTS）或注释和字符串（STRIP_STRINGS），None表示匹配原文
+        self.follow_includes = follow_includes  # 按include/require和类继承关系传播鉴权状态（见scanner_graph）
+        self.auth_graph = None  # 最近一次扫描的AuthGraph（follow_includes为True时）
+        self.cache = cache  # ScanCache实例，为None时不使用缓存
+        self.cache_stats = {'cached': 0, 'rescanned': 0}
+        # IdentifierIndex实例（见scanner_index），设置后代替cache：修改关键词后无需重新读取文件即可得出判定
+        self.index = None
+        self.index_stats = {'answered': 0, 'read': 0, 'indexed': 0}
+        self.dedup = False  # 内容完全相同的文件只评估一次，其余文件的结果带有duplicate_of
+        self.dedup_stats = {'duplicates': 0, 'hashed': 0}
+        self.files_discovered = 0  # 本次扫描已发现的PHP文件数，可用于显示进度
+        self.dir_file_counts = {}  # 目录发现阶段记录的各目录直接包含的PHP文件数
+        self.profile = profile  # ScanProfile实例，为None时不做性能统计
+        self.on_file_start = None  # 文件提交扫描时回调 on_file_start(文件路径)
+        self.on_file_finish = None  # 文件结果产出时回调 on_file_finish(ScanRecord)
+        self.suppressions = None  # SuppressionIndex实例，登记过的未鉴权文件判定为VERDICT_SUPPRESSED
+        self.executor = None  # 多次扫描共用的执行器（有submit方法，如scanner_service），为None时每次扫描新建进程池
+        self._pattern_keywords = {}
+
+    keyword_patterns = staticmethod(keyword_patterns)
 
     def generate_regex(self, keywords):
         """生成鉴权正则表达式"""
         patterns = []
         for keyword in keywords:
-            escaped_keyword = re.escape(keyword)
-            # 移除单词边界匹配符\b，使其能够匹配包含特殊字符的关键词
-            patterns.extend([
-                escaped_keyword,  # 直接匹配关键词，适用于任何字符
-                rf'\${escaped_keyword}\[',
-                rf'{escaped_keyword}\(',
-                rf'require.*{escaped_keyword}\.php',
-                rf'extends\s+{escaped_keyword}',
-                rf'use\s+.*{escaped_keyword}',
-                rf'\${escaped_keyword}',
-                rf'\$_{escaped_keyword}',
-                rf'\${escaped_keyword}\s*[=!]=\s*[\'"]?\d[\'"]?'
-            ])
-        return re.compile('|'.join(patterns), re.IGNORECASE)
-
-    def scan_directory(self, directory, pattern):
-        """扫描指定目录中的PHP文件"""
+            patterns.extend(self.keyword_patterns(keyword))
+        regex = re.compile('|'.join(patterns), re.IGNORECASE)
+        # 记录正则对应的关键词，供缓存按关键词粒度复用结论
+        self._pattern_keywords[regex.pattern] = tuple(keywords)
+        return regex
+
+    def generate_matcher(self, keywords, packs=()):
+        """生成多关键词匹配引擎，判定结果与generate_regex一致，但不随关键词数量线性变慢
+
+        packs为框架规则包（见scanner_rules），其关键词与keywords编译进同一个匹配引擎。
+        """
+        if packs:
+            return compile_matcher(packs, keywords)
+        return KeywordMatcher(keywords)
+
+    def _cache_plan(self, pattern):
+        """为本次扫描创建缓存计划"""
+        if isinstance(pattern, KeywordMatcher):
+            keywords, build_pattern = pattern.keywords, pattern.subset
+        else:
+            keywords, build_pattern = self._pattern_keywords.get(pattern.pattern), self.generate_regex
+        if keywords is None:
+            # 非generate_regex生成的正则，整体作为一个缓存单元
+            units = [(None, self._fingerprint(pattern.pattern, pattern.flags))]
+            return _CachePlan(self.cache, units, lambda _: pattern)
+        annotations = getattr(pattern, 'annotations', ())
+        units = [(keyword, self._fingerprint('|'.join(self.keyword_patterns(keyword)), pattern.flags,
+                                             keyword in annotations))
+                 for keyword in dict.fromkeys(keywords)]
+        return _CachePlan(self.cache, units, build_pattern)
+
+    def _index_plan(self, pattern):
+        """为本次扫描创建索引计划，匹配规则不是由关键词生成的（无法由标识符回答）时返回None"""
+        keywords = self._pattern_keywords_of(pattern)
+        if keywords is None:
+            return None
+        return _IndexPlan(self.index, pattern, keywords, getattr(pattern, 'annotations', ()), self.lexer)
+
+    def _fingerprint(self, source, flags, annotation=False):
+        """缓存单元指纹，剥离模式不同的结论分开保存（注解在剥离注释后仍然有效，结论与普通关键词不同）"""
+        if self.lexer:
+            source = f"{source}\0lexer={self.lexer}"
+            if annotation:
+                source += "\0annotation"
+        return pattern_fingerprint(source, flags)
+
+    def _read_options(self, pattern):
+        """确定文件读取方式：只有已知关键词的匹配规则才能安全地分块匹配"""
+        max_length = getattr(pattern, 'max_literal_length', None)
+        if max_length is None:
+            keywords = self._pattern_keywords.get(getattr(pattern, 'pattern', None))
+            if keywords is not None:
+                max_length = max((len(kw) for kw in keywords), default=0)
+        timing = self.profile is not None
+        if not self.chunk_size or max_length is None:
+            return ReadOptions(None, 0, self.max_file_size, self.bytes_matching, timing, self.lexer)
+        return ReadOptions(self.chunk_size, max_length, self.max_file_size, self.bytes_matching, timing, self.lexer)
+
+    def find_thinkphp_app_dirs(self, project_dir):
+        """返回ThinkPHP项目中存在的应用目录"""
+        return app_dirs(project_dir, BUILTIN_PACKS['thinkphp'])
+
+    def discover_controller_dirs(self, base_dirs, dir_name='controller', walker=None):
+        """单次遍历查找Controller目录（名称不区分大小写，且直接包含PHP文件），逐个产出 (目录, PHP文件数)
+
+        dir_name可以是多个目录名（如同时识别多个框架的控制器目录）。walker为None时使用扫描器的walker。
+        遍历时顺带记录每个目录直接包含的PHP文件数，供estimate_file_count预估扫描总量。
+        """
+        walker = walker or self.walker
+        names = {name.lower() for name in ((dir_name,) if isinstance(dir_name, str) else dir_name)}
+        for base_dir in base_dirs:
+            for root, dirs, files in walker.walk(base_dir):
+                count = sum(1 for name in files if walker.is_source_file(name))
+                self.dir_file_counts[os.path.normpath(root)] = count
+                if count and os.path.basename(root).lower() in names:
+                    yield root, count
+
+    def estimate_file_count(self, directory):
+        """根据目录发现阶段的记录估算目录（含子目录）中的PHP文件数，未记录时返回None"""
+        directory = os.path.normpath(directory)
+        if directory not in self.dir_file_counts:
+            return None
+        prefix = directory + os.sep
+        return sum(count for path, count in self.dir_file_counts.items()
+                   if path == directory or path.startswith(prefix))
+
+    def iter_php_files(self, directory):
+        """遍历目录，按发现顺序产出PHP文件路径"""
+        return self.walker.iter_files(directory)
+
+    def _timed_walk(self, files):
+        """统计目录遍历耗时（只在启用性能统计时使用）"""
+        files = iter(files)
+        while True:
+            start = time.perf_counter()
+            file_path = next(files, None)
+            self.profile.add_walk(time.perf_counter() - start)
+            if file_path is None:
+                return
+            yield file_path
+
+    def select_changed_files(self, directories, changed_paths):
+        """从变更文件列表中选出位于各扫描目录下、且遍历时会被扫描的文件，返回 {目录: [文件路径]}"""
+        changed = [os.path.abspath(p) for p in changed_paths]
+        selected = {}
+        for directory in directories:
+            root = os.path.abspath(directory)
+            prefix = root.rstrip(os.sep) + os.sep
+            selected[directory] = [
+                os.path.join(directory, os.path.relpath(p, root))
+                for p in changed if p.startswith(prefix) and self.walker.accepts(root, p)
+            ]
+        return selected
+
+    def iter_changed_records(self, directories, pattern, changed_paths, workers=None):
+        """只扫描变更文件（如 git diff --name-only 的输出），逐个产出ScanRecord"""
+        selected = self.select_changed_files(directories, changed_paths)
+        for _, records in self._iter_jobs(directories, pattern, workers, files_for=selected.get):
+            yield from records
+
+    def _iter_batches(self, directory, files_for=None):
+        """将目录中的PHP文件按批次切分"""
+        batch = []
+        files = files_for(directory) if files_for is not None else self.iter_php_files(directory)
+        if self.profile is not None:
+            files = self._timed_walk(files)
+        on_file_start = self.on_file_start
+        for file_path in files:
+            if on_file_start is not None:
+                on_file_start(file_path)
+            self.files_discovered += 1
+            batch.append(file_path)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _collect_results(self, directory, records):
+        """汇总文件结果：读取错误和跳过提示即时产出，未鉴权文件按发现顺序最后产出"""
         no_auth_files = []
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.endswith('.php'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            stripped_content = content.strip()
-                            if len(stripped_content) <= 5 and stripped_content.startswith('<?php'):
-                                continue
-                            if not pattern.search(content):
-                                rel_path = os.path.relpath(file_path, start=directory)
-                                no_auth_files.append(rel_path)
-                    except Exception as e:
-                        yield f"⚠️ 无法读取文件 {file_path}: {str(e)}"
+        for record in records:
+            if record.verdict == VERDICT_ERROR:
+                yield f"⚠️ 无法读取文件 {record.path}: {record.error}"
+            elif record.verdict == VERDICT_TOO_LARGE:
+                yield f"⚠️ 跳过过大文件 {record.path}: {record.size} 字节"
+            elif record.verdict in (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED):
+                no_auth_files.append(os.path.relpath(record.path, start=directory))
         yield from no_auth_files
 
-    def save_results(self, keywords, regex, directories, results, output_path):
-        """保存扫描结果到文件"""
+    @contextmanager
+    def _submitter(self, workers):
+        """按工作进程数提供任务提交函数"""
+        if workers <= 1:
+            yield _run_inline
+            return
+        if self.executor is not None:
+            # 共用的执行器不能关闭，扫描提前终止时只取消本次尚未开始的批次
+            futures = []
+
+            def submit(fn, *args):
+                future = self.executor.submit(fn, *args)
+                futures.append(future)
+                return future
+
+            try:
+                yield submit
+            finally:
+                for future in futures:
+                    future.cancel()
+            return
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            yield executor.submit
+        finally:
+            # 扫描被提前终止（如用户取消）时丢弃尚未开始的批次
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _batch_results(self, directory, pattern, submit, plan, options, files_for=None):
+        """提交目录中的所有批次，按发现顺序产出批次结果的获取函数"""
+        digest_paths = self.suppressions.digest_paths(directory) if self.suppressions is not None else None
+        for batch in self._iter_batches(directory, files_for):
+            hashed = {file_path for file_path in batch if file_path in digest_paths} if digest_paths else ()
+            if plan is None:
+                yield submit(_scan_batch, directory, batch, pattern, options, hashed).result
+            else:
+                yield plan.submit(submit, directory, batch, options, hashed)
+
+    def _archive_results(self, archive, pattern, submit, options):
+        """在内存中扫描压缩包成员（不解压到磁盘），按批次提交，产出批次结果的获取函数
+
+        zip、未压缩的tar和phar的成员由工作进程按成员位置流式读取；压缩的tar只能顺序解压，成员内容在当前进程
+        读出后随批次提交，尚未处理完的内容超过MAX_BUFFERED_BYTES时先等待最早的批次完成，内存占用不随压缩包增大。
+        """
+        members = iter_members(archive, self.walker.accepts_relpath, options.max_file_size)
+        on_file_start = self.on_file_start
+        pending = deque()  # (Future, 批次内容字节数)
+        buffered = 0
+        batch = []
+        error = None
+        while True:
+            try:
+                member = next(members, None)
+            except ARCHIVE_ERRORS as e:
+                member, error = None, e
+            if member is not None:
+                if on_file_start is not None:
+                    on_file_start(member_path(archive, member[1]))
+                self.files_discovered += 1
+                batch.append(member)
+                if len(batch) < self.batch_size:
+                    continue
+            if batch:
+                future = submit(scan_members, archive, batch, pattern, options)
+                size = sum(len(data) for _, _, _, data, _ in batch if data is not None)
+                if size:
+                    pending.append((future, size))
+                    buffered += size
+                    while buffered > MAX_BUFFERED_BYTES:
+                        done, done_size = pending.popleft()
+                        done.result()
+                        buffered -= done_size
+                yield future.result
+                batch = []
+            if member is None:
+                break
+        if error is not None:
+            yield _Done([ScanRecord(archive, archive, VERDICT_ERROR, error=f"无法读取压缩包: {error}")]).result
+
+    def _iter_jobs(self, directories, pattern, workers, files_for=None):
+        """提交扫描任务，按目录顺序产出 (目录, 该目录逐文件结果的迭代器)
+
+        files_for(目录) 返回该目录需要扫描的文件，默认遍历整个目录。directories中的压缩包（见scanner_archive）
+        在内存中扫描，不使用缓存、索引和去重，只扫描变更文件时跳过。
+        """
+        workers = self.workers if workers is None else max(1, workers)
+        plan = self._index_plan(pattern) if self.index is not None else None
+        if plan is None and self.cache is not None:
+            plan = self._cache_plan(pattern)
+        if self.dedup:
+            plan = _DedupPlan(plan, pattern)
+        options = self._read_options(pattern)
+        self.cache_stats = {'cached': 0, 'rescanned': 0}
+        self.index_stats = {'answered': 0, 'read': 0, 'indexed': 0}
+        self.dedup_stats = {'duplicates': 0, 'hashed': 0}
+        self.files_discovered = 0
+        scan_archives = files_for is None
+        resolve = self._keyword_resolver(pattern)
+        if self.profile is not None:
+            self.profile.reset(self._pattern_keywords_of(pattern))
+        try:
+            with self._submitter(workers) as submit:
+                if isinstance(plan, _DedupPlan):
+                    # 需要先知道所有文件的大小，才能判断哪些文件可能内容相同
+                    directories = list(directories)
+                    plan.prepare(directories, files_for or self.iter_php_files, submit, options.max_file_size,
+                                 self.batch_size)
+                    files_for = plan.files.get
+                jobs = ((directory, self._archive_results(directory, pattern, submit, options)
+                         if scan_archives and is_archive(directory)
+                         else self._batch_results(directory, pattern, submit, plan, options, files_for))
+                        for directory in directories)
+                if workers > 1:
+                    # 先提交所有目录的批次，使各目录在进程池中同时扫描
+                    jobs = [(directory, list(getters)) for directory, getters in jobs]
+                jobs = ((directory, (record for get in getters for record in get())) for directory, getters in jobs)
+                if self.follow_includes:
+                    jobs = self._propagate_auth(jobs, pattern, options)
+                for directory, records in jobs:
+                    if resolve is not None or self.profile is not None or self.on_file_finish is not None \
+                            or self.suppressions is not None:
+                        records = self._observe(records, resolve)
+                    yield directory, records
+        finally:
+            if self.profile is not None:
+                self.profile.finish()
+            if isinstance(plan, _DedupPlan):
+                self.dedup_stats = {'duplicates': plan.duplicates, 'hashed': plan.hashed}
+                plan = plan.inner
+            if isinstance(plan, _IndexPlan):
+                plan.finish()
+                self.index_stats = {'answered': plan.answered, 'read': plan.read, 'indexed': plan.indexed}
+            elif plan is not None:
+                plan.finish()
+                self.cache_stats = {'cached': plan.cached, 'rescanned': plan.rescanned}
+
+    def _propagate_auth(self, jobs, pattern, options):
+        """等待所有目录扫描完成，再把经由include/继承获得鉴权的未鉴权文件改写为VERDICT_INHERITED
+
+        一个文件的结论可能取决于之后才扫描到的文件，因此该模式下结果在全部扫描结束后才产出。
+        """
+        scanned = [(directory, list(records)) for directory, records in jobs]
+        graph = AuthGraph(pattern, options._replace(timing=False))
+        for _, records in scanned:
+            for record in records:
+                graph.add(record)
+        self.auth_graph = graph
+        return [(directory, list(graph.apply(records))) for directory, records in scanned]
+
+    def _pattern_keywords_of(self, pattern):
+        """匹配规则对应的关键词，未知时返回None"""
+        if isinstance(pattern, KeywordMatcher):
+            return pattern.keywords
+        return self._pattern_keywords.get(getattr(pattern, 'pattern', None))
+
+    def _observe(self, records, resolve):
+        """补全命中关键词、应用忽略列表，并把逐文件结果交给性能统计和回调"""
+        profile = self.profile
+        on_file_finish = self.on_file_finish
+        suppressions = self.suppressions
+        for record in records:
+            if resolve is not None and record.matched is not None and record.keyword is None:
+                record = record._replace(keyword=resolve(record.matched))
+            if suppressions is not None and record.verdict == VERDICT_NO_AUTH:
+                record = suppressions.apply(record)
+            if profile is not None:
+                profile.add_record(record)
+            if on_file_finish is not None:
+                on_file_finish(record)
+            yield record
+
+    def _keyword_resolver(self, pattern):
+        """匹配规则本身不给出命中关键词时（generate_regex生成的正则），由匹配文本推断关键词"""
+        if isinstance(pattern, KeywordMatcher):
+            return None
+        keywords = self._pattern_keywords_of(pattern)
+        if not keywords:
+            return None
+
+        def resolve(text):
+            text = text.lower()
+            return next((kw for kw in keywords if kw.lower() in text), None)
+
+        return resolve
+
+    def iter_records(self, directories, pattern, workers=None):
+        """流式扫描多个目录，逐个产出ScanRecord（判定取值见scanner_reader中的VERDICT_*常量）"""
+        for _, records in self._iter_jobs(directories, pattern, workers):
+            yield from records
+
+    def aiter_records(self, directories, pattern, concurrency=DEFAULT_CONCURRENCY, timeout=None, retries=0,
+                      executor=None):
+        """异步扫描（适用于NFS/SMB等高延迟文件系统），返回按完成顺序产出ScanRecord的异步生成器
+
+        文件读取在线程池中进行，最多concurrency个同时进行；单个文件超过timeout秒未完成或出现
+        OSError时重试retries次，仍失败则产出判定为VERDICT_ERROR的结果。
+        """
+        return iter_records_async(self, directories, pattern, concurrency, timeout, retries, executor)
+
+    def iter_scan(self, directories, pattern, workers=None):
+        """流式扫描多个目录，逐个产出 (目录, 文件路径, 判定, 附加信息)
+
+        附加信息为匹配文本、文件大小（过大跳过时）或错误信息；需要完整信息时使用iter_records。
+        """
+        for record in self.iter_records(directories, pattern, workers):
+            if record.verdict == VERDICT_ERROR:
+                detail = record.error
+            elif record.verdict == VERDICT_TOO_LARGE:
+                detail = record.size
+            else:
+                detail = record.matched
+            yield record.directory, record.path, record.verdict, detail
+
+    def scan_directory(self, directory, pattern, workers=None):
+        """扫描指定目录中的PHP文件"""
+        for _, result in self.scan_directories([directory], pattern, workers):
+            yield result
+
+    def scan_directories(self, directories, pattern, workers=None):
+        """并行扫描多个目录，产出 (目录, 扫描结果)，结果按目录顺序排列"""
+        for directory, records in self._iter_jobs(directories, pattern, workers):
+            for result in self._collect_results(directory, records):
+                yield directory, result
+
+    def save_results(self, keywords, regex, directories, results, output_path, duplicates=None):
+        """保存扫描结果到文件
+
+        duplicates为 {(目录, 相对路径): [内容相同的文件的 (目录, 相对路径)]}，这些文件缩进列在首个文件之下。
+        """
+        duplicates = duplicates or {}
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(f"PHP鉴权代码扫描结果 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write("=" * 50 + "\n\n")
@@ -59,6 +870,24 @@ class PHPAuthScanner:
             if not results:
                 f.write("所有PHP文件均包含鉴权代码！\n")
             else:
-                f.write(f"共发现 {len(results)} 个文件未检测到鉴权代码:\n\n")
-                for dir_path, file_path in results:
-                    f.write(f"{file_path}\n")
+                copies = {entry for group in duplicates.values() for entry in group}
+                merged = f"，其中 {len(copies)} 个与其他文件内容相同，缩进列在首个文件之下" if copies else ""
+                f.write(f"共发现 {len(results)} 个文件未检测到鉴权代码{merged}:\n\n")
+                for entry in results:
+                    if entry in copies:
+                        continue
+                    f.write(f"{entry[1]}\n")
+                    for _, file_path in duplicates.get(entry, ()):
+                        f.write(f"    {file_path}\n")
+
+    def save_records(self, records, output_path, fmt=None):
+        """以结构化格式（jsonl/csv/sarif，默认按扩展名推断）逐条写出扫描结果，返回写出的条数"""
+        fmt = fmt or format_for_path(output_path, 'jsonl')
+        count = 0
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            writer = open_writer(fmt, f)
+            for record in records:
+                writer.write(record)
+                count += 1
+            writer.close()
+        return count
@@ -0,0 +1,126 @@
+import csv
+import json
+import os
+import subprocess
+
+from scanner_reader import VERDICT_NO_AUTH
+from scanner_results import format_for_path, relative_path
+
+
+def git_toplevel(cwd=None):
+    """返回git仓库根目录，不在仓库中时返回None"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=cwd,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def git_changed_files(ref, cwd=None, include_untracked=False):
+    """返回相对ref发生变化（新增、复制、修改、重命名）的文件绝对路径列表
+
+    ref可以是单个提交（与工作区比较），也可以是 base...HEAD 形式（合并请求的改动范围）。
+    """
+    root = git_toplevel(cwd)
+    if root is None:
+        raise ValueError(f"不是git仓库: {cwd or os.getcwd()}")
+    commands = [["git", "diff", "--name-only", "-z", "--diff-filter=ACMR", ref]]
+    if include_untracked:
+        commands.append(["git", "ls-files", "--others", "--exclude-standard", "-z"])
+    paths = []
+    for command in commands:
+        result = subprocess.run(command, cwd=root, capture_output=True, check=True)
+        names = result.stdout.decode("utf-8", errors="surrogateescape").split("\0")
+        paths.extend(os.path.join(root, name) for name in names if name)
+    return list(dict.fromkeys(paths))
+
+
+def read_path_list(stream, base=None):
+    """读取每行一个路径的文件列表（如 git diff --name-only 的输出），相对路径按base解析"""
+    base = base or os.getcwd()
+    paths = []
+    for line in stream:
+        line = line.strip()
+        if line:
+            paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return list(dict.fromkeys(paths))
+
+
+def normalize_relpath(relpath):
+    return relpath.replace("\\", "/")
+
+
+def directory_key(directory):
+    """扫描目录的比较键：按命令行中给出的写法，只统一分隔符并去掉多余的 ./ 和末尾分隔符"""
+    if directory is None:
+        return None
+    return os.path.normpath(directory).replace("\\", "/")
+
+
+class Baseline:
+    """基线中的未鉴权文件
+
+    jsonl/csv结果记录了扫描目录，按 (扫描目录, 相对路径) 匹配，不同目录下的同名文件互不影响；
+    文本报告只有相对路径，只能按相对路径匹配（见ambiguous）。
+    """
+
+    def __init__(self):
+        self.keys = set()  # (扫描目录, 相对路径)
+        self.relpaths = set()  # 来自文本报告，不含扫描目录
+
+    def __len__(self):
+        return len(self.keys) + len(self.relpaths)
+
+    def __contains__(self, record):
+        relpath = normalize_relpath(relative_path(record))
+        return (directory_key(record.directory), relpath) in self.keys or relpath in self.relpaths
+
+    def ambiguous(self, directories):
+        """文本报告中在多个扫描目录下都存在的相对路径：这些文件无法区分，会在所有目录中都被视为已知"""
+        if len(directories) < 2:
+            return []
+        return sorted(relpath for relpath in self.relpaths
+                      if sum(os.path.isfile(os.path.join(d, relpath)) for d in directories) > 1)
+
+
+def load_baseline(path):
+    """读取基线结果文件中的未鉴权文件，返回Baseline（相对路径统一使用/分隔）
+
+    支持save_results保存的文本报告，以及jsonl/csv格式的结构化结果。
+    """
+    fmt = format_for_path(path)
+    baseline = Baseline()
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            rows = (json.loads(line) for line in f if line.strip())
+        elif fmt == "csv":
+            rows = csv.DictReader(f)
+        elif fmt == "sarif":
+            raise ValueError("SARIF结果只包含绝对路径，无法作为基线，请使用jsonl/csv或文本报告")
+        else:
+            baseline.relpaths.update(parse_text_report(f))
+            return baseline
+        baseline.keys.update((directory_key(r.get("directory") or None), normalize_relpath(r["path"]))
+                             for r in rows if r.get("verdict") == VERDICT_NO_AUTH)
+    return baseline
+
+
+def parse_text_report(lines):
+    """解析save_results的文本报告，产出未鉴权文件的相对路径"""
+    in_results = False
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("【扫描结果】"):
+            in_results = True
+            continue
+        if not in_results or not line.strip():
+            continue
+        if line.startswith("共发现 ") or line.startswith("所有PHP文件"):
+            continue
+        yield normalize_relpath(line.strip())
+
+
+def in_baseline(record, baseline):
+    """结果文件是否已记录在基线中"""
+    return record in baseline
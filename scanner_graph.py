@@ -0,0 +1,356 @@
+import os
+import re
+from collections import namedtuple
+
+from scanner_lexer import STRIP_COMMENTS, strip_php
+from scanner_reader import FULL_READ, VERDICT_AUTH, VERDICT_ERROR, VERDICT_INHERITED, VERDICT_NO_AUTH, match_file
+
+# 以下模式在转为小写的源码上匹配，并以关键字开头（可利用字面量前缀快速查找，比IGNORECASE和\b开头快得多），
+# 关键字之前的字符另行检查，再按相同位置从原文取出路径和类名
+# include/require语句的路径表达式（到分号或行尾为止）
+_INCLUDES = (re.compile(rb'require(?:_once)?\b\s*([^;\n]*)'), re.compile(rb'include(?:_once)?\b\s*([^;\n]*)'))
+# 路径表达式中的字符串字面量；含变量的双引号字符串无法静态确定，不匹配
+_STRING = re.compile(rb"""'((?:[^'\\]|\\.)*)'|"((?:[^"\\$]|\\.)*)\"""")
+_DIRNAME = re.compile(rb'dirname\s*\(')
+_NAMESPACE = re.compile(rb'namespace\s+([\w\\]+)\s*[;{]')
+# 文件顶层（行首）的 use 导入；类体内缩进的 use 为trait，不在此列
+_USE = re.compile(rb'\nuse\s+\\?([\w\\]+)(?:\s+as\s+(\w+))?\s*;')
+_CLASS = re.compile(rb'class\s+(?!extends\b|implements\b)(\w+)(?:\s+extends\s+([\w\\]+))?')
+# 出现在关键字之前时说明不是语句开头：标识符的一部分、变量（$include）、方法或静态调用（->include、::class）
+_NOT_KEYWORD_BEFORE = frozenset(b'abcdefghijklmnopqrstuvwxyz0123456789_$>:\\' + bytes(range(0x80, 0x100)))
+
+# 依赖链最多记录的文件数，更长时省略中间部分，只保留开头几个和最后含鉴权代码的文件
+MAX_VIA = 8
+
+# 类文件的命名方式：PSR-4（Name.php）和ThinkPHP 3.2（Name.class.php）
+_CLASS_FILE_SUFFIXES = ('.php', '.class.php')
+
+# 单个文件中与依赖关系有关的声明
+# includes: include/require的路径（(基准目录或None, 相对路径)）  classes: 定义的类（小写完整类名）
+# parents: 父类的完整类名
+_FileRefs = namedtuple('_FileRefs', 'includes classes parents')
+_NO_REFS = _FileRefs((), frozenset(), ())
+
+
+def _file_key(file_path):
+    return os.path.abspath(file_path)
+
+
+def _class_stem(file_path):
+    """文件名中第一个点之前的部分（小写），用于按类名查找文件"""
+    return os.path.basename(file_path).split('.', 1)[0].lower()
+
+
+def _qualify(name, namespace, uses):
+    """按命名空间和 use 导入把类名解析为完整类名"""
+    if name.startswith('\\'):
+        return name[1:]
+    head, sep, rest = name.partition('\\')
+    imported = uses.get(head.lower())
+    if imported is not None:
+        return imported + sep + rest
+    return f"{namespace}\\{name}" if namespace else name
+
+
+def _keywords(pattern, lowered):
+    """查找以关键字开头的匹配，跳过关键字前面紧跟标识符字符等的位置"""
+    for match in pattern.finditer(lowered):
+        start = match.start()
+        if not start or lowered[start - 1] not in _NOT_KEYWORD_BEFORE:
+            yield match
+
+
+def _group(code, match, group):
+    """按小写源码中的匹配位置从原文取出分组（未参与匹配时返回空字节串）"""
+    start, end = match.span(group)
+    return code[start:end] if start >= 0 else b''
+
+
+def parse_refs(code, file_path):
+    """从（已去除注释的）PHP源码字节中提取include目标、定义的类和父类"""
+    lowered = code.lower()
+    includes = []
+    matches = [m for pattern in _INCLUDES for m in _keywords(pattern, lowered)]
+    for match in sorted(matches, key=lambda m: m.start()):
+        expr = _group(code, match, 1)
+        lower_expr = match.group(1)
+        literal = b''.join(single or double for single, double in _STRING.findall(expr))
+        if not literal:
+            continue  # 路径完全由变量或常量拼接，无法静态确定
+        base = None
+        if b'__dir__' in lower_expr or b'__file__' in lower_expr:
+            base = file_path if b'__file__' in lower_expr else os.path.dirname(file_path)
+            for _ in _DIRNAME.findall(lower_expr):
+                base = os.path.dirname(base)
+        includes.append((base, os.fsdecode(literal)))
+
+    match = next(_keywords(_NAMESPACE, lowered), None)
+    namespace = os.fsdecode(_group(code, match, 1)) if match else ''
+    uses = {}
+    for match in _USE.finditer(lowered):
+        name = os.fsdecode(_group(code, match, 1))
+        uses[os.fsdecode(match.group(2)) if match.group(2) else name.rpartition('\\')[2].lower()] = name
+    classes = set()
+    parents = []
+    for match in _keywords(_CLASS, lowered):
+        classes.add(_qualify(os.fsdecode(match.group(1)), namespace.lower(), {}))
+        if match.group(2):
+            parents.append(_qualify(os.fsdecode(_group(code, match, 2)), namespace, uses))
+    return _FileRefs(tuple(includes), frozenset(classes), tuple(parents)), namespace
+
+
+class AuthGraph:
+    """include/require与类继承关系图：自身没有鉴权代码、但include的文件或父类中有鉴权代码的文件视为已鉴权
+
+    节点为文件，边指向include/require的目标文件和父类所在的文件。只从未鉴权文件出发按需展开
+    （已鉴权的文件不再读取其依赖），扫描范围之外的依赖文件按需匹配一次。循环include、互相继承
+    用Tarjan算法按强连通分量处理：分量按逆拓扑序完成，每个文件的结论只计算一次，
+    总耗时与访问到的文件数加依赖数成线性关系。
+    """
+
+    def __init__(self, pattern, options=FULL_READ):
+        self.pattern = pattern
+        self.options = options
+        self.files_read = 0  # 为提取依赖而读取的文件数
+        self.files_matched = 0  # 扫描范围之外、按需匹配的依赖文件数
+        self._verdicts = {}  # 文件 -> 自身的判定
+        self._stems = {}  # 类名（小写） -> 扫描范围内同名的文件
+        self._refs = {}
+        self._edges = {}
+        self._protected = {}  # 文件 -> 是否已鉴权（自身或经由依赖）
+        self._hop = {}  # 已鉴权文件 -> 依赖链上的下一个文件，自身含鉴权代码时为None
+        self._source = {}  # 已鉴权文件 -> 依赖链末端含鉴权代码的文件
+        self._namespace_dirs = {}  # 命名空间前缀（小写） -> 目录，由已读取文件的命名空间和所在目录推断
+        self._class_files = {}
+        self._include_files = {}
+
+    @property
+    def nodes(self):
+        return len(self._protected)
+
+    @property
+    def edges(self):
+        return sum(len(targets) for targets in self._edges.values())
+
+    def add(self, record):
+        """登记一条扫描结果（自身的判定）"""
+        key = _file_key(record.path)
+        self._verdicts[key] = record.verdict
+        self._stems.setdefault(_class_stem(key), []).append(key)
+
+    def protected_by(self, file_path):
+        """返回使文件获得鉴权的依赖链（文件路径元组，最后一个文件含鉴权代码），未获得鉴权时返回None"""
+        key = _file_key(file_path)
+        if key not in self._protected:
+            self._resolve(key)
+        if not self._protected[key]:
+            return None
+        chain = []
+        hop = self._hop[key]
+        while hop is not None and len(chain) < MAX_VIA - 1:
+            chain.append(hop)
+            hop = self._hop[hop]
+        if hop is not None:
+            chain.append(self._source[key])
+        return tuple(chain) or None
+
+    def apply(self, records):
+        """把经由依赖获得鉴权的未鉴权结果改写为VERDICT_INHERITED"""
+        for record in records:
+            if record.verdict == VERDICT_NO_AUTH:
+                chain = self.protected_by(record.path)
+                if chain is not None:
+                    record = record._replace(verdict=VERDICT_INHERITED, via=chain)
+            yield record
+
+    def _is_auth(self, key):
+        """文件自身是否含鉴权代码（扫描范围之外的文件按需匹配）"""
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            try:
+                verdict = match_file(key, self.pattern, self.options)[0]
+            except Exception:
+                verdict = VERDICT_ERROR
+            self._verdicts[key] = verdict
+            self.files_matched += 1
+        return verdict == VERDICT_AUTH
+
+    def _read_refs(self, key):
+        """读取文件并提取依赖声明（每个文件只读取一次）"""
+        refs = self._refs.get(key)
+        if refs is not None:
+            return refs
+        refs = _NO_REFS
+        try:
+            if self.options.max_file_size is None or os.path.getsize(key) <= self.options.max_file_size:
+                with open(key, 'rb') as f:
+                    code = strip_php(f.read(), STRIP_COMMENTS)
+                self.files_read += 1
+                refs, namespace = parse_refs(code, key)
+                if namespace:
+                    self._learn_namespace(namespace, os.path.dirname(key))
+        except OSError:
+            pass
+        self._refs[key] = refs
+        return refs
+
+    def _learn_namespace(self, namespace, directory):
+        """按命名空间与目录结构的对应关系（PSR-4）记录命名空间前缀所在的目录
+
+        如 app/admin/controller 中的 app\\admin\\controller，可推断 app\\common\\controller\\Base 位于
+        app/common/controller/Base.php；命名空间首段与目录名不同（如 app 对应 application）时同样适用。
+        """
+        segments = namespace.split('\\')
+        parts = directory.split(os.sep)
+        matched = 0
+        while matched < min(len(segments), len(parts) - 1) \
+                and segments[-1 - matched].lower() == parts[-1 - matched].lower():
+            matched += 1
+        for i in range(len(segments) - matched, len(segments) + 1):
+            prefix = '\\'.join(segments[:i]).lower()
+            self._namespace_dirs.setdefault(prefix, os.sep.join(parts[:len(parts) - (len(segments) - i)]))
+
+    def _edges_of(self, key):
+        """文件的依赖（已鉴权的文件不需要展开）"""
+        if key in self._edges:
+            return self._edges[key]
+        targets = []
+        if not self._is_auth(key):
+            refs = self._read_refs(key)
+            directory = os.path.dirname(key)
+            for base, relpath in refs.includes:
+                target = self._include_target(base, relpath, directory)
+                if target is not None:
+                    targets.append(target)
+            for qualified in refs.parents:
+                target = self._class_file(qualified, directory)
+                if target is not None:
+                    targets.append(target)
+        targets = [t for t in dict.fromkeys(targets) if t != key]
+        self._edges[key] = targets
+        return targets
+
+    def _include_target(self, base, relpath, directory):
+        """解析include路径：__DIR__等固定基准直接拼接，否则依次尝试所在目录及其上级目录
+        （覆盖 APP_PATH . 'common/x.php' 这类以常量开头的写法），最后按文件名在扫描范围内唯一匹配
+        """
+        cache_key = (base, relpath, None if base is not None else directory)
+        if cache_key in self._include_files:
+            return self._include_files[cache_key]
+        relpath = relpath.replace('/', os.sep)
+        if base is not None:
+            candidates = [os.path.join(base, relpath.lstrip(os.sep))]
+        elif os.path.isabs(relpath):
+            candidates = [relpath]
+        else:
+            candidates = []
+            current = directory
+            while True:
+                candidates.append(os.path.join(current, relpath))
+                parent = os.path.dirname(current)
+                if parent == current:
+                    break
+                current = parent
+        target = next((os.path.normpath(c) for c in candidates if os.path.isfile(c)), None)
+        if target is None and base is None:
+            name = os.path.basename(relpath)
+            same_name = [k for k in self._stems.get(_class_stem(name), ()) if os.path.basename(k) == name]
+            if len(same_name) == 1:
+                target = same_name[0]
+        self._include_files[cache_key] = target
+        return target
+
+    def _class_file(self, qualified, directory):
+        """查找定义父类的文件：按命名空间推断的目录、引用者所在目录、扫描范围内的同名文件，
+        候选文件须确实定义了该类
+        """
+        lowered = qualified.lower()
+        cache_key = (lowered, directory)
+        if cache_key in self._class_files:
+            return self._class_files[cache_key]
+        segments = qualified.split('\\')
+        name = segments.pop()
+        candidates = []
+        for i in range(len(segments), -1, -1):
+            base = self._namespace_dirs.get('\\'.join(segments[:i]).lower())
+            if base is not None:
+                # 命名空间的其余部分按原始大小写作为目录名（PSR-4）
+                candidates.extend(os.path.join(base, *segments[i:], name + suffix) for suffix in _CLASS_FILE_SUFFIXES)
+                break
+        candidates.extend(os.path.join(directory, name + suffix) for suffix in _CLASS_FILE_SUFFIXES)
+        candidates.extend(self._stems.get(name.lower(), ()))
+        target = None
+        for candidate in dict.fromkeys(candidates):
+            key = _file_key(candidate)
+            if os.path.isfile(key) and lowered in self._read_refs(key).classes:
+                target = key
+                break
+        self._class_files[cache_key] = target
+        return target
+
+    def _resolve(self, start):
+        """从start出发做迭代式Tarjan强连通分量分解，完成访问到的所有文件的结论"""
+        index = {start: 0}
+        low = {start: 0}
+        stack = [start]
+        work = [(start, iter(self._edges_of(start)))]
+        while work:
+            key, targets = work[-1]
+            for target in targets:
+                if target in self._protected:
+                    continue
+                if target not in index:
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    work.append((target, iter(self._edges_of(target))))
+                    break
+                # 已访问且尚未完成的文件都在栈中
+                low[key] = min(low[key], index[target])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[key])
+                if low[key] == index[key]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        members.append(member)
+                        if member == key:
+                            break
+                    self._finish_component(members)
+
+    def _finish_component(self, members):
+        """确定一个强连通分量中各文件的结论和依赖链（分量之外的依赖均已完成）"""
+        member_set = set(members)
+        hop = {}
+        queue = []
+        for member in members:
+            if self._is_auth(member):
+                hop[member] = None
+                queue.append(member)
+                continue
+            for target in self._edges[member]:
+                if target not in member_set and self._protected[target]:
+                    hop[member] = target
+                    queue.append(member)
+                    break
+        if queue and len(members) > 1:
+            # 分量内沿反向边传播，保证依赖链不成环
+            dependents = {}
+            for member in members:
+                for target in self._edges[member]:
+                    if target in member_set:
+                        dependents.setdefault(target, []).append(member)
+            for member in queue:
+                for dependent in dependents.get(member, ()):
+                    if dependent not in hop:
+                        hop[dependent] = member
+                        queue.append(dependent)
+        for member in members:
+            self._protected[member] = member in hop
+        self._hop.update(hop)
+        for member in queue:
+            # 分量内的下一跳在队列中排在前面，分量外的已经完成
+            target = hop[member]
+            self._source[member] = member if target is None else self._source[target]
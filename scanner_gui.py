@@ -1,22 +1,200 @@
 import os
+import queue
+import threading
+import time
+from contextlib import closing
+import tkinter as tk
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
-from scanner_core import PHPAuthScanner
+from scanner_archive import ARCHIVE_EXTENSIONS, is_archive
+from scanner_cache import ScanCache
+from scanner_index import IdentifierIndex
+from scanner_lexer import STRIP_COMMENTS, STRIP_STRINGS
+from scanner_core import (
+    DEFAULT_KEYWORDS, VERDICT_ERROR, VERDICT_INHERITED, VERDICT_NO_AUTH, VERDICT_SUPPRESSED, VERDICT_SUPPRESSED_CHANGED,
+    VERDICT_TOO_LARGE, PHPAuthScanner
+)
+from scanner_profile import ScanProfile
+from scanner_results import format_for_path, relative_path
+from scanner_rules import BUILTIN_PACKS, app_dirs, detect_packs
+from scanner_suppress import SuppressionIndex
+from scanner_view import ROW_GROUP, SORT_DISCOVERED, SORT_PATH, SORT_VERDICT, ResultStore
+from scanner_walk import COMMON_EXCLUDES, FileWalker
+from scanner_watch import UPDATE_REMOVED, ScanWatcher
+
+# 匹配范围选项 -> 剥离模式
+MATCH_SCOPES = {
+    "全部内容": None,
+    "忽略注释": STRIP_COMMENTS,
+    "忽略注释和字符串": STRIP_STRINGS,
+}
+
+# 结果列表的判定过滤选项 -> 显示的判定（None为全部）
+VERDICT_FILTERS = {
+    "全部": None,
+    "未鉴权": (VERDICT_NO_AUTH,),
+    "已忽略但有改动": (VERDICT_SUPPRESSED_CHANGED,),
+    "读取失败": (VERDICT_ERROR,),
+    "过大跳过": (VERDICT_TOO_LARGE,),
+}
+
+# 结果列表的排序选项
+SORT_OPTIONS = {
+    "发现顺序": SORT_DISCOVERED,
+    "路径": SORT_PATH,
+    "判定": SORT_VERDICT,
+}
+
+# 日志区域最多保留的行数，超出后丢弃最早的行
+MAX_LOG_LINES = 500
 
 # 设置customtkinter主题和外观
 ctk.set_appearance_mode("System")  # 可选: "System", "Dark", "Light"
 ctk.set_default_color_theme("blue")  # 可选: "blue", "green", "dark-blue"
 
 
+class ResultList(ctk.CTkFrame):
+    """虚拟化的结果列表：只绘制当前可见的几十行，结果再多绘制开销和占用的控件也不变
+
+    点击目录标题行折叠或展开该目录。
+    """
+    ROW_HEIGHT = 20
+    # 外观模式 -> (背景, 文字, 目录标题背景, 需要留意的结果)
+    COLORS = {
+        "Light": ("#f9f9fa", "#1a1a1a", "#dde3ea", "#c25e00"),
+        "Dark": ("#1d1e1e", "#dce4ee", "#2b3440", "#f0a04b"),
+    }
+
+    def __init__(self, master, store, **kwargs):
+        super().__init__(master, **kwargs)
+        self.store = store
+        self.top = 0  # 第一条可见行的行号
+        self.font = ctk.CTkFont(family="Consolas", size=12)
+        self.header_font = ctk.CTkFont(family="Consolas", size=12, weight="bold")
+        self.canvas = tk.Canvas(self, highlightthickness=0, borderwidth=0)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y", pady=4)
+        self.canvas.pack(side="left", fill="both", expand=True, padx=(4, 0), pady=4)
+        self.canvas.bind("<Configure>", lambda event: self.refresh())
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(3))
+        self.canvas.bind("<Button-1>", self._on_click)
+
+    def _page(self):
+        """画布能完整显示的行数"""
+        return max(1, self.canvas.winfo_height() // self.ROW_HEIGHT)
+
+    def yview(self, *args):
+        """滚动条回调：('moveto', 比例) 或 ('scroll', 数量, 'units'/'pages')"""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * self.store.row_count())
+        elif args[0] == "scroll":
+            self.top += int(args[1]) * (self._page() if args[2] == "pages" else 1)
+        self.refresh()
+
+    def scroll(self, rows):
+        self.top += rows
+        self.refresh()
+
+    def _on_click(self, event):
+        rows = self.store.rows(self.top + event.y // self.ROW_HEIGHT, self.top + event.y // self.ROW_HEIGHT + 1)
+        if rows and rows[0][0] == ROW_GROUP:
+            self.store.toggle(rows[0][1])
+            self.refresh()
+
+    def _describe(self, record):
+        relpath = relative_path(record)
+        copies = self.store.copies(record.path)
+        if copies:
+            relpath = f"{relpath}（另有 {len(copies)} 个内容相同的文件，如 {copies[0]}）"
+        if record.verdict == VERDICT_SUPPRESSED_CHANGED:
+            return f"{relpath}（⚠️ 已忽略，但内容有改动，请重新确认）"
+        if record.verdict == VERDICT_ERROR:
+            return f"{relpath}（⚠️ 无法读取: {record.error}）"
+        if record.verdict == VERDICT_TOO_LARGE:
+            return f"{relpath}（⚠️ 过大跳过: {record.size} 字节）"
+        return relpath
+
+    def refresh(self):
+        """重新绘制可见行并同步滚动条位置"""
+        total = self.store.row_count()
+        page = self._page()
+        self.top = max(0, min(self.top, total - page))
+        background, text, header, warning = self.COLORS.get(ctk.get_appearance_mode(), self.COLORS["Light"])
+        canvas = self.canvas
+        canvas.configure(bg=background)
+        canvas.delete("all")
+        width = canvas.winfo_width()
+        # 多取一行，补上底部只露出一部分的行
+        for n, row in enumerate(self.store.rows(self.top, self.top + page + 1)):
+            y = n * self.ROW_HEIGHT
+            if row[0] == ROW_GROUP:
+                _, directory, count, collapsed = row
+                canvas.create_rectangle(0, y, width, y + self.ROW_HEIGHT, fill=header, width=0)
+                canvas.create_text(6, y + self.ROW_HEIGHT // 2, anchor="w", fill=text, font=self.header_font,
+                                   text=f"{'▸' if collapsed else '▾'} {directory}（{count}）")
+            else:
+                record = row[1]
+                canvas.create_text(26, y + self.ROW_HEIGHT // 2, anchor="w", font=self.font,
+                                   fill=text if record.verdict == VERDICT_NO_AUTH else warning,
+                                   text=self._describe(record))
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + page) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+
 class ScannerGUI:
     def __init__(self, root):
         self.root = root
-        self.scanner = PHPAuthScanner()
+        self.scanner = PHPAuthScanner(
+            workers=os.cpu_count() or 1, cache=self._open_cache()
+        )
+        self.scanner.suppressions = self._open_suppressions()
         self.icon_image = None  # 保持对图标图片的引用
+        self.scan_queue = queue.Queue()  # 后台扫描线程向界面传递结果的队列
+        self.cancel_event = threading.Event()
+        self.scan_thread = None
+        self.discover_queue = queue.Queue()  # 后台查找Controller目录的结果队列
+        self.discover_thread = None
+        self.watcher = None  # 监视模式下保留各文件判定的ScanWatcher
+        self.watcher_key = None  # 创建watcher时的 (扫描目录, 排除规则)，改变后需要重新完整扫描
+        self.watch_queue = queue.Queue()  # 后台监视线程向界面传递增量结果的队列
+        self.watch_stop = threading.Event()
+        self.watch_thread = None
+        self.identifier_index = None  # 勾选"标识符索引"后打开的IdentifierIndex
+        self.result_store = ResultStore()  # 需要关注的结果（未鉴权、读取失败、过大跳过），按目录分组显示并用于导出
+        self.view_job = None  # 输入路径前缀后延迟应用过滤的定时器
         self.setup_ui()
         self.setup_icon()
 
+    def _open_cache(self):
+        """打开持久化扫描缓存，失败时不使用缓存"""
+        try:
+            return ScanCache()
+        except Exception as e:
+            print(f"打开扫描缓存失败: {e}")
+            return None
+
+    def _open_index(self):
+        """打开持久化标识符索引，失败时返回None（此时仍使用扫描缓存）"""
+        if self.identifier_index is None:
+            try:
+                self.identifier_index = IdentifierIndex()
+            except Exception as e:
+                print(f"打开标识符索引失败: {e}")
+        return self.identifier_index
+
+    def _open_suppressions(self):
+        """读取默认位置的忽略列表，失败时不使用忽略列表"""
+        try:
+            return SuppressionIndex()
+        except Exception as e:
+            print(f"读取忽略列表失败: {e}")
+            return None
+
     def setup_icon(self):
         """设置应用图标"""
         icon_path = os.path.join(os.path.dirname(__file__), "caigosec.ico")
@@ -38,6 +216,7 @@ class ScannerGUI:
         new_mode = "Dark" if current_mode == "Light" else "Light"
         ctk.set_appearance_mode(new_mode)
         self.theme_switch.configure(text="暗色模式" if new_mode == "Light" else "亮色模式")
+        self.result_list.refresh()  # 结果列表直接绘制在画布上，需要按新主题重绘
 
     def setup_ui(self):
         """初始化现代化用户界面"""
@@ -110,15 +289,27 @@ class ScannerGUI:
             hover_color="#2c7ed6"
         )
         self.add_dir_btn.pack(side="left", padx=3, pady=5)
+
+        # 客户提供的源码压缩包直接在内存中扫描，无需先解压
+        self.add_archive_btn = ctk.CTkButton(
+            dir_btn_frame,
+            text="添加压缩包",
+            command=self.add_archive,
+            width=100,
+            corner_radius=6,
+            fg_color="#3b8ed0",
+            hover_color="#2c7ed6"
+        )
+        self.add_archive_btn.pack(side="left", padx=3, pady=5)
         
-        self.add_thinkphp_btn = ctk.CTkButton(
+        self.add_framework_btn = ctk.CTkButton(
             dir_btn_frame, 
-            text="添加ThinkPHP项目", 
-            command=self.detect_thinkphp_project,
+            text="添加框架项目", 
+            command=self.detect_framework_project,
             width=120,
             corner_radius=6
         )
-        self.add_thinkphp_btn.pack(side="left", padx=3, pady=5)
+        self.add_framework_btn.pack(side="left", padx=3, pady=5)
         
         self.custom_dir_btn = ctk.CTkButton(
             dir_btn_frame, 
@@ -168,8 +359,64 @@ class ScannerGUI:
             corner_radius=6,
             font=ctk.CTkFont(family="Consolas", size=12)
         )
-        self.keyword_entry.pack(fill="x", pady=(0, 10), padx=5)
-        self.keyword_entry.insert(0, "session auth login AdminBase AuthBase")
+        self.keyword_entry.pack(fill="x", pady=(0, 5), padx=5)
+        self.keyword_entry.insert(0, " ".join(DEFAULT_KEYWORDS))
+
+        scope_row = ctk.CTkFrame(keyword_frame, fg_color="transparent")
+        scope_row.pack(fill="x", pady=(0, 10), padx=5)
+        scope_label = ctk.CTkLabel(scope_row, text="匹配范围", font=ctk.CTkFont(size=12))
+        scope_label.pack(side="left", padx=(0, 10))
+        # 注释中的关键词（如 // TODO 加上登录校验）不应算作鉴权代码
+        self.scope_menu = ctk.CTkOptionMenu(scope_row, values=list(MATCH_SCOPES), width=160)
+        self.scope_menu.pack(side="left")
+        self.scope_menu.set("全部内容")
+        # 控制器通过 require 公共文件或继承基类完成鉴权时，自身不含关键词
+        self.follow_check = ctk.CTkCheckBox(scope_row, text="追踪include/继承", font=ctk.CTkFont(size=12))
+        self.follow_check.pack(side="left", padx=(15, 0))
+        # 扫描完成后继续监视，文件改动时只重新判定改动的文件；再次扫描时不再遍历目录
+        self.watch_check = ctk.CTkCheckBox(scope_row, text="监视文件变化", font=ctk.CTkFont(size=12),
+                                           command=self.toggle_watch)
+        self.watch_check.pack(side="left", padx=(15, 0))
+        # 调整关键词时反复扫描：索引记录每个文件中的标识符，修改关键词后无需重新读取文件
+        self.index_check = ctk.CTkCheckBox(scope_row, text="标识符索引", font=ctk.CTkFont(size=12))
+        self.index_check.pack(side="left", padx=(15, 0))
+        # 多个目录中复制的模块、多租户副本：内容相同的文件只评估一次，结果合并显示
+        self.dedup_check = ctk.CTkCheckBox(scope_row, text="合并相同文件", font=ctk.CTkFont(size=12))
+        self.dedup_check.pack(side="left", padx=(15, 0))
+        # 各阶段计时有额外开销，只在需要排查扫描慢的原因时勾选
+        self.profile_check = ctk.CTkCheckBox(scope_row, text="性能统计", font=ctk.CTkFont(size=12))
+        self.profile_check.pack(side="left", padx=(15, 0))
+
+        # 框架规则包：勾选的规则包与上面的关键词编译为同一个匹配引擎
+        rules_row = ctk.CTkFrame(keyword_frame, fg_color="transparent")
+        rules_row.pack(fill="x", pady=(0, 10), padx=5)
+        rules_label = ctk.CTkLabel(rules_row, text="框架规则", font=ctk.CTkFont(size=12))
+        rules_label.pack(side="left", padx=(0, 10))
+        self.pack_checks = {}
+        for name, pack in BUILTIN_PACKS.items():
+            check = ctk.CTkCheckBox(rules_row, text=pack.title, font=ctk.CTkFont(size=12))
+            check.pack(side="left", padx=(0, 10))
+            self.pack_checks[name] = check
+
+        # 排除规则输入部分
+        exclude_frame = ctk.CTkFrame(config_frame, corner_radius=8)
+        exclude_frame.pack(fill="x", pady=5, padx=10)
+
+        exclude_label = ctk.CTkLabel(
+            exclude_frame,
+            text="排除目录/文件",
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        exclude_label.pack(anchor="w", pady=(5, 5), padx=5)
+
+        self.exclude_entry = ctk.CTkEntry(
+            exclude_frame,
+            placeholder_text="输入排除规则，用空格分隔（支持通配符，re:开头为正则）",
+            corner_radius=6,
+            font=ctk.CTkFont(family="Consolas", size=12)
+        )
+        self.exclude_entry.pack(fill="x", pady=(0, 10), padx=5)
+        self.exclude_entry.insert(0, " ".join(COMMON_EXCLUDES))
 
         # 正则表达式显示部分
         regex_frame = ctk.CTkFrame(config_frame, corner_radius=8)
@@ -207,6 +454,20 @@ class ScannerGUI:
             hover_color="#388e3c"
         )
         self.scan_btn.pack(side="left", padx=10, pady=5)
+
+        self.cancel_btn = ctk.CTkButton(
+            action_frame,
+            text="取消扫描",
+            command=self.cancel_scan,
+            width=120,
+            height=50,
+            corner_radius=8,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            fg_color="#d32f2f",
+            hover_color="#b71c1c",
+            state="disabled"
+        )
+        self.cancel_btn.pack(side="left", padx=10, pady=5)
         
         self.save_btn = ctk.CTkButton(
             action_frame, 
@@ -221,6 +482,19 @@ class ScannerGUI:
         )
         self.save_btn.pack(side="left", padx=10, pady=5)
 
+        self.suppress_btn = ctk.CTkButton(
+            action_frame,
+            text="导入忽略列表",
+            command=self.import_suppressions,
+            width=120,
+            height=50,
+            corner_radius=8,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            fg_color="#757575",
+            hover_color="#616161"
+        )
+        self.suppress_btn.pack(side="left", padx=10, pady=5)
+
         # 结果展示部分
         result_frame = ctk.CTkFrame(main_frame, corner_radius=10)
         result_frame.pack(fill="both", expand=True, pady=5)
@@ -231,14 +505,63 @@ class ScannerGUI:
             font=ctk.CTkFont(size=14, weight="bold")
         )
         result_label.pack(anchor="w", pady=(5, 5), padx=5)
-        
+
+        # 结果过滤与排序
+        view_row = ctk.CTkFrame(result_frame, fg_color="transparent")
+        view_row.pack(fill="x", padx=5, pady=(0, 5))
+
+        self.prefix_entry = ctk.CTkEntry(
+            view_row,
+            placeholder_text="按路径前缀过滤",
+            width=260,
+            height=28,
+            corner_radius=6
+        )
+        self.prefix_entry.pack(side="left", padx=(0, 10))
+        self.prefix_entry.bind("<KeyRelease>", self._schedule_view)
+
+        self.verdict_menu = ctk.CTkOptionMenu(
+            view_row,
+            values=list(VERDICT_FILTERS),
+            command=self.apply_view,
+            width=130,
+            height=28
+        )
+        self.verdict_menu.pack(side="left", padx=(0, 10))
+
+        ctk.CTkLabel(view_row, text="排序:", font=ctk.CTkFont(size=12)).pack(side="left", padx=(0, 5))
+        self.sort_menu = ctk.CTkOptionMenu(
+            view_row,
+            values=list(SORT_OPTIONS),
+            command=self.apply_view,
+            width=100,
+            height=28
+        )
+        self.sort_menu.pack(side="left", padx=(0, 10))
+
+        self.reverse_check = ctk.CTkCheckBox(
+            view_row,
+            text="倒序",
+            command=self.apply_view,
+            font=ctk.CTkFont(size=12)
+        )
+        self.reverse_check.pack(side="left")
+
+        self.count_label = ctk.CTkLabel(view_row, text="", font=ctk.CTkFont(size=12))
+        self.count_label.pack(side="right")
+
+        self.result_list = ResultList(result_frame, self.result_store, corner_radius=6)
+        self.result_list.pack(fill="both", expand=True, pady=(0, 5), padx=5)
+
+        # 扫描过程的日志（只保留最近的MAX_LOG_LINES行）
         self.result_text = ctk.CTkTextbox(
             result_frame, 
             corner_radius=6,
+            height=120,
             font=ctk.CTkFont(family="Consolas", size=12),
             state="disabled"
         )
-        self.result_text.pack(fill="both", expand=True, pady=(0, 10), padx=5)
+        self.result_text.pack(fill="x", pady=(0, 10), padx=5)
         
         # 设置进度条（初始隐藏）
         self.progress_frame = ctk.CTkFrame(main_frame, corner_radius=10, fg_color="transparent")
@@ -256,6 +579,17 @@ class ScannerGUI:
         self.progress_bar.set(0)
 
 
+    def _build_walker(self):
+        """按排除规则输入创建目录遍历器，规则无效时提示并返回None
+
+        不直接替换扫描器的walker：后台扫描和监视线程仍在使用它，由调用方在这些线程停止后再替换。
+        """
+        try:
+            return FileWalker(exclude=self.exclude_entry.get().strip().split())
+        except ValueError as e:
+            messagebox.showerror("错误", f"排除规则无效:\n{e}")
+            return None
+
     def add_directory(self):
         """添加普通目录"""
         directory = filedialog.askdirectory()
@@ -269,71 +603,49 @@ class ScannerGUI:
             # 滚动到底部
             self.dir_listbox.see("end")
 
-    def detect_thinkphp_project(self):
-        """检测ThinkPHP项目并提取app/application中的controller目录"""
-        project_dir = filedialog.askdirectory(title="选择ThinkPHP项目根目录")
+    def add_archive(self):
+        """添加zip/tar.gz/phar压缩包，扫描时在内存中读取其中的PHP文件"""
+        patterns = " ".join(f"*{ext}" for ext in ARCHIVE_EXTENSIONS)
+        archives = filedialog.askopenfilenames(filetypes=[("压缩包", patterns), ("所有文件", "*.*")])
+        for archive in archives:
+            if self.dir_listbox.get("0.0", "end").strip():
+                self.dir_listbox.insert("end", "\n")
+            self.dir_listbox.insert("end", archive)
+        if archives:
+            self.dir_listbox.see("end")
+
+    def detect_framework_project(self):
+        """识别项目使用的框架，勾选对应的规则包，并按框架的目录结构提取Controller目录"""
+        project_dir = filedialog.askdirectory(title="选择框架项目根目录")
         if not project_dir:
             return
 
         # 显示加载动画或进度
-        self.log_result(f"🔍 正在分析ThinkPHP项目结构: {project_dir}")
+        self.log_result(f"🔍 正在分析项目结构: {project_dir}")
 
-        # 标准ThinkPHP目录结构
-        possible_dirs = [
-            os.path.join(project_dir, "app"),  # ThinkPHP 5.x/6.x
-            os.path.join(project_dir, "application")  # ThinkPHP 3.2
-        ]
-
-        # 查找存在的目录
-        found_dirs = [d for d in possible_dirs if os.path.exists(d)]
+        packs = detect_packs(project_dir)
+        if packs:
+            for pack in packs:
+                self.pack_checks[pack.name].select()
+            self.log_result(f"🧩 识别到框架: {', '.join(pack.title for pack in packs)}，已勾选对应的规则包")
+        else:
+            # 没有标志文件时按ThinkPHP的目录结构查找（app: 5.x/6.x，application: 3.2）
+            packs = [BUILTIN_PACKS['thinkphp']]
+        found_dirs = list(dict.fromkeys(d for pack in packs for d in app_dirs(project_dir, pack)))
 
         if not found_dirs:
             messagebox.showwarning(
                 "未找到标准目录",
-                "未找到app或application目录，请使用'自定义工作目录'功能手动指定"
+                "未找到框架的应用代码目录，请使用'自定义工作目录'功能手动指定"
             )
             return
 
-        # 从找到的目录中提取controller目录
-        controller_dirs = []
-        for base_dir in found_dirs:
-            # 查找base_dir下的所有controller目录
-            for root, dirs, _ in os.walk(base_dir):
-                if os.path.basename(root).lower() == "controller":
-                    # 检查目录中是否有PHP文件
-                    if any(f.endswith('.php') for f in os.listdir(root)):
-                        controller_dirs.append(root)
-
-        if not controller_dirs:
-            messagebox.showwarning(
-                "未找到Controller目录",
-                f"在{project_dir}的app/application目录中未找到有效的Controller目录"
-            )
-            return
-
-        # 添加找到的Controller目录
-        added = 0
-        current_dirs = set(self.dir_listbox.get("0.0", "end").strip().split("\n"))
-        
-        # 获取当前文本内容
-        current_text = self.dir_listbox.get("0.0", "end").strip()
-        need_newline = bool(current_text)
-        
-        for dir_path in controller_dirs:
-            if dir_path not in current_dirs:
-                if need_newline:
-                    self.dir_listbox.insert("end", "\n")
-                    need_newline = False
-                self.dir_listbox.insert("end", dir_path)
-                need_newline = True
-                added += 1
-
-        # 滚动到底部
-        self.dir_listbox.see("end")
-        
-        # 显示成功消息
-        messagebox.showinfo("完成", f"已添加 {added} 个Controller目录")
-        self.log_result(f"✅ 成功添加 {added} 个ThinkPHP Controller目录")
+        self._start_discovery(
+            found_dirs,
+            ("未找到Controller目录", f"在{project_dir}的应用代码目录中未找到有效的Controller目录"),
+            f"{'/'.join(pack.title for pack in packs)} Controller目录",
+            [pack.controller_dir for pack in packs]
+        )
 
     def extract_controller_dirs(self, base_dir=None):
         """从指定目录提取Controller目录"""
@@ -345,40 +657,90 @@ class ScannerGUI:
         # 显示正在扫描
         self.log_result(f"🔍 正在扫描目录结构: {base_dir}")
 
-        # 查找所有controller目录（不区分大小写）
-        controller_dirs = []
-        for root, dirs, _ in os.walk(base_dir):
-            if os.path.basename(root).lower() == "controller":
-                # 检查目录中是否有PHP文件
-                if any(f.endswith('.php') for f in os.listdir(root)):
-                    controller_dirs.append(root)
+        self._start_discovery(
+            [base_dir],
+            ("警告", f"在 {base_dir} 中未找到有效的Controller目录"),
+            "Controller目录"
+        )
 
-        if not controller_dirs:
-            messagebox.showwarning("警告", f"在 {base_dir} 中未找到有效的Controller目录")
+    def _listed_directories(self):
+        """读取目录列表中的目录"""
+        dirs_text = self.dir_listbox.get("0.0", "end").strip()
+        return [d.strip() for d in dirs_text.split("\n") if d.strip()]
+
+    def _start_discovery(self, base_dirs, not_found, label, dir_names=('controller',)):
+        """在后台线程中查找Controller目录，界面通过定时器逐个添加到目录列表"""
+        if self.discover_thread is not None and self.discover_thread.is_alive():
+            messagebox.showinfo("提示", "正在查找目录，请稍候")
+            return
+        walker = self._build_walker()
+        if walker is None:
             return
+        # 去重集合只在开始时从文本框读取一次，之后随添加同步维护
+        self.discover_known = set(self._listed_directories())
+        self.discover_need_newline = bool(self.discover_known)
+        self.discover_added = 0
+        self.discover_found = 0
+        self.discover_not_found = not_found
+        self.discover_label = label
+        for btn in (self.add_framework_btn, self.custom_dir_btn):
+            btn.configure(state="disabled")
+        self.discover_thread = threading.Thread(
+            target=self._discover_worker, args=(base_dirs, dir_names, walker), daemon=True
+        )
+        self.discover_thread.start()
+        self.root.after(100, self._drain_discover_queue)
 
-        # 添加找到的Controller目录
-        added = 0
-        current_dirs = set(self.dir_listbox.get("0.0", "end").strip().split("\n"))
-        
-        # 获取当前文本内容
-        current_text = self.dir_listbox.get("0.0", "end").strip()
-        need_newline = bool(current_text)
-        
-        for dir_path in controller_dirs:
-            if dir_path not in current_dirs:
-                if need_newline:
-                    self.dir_listbox.insert("end", "\n")
-                    need_newline = False
-                self.dir_listbox.insert("end", dir_path)
-                need_newline = True
-                added += 1
+    def _discover_worker(self, base_dirs, dir_names, walker):
+        """后台查找线程：单次遍历，发现的目录及其PHP文件数放入队列"""
+        put = self.discover_queue.put
+        try:
+            for dir_path, count in self.scanner.discover_controller_dirs(base_dirs, dir_names, walker):
+                put(("dir", dir_path, count))
+        except Exception as e:
+            put(("error", str(e)))
+        finally:
+            put(("done",))
 
+    def _drain_discover_queue(self):
+        """定时读取查找队列，逐步把新发现的目录追加到目录列表"""
+        finished = False
+        try:
+            while True:
+                message = self.discover_queue.get_nowait()
+                if message[0] == "dir":
+                    self.discover_found += 1
+                    dir_path = message[1]
+                    if dir_path in self.discover_known:
+                        continue
+                    self.discover_known.add(dir_path)
+                    if self.discover_need_newline:
+                        self.dir_listbox.insert("end", "\n")
+                    self.dir_listbox.insert("end", dir_path)
+                    self.discover_need_newline = True
+                    self.discover_added += 1
+                    self.log_result(f"📁 {dir_path} ({message[2]} 个PHP文件)")
+                elif message[0] == "error":
+                    self.log_result(f"❌ 查找目录出错: {message[1]}")
+                else:
+                    finished = True
+                    break
+        except queue.Empty:
+            pass
         # 滚动到底部
         self.dir_listbox.see("end")
-        
-        messagebox.showinfo("完成", f"已添加 {added} 个Controller目录")
-        self.log_result(f"✅ 成功添加 {added} 个Controller目录")
+        if not finished:
+            self.root.after(100, self._drain_discover_queue)
+            return
+
+        for btn in (self.add_framework_btn, self.custom_dir_btn):
+            btn.configure(state="normal")
+        if not self.discover_found:
+            messagebox.showwarning(*self.discover_not_found)
+            return
+        # 显示成功消息
+        messagebox.showinfo("完成", f"已添加 {self.discover_added} 个Controller目录")
+        self.log_result(f"✅ 成功添加 {self.discover_added} 个{self.discover_label}")
 
     def remove_directory(self):
         """移除选中的目录"""
@@ -411,22 +773,39 @@ class ScannerGUI:
         self.result_text.configure(state="normal")
         self.result_text.delete("0.0", "end")
         self.result_text.configure(state="disabled")
+        self.result_store.clear()
+        self.refresh_results()
 
         # 获取目录列表
-        dirs_text = self.dir_listbox.get("0.0", "end").strip()
-        directories = [d.strip() for d in dirs_text.split("\n") if d.strip()]
+        directories = self._listed_directories()
         
         if not directories:
             messagebox.showerror("错误", "请至少添加一个扫描目录！")
             return
 
         keywords = self.keyword_entry.get().strip().split()
-        if not keywords:
-            messagebox.showerror("错误", "请输入至少一个关键词！")
+        packs = [BUILTIN_PACKS[name] for name, check in self.pack_checks.items() if check.get()]
+        if not keywords and not packs:
+            messagebox.showerror("错误", "请输入至少一个关键词或勾选框架规则！")
+            return
+
+        if self.scan_thread is not None and self.scan_thread.is_alive():
+            messagebox.showinfo("提示", "正在扫描，请稍候")
+            return
+        walker = self._build_walker()
+        if walker is None:
             return
+        # 监视线程停止后才能替换walker，之后扫描线程和新的监视都使用新的walker
+        self._stop_watch()
+        self.scanner.walker = walker
+        self.scanner.lexer = MATCH_SCOPES.get(self.scope_menu.get())
+        self.scanner.follow_includes = bool(self.follow_check.get())
+        self.scanner.index = self._open_index() if self.index_check.get() else None
+        self.scanner.dedup = bool(self.dedup_check.get())
+        self.scanner.profile = ScanProfile() if self.profile_check.get() else None
 
-        # 生成正则表达式
-        pattern = self.scanner.generate_regex(keywords)
+        # 生成匹配引擎（显示的正则与generate_regex一致），规则包的关键词一并编译
+        pattern = self.scanner.generate_matcher(keywords, packs)
 
         # 更新正则表达式显示
         self.regex_display.configure(state="normal")
@@ -439,59 +818,269 @@ class ScannerGUI:
         self.progress_bar.pack(side="left", padx=10, pady=5)
         self.progress_label.pack(side="left", padx=10, pady=5)
         
-        # 禁用扫描按钮
+        # 禁用扫描按钮，启用取消按钮
         self.scan_btn.configure(state="disabled")
-        
-        # 执行扫描（使用after来避免UI卡顿）
-        self.root.after(100, self._execute_scan, directories, pattern)
-    
-    def _execute_scan(self, directories, pattern):
-        """实际执行扫描操作的方法"""
-        total_results = []
-        total_dirs = len(directories)
-        
-        for i, directory in enumerate(directories):
-            # 更新进度
-            progress = (i + 1) / total_dirs
-            self.progress_bar.set(progress)
-            self.progress_label.configure(text=f"正在扫描 ({i+1}/{total_dirs}): {os.path.basename(directory)}")
-            self.root.update_idletasks()
-            
-            self.log_result(f"\n🔎 开始扫描目录: {directory}")
-            results = list(self.scanner.scan_directory(directory, pattern))
-            total_results.extend([(directory, r) for r in results if not r.startswith("⚠️")])
+        self.cancel_btn.configure(state="normal")
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="准备扫描...")
 
-            if not results:
-                self.log_result("✅ 所有 PHP 文件均包含鉴权代码！")
+        # 在后台线程中扫描，界面通过定时器分批读取结果
+        self.cancel_event.clear()
+        self.scan_done = 0
+        self.scan_suppressed = 0
+        self.scan_inherited = 0
+        self.scan_started = time.perf_counter()
+        # 重复添加的目录只扫描一次
+        directories = list(dict.fromkeys(directories))
+        # 监视模式：目录和排除规则未变时复用已知的文件列表，只重新判定而不遍历目录
+        key = (tuple(directories), tuple(walker.exclude))
+        if self.watcher is not None and (not self.watch_check.get() or self.watcher_key != key):
+            self.watcher.close()
+            self.watcher = None
+        if self.watch_check.get() and any(is_archive(d) for d in directories):
+            # 压缩包不会在扫描期间改变，监视模式只对目录有意义
+            self.watch_check.deselect()
+            self.log_result("⚠️ 扫描列表中包含压缩包，已关闭监视模式")
+        if self.watch_check.get() and self.watcher is None:
+            self.watcher = ScanWatcher(self.scanner, directories, pattern)
+            self.watcher_key = key
+        # 目录查找阶段已统计过文件数的目录，预先确定进度条总量
+        estimates = [self.scanner.estimate_file_count(d) for d in directories]
+        self.scan_expected = sum(estimates) if all(e is not None for e in estimates) else 0
+        self.scan_thread = threading.Thread(
+            target=self._scan_worker, args=(directories, pattern), daemon=True
+        )
+        self.scan_thread.start()
+        self.root.after(100, self._drain_scan_queue)
+
+    def cancel_scan(self):
+        """取消正在进行的扫描"""
+        if self.scan_thread is not None and self.scan_thread.is_alive():
+            self.cancel_event.set()
+            self.cancel_btn.configure(state="disabled")
+            self.progress_label.configure(text="正在取消扫描...")
+
+    def _scan_worker(self, directories, pattern):
+        """后台扫描线程：逐文件扫描并把结果放入队列（不直接操作界面）"""
+        put = self.scan_queue.put
+        pending = iter(directories)
+        current = None
+        count = 0
+
+        def finish_directory():
+            if current is None:
+                return
+            if count:
+                put(("log", f"❌ 共发现 {count} 个文件未检测到鉴权代码"))
             else:
-                error_msgs = [r for r in results if r.startswith("⚠️")]
-                valid_results = [r for r in results if not r.startswith("⚠️")]
+                put(("log", "✅ 所有 PHP 文件均包含鉴权代码！"))
 
-                for msg in error_msgs:
-                    self.log_result(msg)
+        if self.watcher is not None:
+            records = self.watcher.iter_records(pattern)
+        else:
+            records = self.scanner.iter_records(directories, pattern)
+        try:
+            with closing(records) as records:
+                for record in records:
+                    if self.cancel_event.is_set():
+                        break
+                    self.scan_done += 1
+                    # 没有任何PHP文件的目录不会产出结果，切换目录时依次补齐
+                    while record.directory != current:
+                        finish_directory()
+                        current, count = next(pending), 0
+                        put(("log", f"\n🔎 开始扫描目录: {current}"))
+                    if record.verdict == VERDICT_ERROR:
+                        put(("record", record))
+                        put(("log", f"⚠️ 无法读取文件 {record.path}: {record.error}"))
+                    elif record.verdict == VERDICT_TOO_LARGE:
+                        put(("record", record))
+                        put(("log", f"⚠️ 跳过过大文件 {record.path}: {record.size} 字节"))
+                    elif record.verdict in (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED):
+                        count += 1
+                        put(("found", record))
+                    elif record.verdict == VERDICT_SUPPRESSED:
+                        self.scan_suppressed += 1
+                    elif record.verdict == VERDICT_INHERITED:
+                        self.scan_inherited += 1
+            if not self.cancel_event.is_set():
+                finish_directory()
+                for current in pending:
+                    put(("log", f"\n🔎 开始扫描目录: {current}"))
+                    put(("log", "✅ 所有 PHP 文件均包含鉴权代码！"))
+        except Exception as e:
+            put(("log", f"❌ 扫描出错: {str(e)}"))
+        finally:
+            put(("done", self.cancel_event.is_set()))
 
-                if valid_results:
-                    self.log_result(f"❌ 共发现 {len(valid_results)} 个文件未检测到鉴权代码:")
-                    for file_path in valid_results:
-                        # 确保只显示文件路径，不包含目录前缀
-                        self.log_result(f"- {file_path}")
-        
-        # 扫描完成后更新UI
-        self.progress_label.configure(text="扫描完成！")
-        self.root.update_idletasks()
-        
+    def _drain_scan_queue(self):
+        """定时分批读取扫描队列，批量更新结果区域和进度"""
+        lines = []
+        added = False
+        finished = None
+        try:
+            for _ in range(5000):
+                message = self.scan_queue.get_nowait()
+                if message[0] == "log":
+                    lines.append(message[1])
+                elif message[0] in ("record", "found"):
+                    # 结果进入结果列表，由列表按目录分组显示，不再逐行写入日志
+                    self.result_store.add(message[1])
+                    added = True
+                else:
+                    finished = message[1]
+                    break
+        except queue.Empty:
+            pass
+        if lines:
+            self._append_lines(lines)
+        if added:
+            self.refresh_results()
+
+        # 更新逐文件进度与吞吐量
+        elapsed = max(time.perf_counter() - self.scan_started, 1e-6)
+        total = max(self.scan_expected, self.scanner.files_discovered, self.scan_done)
+        if total:
+            self.progress_bar.set(self.scan_done / total)
+        if finished is None:
+            self.progress_label.configure(
+                text=f"正在扫描 {self.scan_done}/{total} 个文件 ({self.scan_done / elapsed:.0f} 文件/秒)"
+            )
+            self.root.after(100, self._drain_scan_queue)
+        else:
+            self._finish_scan(cancelled=finished, elapsed=elapsed)
+
+    def _finish_scan(self, cancelled, elapsed):
+        """扫描结束后汇总结果并恢复界面状态"""
+        total_results = list(self.result_store.found())
         self.scanner.scan_results = total_results
 
-        if total_results:
-            self.log_result("\n📊 扫描完成，发现以下未鉴权文件:")
-            for dir_path, file_path in total_results:
-                # 只显示文件路径，不包含目录前缀
-                self.log_result(f"- {file_path}")
+        if cancelled:
+            self.progress_label.configure(text=f"扫描已取消（已扫描 {self.scan_done} 个文件）")
+            self.log_result(f"\n⏹️ 扫描已取消，已扫描 {self.scan_done} 个文件")
         else:
+            self.progress_bar.set(1)
+            self.progress_label.configure(
+                text=f"扫描完成！共 {self.scan_done} 个文件，用时 {elapsed:.1f} 秒"
+            )
+
+        if self.scanner.index is not None:
+            stats = self.scanner.index_stats
+            self.log_result(f"\n🗂️ 索引直接得出 {stats['answered']} 个文件的判定，读取确认 {stats['read']} 个文件，"
+                            f"新建或更新索引 {stats['indexed']} 个文件")
+        elif self.scanner.cache is not None:
+            stats = self.scanner.cache_stats
+            self.log_result(f"\n♻️ 缓存命中 {stats['cached']} 个文件，重新扫描 {stats['rescanned']} 个文件")
+
+        if self.scanner.dedup:
+            stats = self.scanner.dedup_stats
+            self.log_result(f"🧬 {stats['duplicates']} 个文件与其他文件内容相同，沿用了首个文件的判定"
+                            f"（计算摘要 {stats['hashed']} 个文件）")
+
+        if self.scanner.profile is not None:
+            self.log_result(f"⏱️ {self.scanner.profile.summary()}")
+
+        if self.scan_suppressed:
+            self.log_result(f"🙈 忽略列表中 {self.scan_suppressed} 个文件未显示")
+
+        if self.scan_inherited:
+            self.log_result(f"🔗 {self.scan_inherited} 个文件经由include/继承获得鉴权")
+
+        if total_results:
+            # 未鉴权文件已在结果列表中逐个列出，这里只汇总数量
+            self.log_result(f"\n📊 扫描已取消，已发现 {len(total_results)} 个未鉴权文件" if cancelled
+                            else f"\n📊 扫描完成，共发现 {len(total_results)} 个未鉴权文件")
+        elif not cancelled:
             self.log_result("\n🎉 扫描完成，所有目录中的PHP文件均包含鉴权代码！")
         
         # 恢复按钮状态
         self.scan_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+
+        if self.watcher is not None:
+            if cancelled:
+                # 判定只更新了一部分，下次扫描时重新完整扫描
+                self.watcher.close()
+                self.watcher = None
+            else:
+                self._start_watch()
+
+    def toggle_watch(self):
+        """取消勾选时停止监视"""
+        if not self.watch_check.get() and self.watcher is not None:
+            self._stop_watch()
+            self.watcher.close()
+            self.watcher = None
+            self.log_result("⏹️ 已停止监视文件变化")
+
+    def _start_watch(self):
+        """扫描完成后在后台线程中监视文件变化"""
+        self.watch_stop = threading.Event()
+        self.watch_queue = queue.Queue()  # 丢弃上一次监视遗留的消息
+        self.watch_thread = threading.Thread(
+            target=self._watch_worker, args=(self.watcher, self.watch_stop), daemon=True
+        )
+        self.watch_thread.start()
+        self.log_result(f"👀 正在监视文件变化（{self.watcher.backend_name}），文件改动后自动更新结果")
+        self.root.after(200, self._drain_watch_queue)
+
+    def _stop_watch(self):
+        """停止后台监视线程（等待其退出，之后才能在其他线程中使用watcher）"""
+        if self.watch_thread is not None:
+            self.watch_stop.set()
+            self.watch_thread.join()
+            self.watch_thread = None
+
+    def _watch_worker(self, watcher, stop):
+        """后台监视线程：每批变化重新判定后放入队列"""
+        try:
+            for updates in watcher.watch(stop):
+                self.watch_queue.put(("updates", updates, watcher.last_rescan))
+        except Exception as e:
+            self.watch_queue.put(("error", str(e)))
+
+    def _drain_watch_queue(self):
+        """定时读取监视队列，把判定变化追加到结果区域并同步更新可保存的结果"""
+        lines = []
+        try:
+            while True:
+                message = self.watch_queue.get_nowait()
+                if message[0] == "error":
+                    lines.append(f"❌ 监视出错: {message[1]}")
+                    continue
+                _, updates, (files, seconds) = message
+                lines.append(f"\n🔄 {time.strftime('%H:%M:%S')} {files} 个文件有变化，"
+                             f"重新判定用时 {seconds * 1000:.1f}ms")
+                lines.extend(self._apply_updates(updates))
+        except queue.Empty:
+            pass
+        if lines:
+            self._append_lines(lines)
+        if self.watch_thread is not None and self.watch_thread.is_alive():
+            self.root.after(200, self._drain_watch_queue)
+
+    def _apply_updates(self, updates):
+        """把增量结果合并到当前结果列表，返回要显示的说明"""
+        flagged = (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED)
+        noted = (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED, VERDICT_ERROR, VERDICT_TOO_LARGE)
+        store = self.result_store
+        lines = []
+        for update in updates:
+            record, previous = update.record, update.previous
+            if previous is not None:
+                store.discard(previous.path)
+            if record is not None and record.verdict in noted:
+                store.add(record)
+            if record is not None and record.verdict in flagged:
+                lines.append(f"❌ {relative_path(record)} 未检测到鉴权代码")
+            elif record is not None and record.verdict in (VERDICT_ERROR, VERDICT_TOO_LARGE):
+                lines.append(f"⚠️ {relative_path(record)}: {record.error or f'{record.size} 字节'}")
+            elif previous is not None and previous.verdict in flagged:
+                lines.append(f"🗑️ {relative_path(previous)} 已删除" if update.kind == UPDATE_REMOVED
+                             else f"✅ {relative_path(previous)} 已检测到鉴权代码")
+        self.scanner.scan_results = list(store.found())
+        self.refresh_results()
+        return lines
 
     def save_results(self):
         """保存扫描结果"""
@@ -503,7 +1092,8 @@ class ScannerGUI:
         default_path = os.path.join(os.getcwd(), "scan_results.txt")
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")],
+            filetypes=[("文本文件", "*.txt"), ("JSON Lines", "*.jsonl"), ("CSV", "*.csv"),
+                       ("SARIF", "*.sarif"), ("所有文件", "*.*")],
             initialfile="scan_results.txt",
             initialdir=os.getcwd()
         )
@@ -513,15 +1103,23 @@ class ScannerGUI:
         
         try:
             # 获取目录列表
-            dirs_text = self.dir_listbox.get("0.0", "end").strip()
-            directories = [d.strip() for d in dirs_text.split("\n") if d.strip()]
+            directories = self._listed_directories()
+
+            # 按扩展名选择结构化格式，其余保存为文本报告
+            fmt = format_for_path(file_path)
+            if fmt is not None:
+                self.scanner.save_records(self.result_store.records(), file_path, fmt)
+                messagebox.showinfo("保存成功", f"扫描结果已保存到:\n{file_path}")
+                self.log_result(f"💾 扫描结果已保存到: {file_path}")
+                return
             
             self.scanner.save_results(
                 keywords=self.keyword_entry.get(),
                 regex=self.regex_display.get("0.0", "end").strip(),
                 directories=directories,
                 results=self.scanner.scan_results,
-                output_path=file_path
+                output_path=file_path,
+                duplicates=self.result_store.duplicates()
             )
             messagebox.showinfo("保存成功", f"扫描结果已保存到:\n{file_path}")
             self.log_result(f"💾 扫描结果已保存到: {file_path}")
@@ -529,9 +1127,64 @@ class ScannerGUI:
             messagebox.showerror("保存失败", f"保存结果时出错:\n{str(e)}")
             self.log_result(f"❌ 保存结果失败: {str(e)}")
 
+    def import_suppressions(self):
+        """把已保存的扫描结果中的未鉴权文件导入忽略列表，之后的扫描不再显示这些文件"""
+        if self.scanner.suppressions is None:
+            messagebox.showerror("导入失败", "忽略列表不可用")
+            return
+        file_path = filedialog.askopenfilename(
+            filetypes=[("扫描结果", "*.txt *.jsonl *.csv"), ("所有文件", "*.*")],
+            initialdir=os.getcwd()
+        )
+        if not file_path:
+            return
+        suppressions = self.scanner.suppressions
+        try:
+            imported, missing = suppressions.import_report(file_path, self._listed_directories())
+            suppressions.save()
+        except Exception as e:
+            messagebox.showerror("导入失败", f"导入忽略列表时出错:\n{str(e)}")
+            self.log_result(f"❌ 导入忽略列表失败: {str(e)}")
+            return
+        message = f"已导入 {imported} 个文件到忽略列表（共 {len(suppressions)} 个）"
+        if missing:
+            message += f"，{missing} 个文件未找到"
+        messagebox.showinfo("导入成功", message)
+        self.log_result(f"🙈 {message}: {suppressions.path}")
+
+    def _schedule_view(self, _event=None):
+        """输入路径前缀时延迟应用过滤，连续输入只整理一次"""
+        if self.view_job is not None:
+            self.root.after_cancel(self.view_job)
+        self.view_job = self.root.after(300, self.apply_view)
+
+    def apply_view(self, _value=None):
+        """按当前的过滤和排序选项重新整理结果列表"""
+        self.view_job = None
+        self.result_store.set_view(
+            self.prefix_entry.get().strip(),
+            VERDICT_FILTERS.get(self.verdict_menu.get()),
+            SORT_OPTIONS.get(self.sort_menu.get()),
+            bool(self.reverse_check.get())
+        )
+        self.result_list.top = 0
+        self.refresh_results()
+
+    def refresh_results(self):
+        """重绘结果列表的可见行并更新计数"""
+        self.result_list.refresh()
+        self.count_label.configure(text=f"显示 {self.result_store.visible_count()} / 共 {len(self.result_store)}")
+
     def log_result(self, message):
         """在结果区域记录消息"""
+        self._append_lines([message])
+
+    def _append_lines(self, lines):
+        """一次性向结果区域追加多行，避免逐行切换文本框状态"""
         self.result_text.configure(state="normal")
-        self.result_text.insert("end", message + "\n")
+        self.result_text.insert("end", "\n".join(lines) + "\n")
+        excess = int(self.result_text.index("end-1c").split(".")[0]) - 1 - MAX_LOG_LINES
+        if excess > 0:
+            self.result_text.delete("1.0", f"{excess + 1}.0")
         self.result_text.configure(state="disabled")
         self.result_text.see("end")
\ No newline at end of file
@@ -0,0 +1,284 @@
+import os
+import re
+import sqlite3
+import threading
+from array import array
+
+from scanner_lexer import strip_php
+from scanner_reader import decode_text, is_empty_php
+
+# 索引默认保存位置
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".phpauthscanner", "identifier_index.sqlite3")
+
+# 索引格式版本，分词规则或表结构变化时递增，旧索引自动清空
+INDEX_VERSION = 2
+
+# 查找片段时每条查询读取的标识符数（不超过SQLite的参数个数上限）
+LOOKUP_BATCH = 500
+
+# 已失效的文件id超过有效文件数时整理倒排表
+COMPACT_MIN_DEAD = 10000
+
+# 标识符：连续的字母数字下划线及非ASCII字节（多字节字符不会被拆开）
+_IDENT = re.compile(rb'[0-9a-z_\x80-\xff]+')
+_SEPARATOR = re.compile(r'[^0-9a-z_]+')
+# 忽略大小写匹配时与ASCII标识符字符等价的非ASCII字符（re.IGNORECASE的语义）
+_FOLDS = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})  # İ ı ſ K
+_FOLDABLE = re.compile('[\u0130\u0131\u017f\u212a]')
+# 剥离模式下可能开始注释、字符串或标签外HTML的字符
+_STRIPPED_STARTS = set('\'"/#?<')
+
+
+def file_tokens(raw, lexer=None):
+    """提取文件内容中的标识符（小写bytes），返回 (是否为空文件, 标识符集合)
+
+    与匹配时的处理一致：纯ASCII文件在小写后的原始字节上提取；含非ASCII字节时按解码后的文本
+    （忽略大小写的等价字符折叠为ASCII）提取，解码只会去掉无效字节，原始字节中连续的ASCII字符在文本中仍然连续。
+    lexer不为None时只提取剥离后留下的代码中的标识符，此时字节和文本的剥离结果可能不同（如heredoc结束标识符
+    的大小写），两者都要提取。
+    """
+    ascii_only = raw.isascii()
+    text = None
+    if not ascii_only or len(raw.strip()) <= 5:
+        text = decode_text(raw)
+        if is_empty_php(text):
+            return True, set()
+    tokens = set()
+    if ascii_only or lexer:
+        lowered = raw.lower()
+        tokens.update(_IDENT.findall(strip_php(lowered, lexer) if lexer else lowered))
+    if not ascii_only:
+        if lexer:
+            text = strip_php(text, lexer)
+        if _FOLDABLE.search(text):
+            text = text.translate(_FOLDS)
+        tokens.update(_IDENT.findall(text.encode('utf-8').lower()))
+    return False, tokens
+
+
+def keyword_terms(keyword, lexer=None, annotation=False):
+    """把关键词拆为可在索引中查找的标识符片段，返回 (片段列表, 是否精确)
+
+    只由标识符字符组成的ASCII关键词命中时必然位于某个标识符内部，"有标识符包含该关键词"与文件命中完全等价；
+    其他关键词只能用片段缩小候选范围（各片段都须出现），候选文件仍需读取确认。片段列表为空表示无法缩小范围。
+    """
+    if not keyword.isascii() or (lexer and annotation):
+        # 剥离模式下注解在注释中也有效，索引只含代码中的标识符
+        return [], False
+    lowered = keyword.lower()
+    pieces = [piece for piece in _SEPARATOR.split(lowered) if piece]
+    if pieces == [lowered]:
+        return pieces, True
+    if lexer and pieces:
+        # 剥离模式只要求命中起点位于代码中，关键词后半部分可能落在字符串或注释里，只能依据第一个片段
+        head = lowered[:lowered.index(pieces[0]) + len(pieces[0])]
+        return ([], False) if _STRIPPED_STARTS.intersection(head) else (pieces[:1], False)
+    return pieces, False
+
+
+class IdentifierIndex:
+    """持久化标识符倒排索引：记录每个文件中出现的标识符，修改关键词后无需重新读取文件即可得出判定
+
+    倒排表按标识符保存包含它的文件id（array('I')的字节），文件内容变化时分配新id，旧id留在倒排表中
+    并在查询时忽略，失效id过多时整理一遍。索引与剥离模式绑定，剥离模式改变时清空重建。
+    所有标识符另按写入批次以换行连接保存在names表中，查找片段时在内存中搜索这些文本，
+    再按标识符主键读取文件id列表，不必逐行扫描倒排表。
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL UNIQUE,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                empty INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tokens (
+                token BLOB PRIMARY KEY,
+                ids BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS names (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tokens BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._pending = {}  # 标识符 -> 尚未写入的文件id
+        self._files = None  # 文件路径 -> (id, mtime_ns, 大小, 是否为空文件)
+        self._found = {}  # 片段 -> 文件id集合，标识符表变化时清空
+        self._names = None  # 已读取的names批次：[最后的批次id, 以换行连接的标识符...]
+        if self._meta('version') != str(INDEX_VERSION):
+            self._reset(lexer=None)
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _reset(self, lexer):
+        self._conn.execute("DELETE FROM files")
+        self._conn.execute("DELETE FROM tokens")
+        self._conn.execute("DELETE FROM names")
+        self._set_meta('version', INDEX_VERSION)
+        self._set_meta('lexer', lexer or '')
+        self._set_meta('dead', 0)
+        self._conn.commit()
+        self._pending = {}
+        self._files = None
+        self._found = {}
+        self._names = None
+
+    @property
+    def lexer(self):
+        """建立索引时的剥离模式"""
+        return self._meta('lexer') or None
+
+    def use_lexer(self, lexer):
+        """切换剥离模式，与已有索引不同时清空索引"""
+        with self._lock:
+            if (self._meta('lexer') or None) != (lexer or None):
+                self._reset(lexer)
+
+    def files(self):
+        """已索引的文件，{绝对路径: (id, mtime_ns, 大小, 是否为空文件)}"""
+        with self._lock:
+            if self._files is None:
+                rows = self._conn.execute("SELECT path, id, mtime_ns, size, empty FROM files")
+                self._files = {path: (file_id, mtime_ns, size, bool(empty))
+                               for path, file_id, mtime_ns, size, empty in rows}
+            return dict(self._files)
+
+    def store(self, file_path, mtime_ns, size, empty, tokens):
+        """写入（或替换）文件的标识符集合，倒排表在flush或下次查询时批量写入"""
+        with self._lock:
+            old = self._conn.execute("SELECT id FROM files WHERE path = ?", (file_path,)).fetchone()
+            if old is not None:
+                self._conn.execute("DELETE FROM files WHERE id = ?", (old[0],))
+                self._set_meta('dead', int(self._meta('dead') or 0) + 1)
+            file_id = self._conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, empty) VALUES (?, ?, ?, ?)",
+                (file_path, mtime_ns, size, int(empty))
+            ).lastrowid
+            if self._files is not None:
+                self._files[file_path] = (file_id, mtime_ns, size, bool(empty))
+            pending = self._pending
+            for token in tokens:
+                ids = pending.get(token)
+                if ids is None:
+                    pending[token] = array('I', (file_id,))
+                else:
+                    ids.append(file_id)
+
+    def _write_pending(self):
+        """把新增的倒排项追加到各标识符的文件id列表末尾"""
+        if not self._pending:
+            return
+        exists = "SELECT 1 FROM tokens WHERE token = ?"
+        new = [token for token in self._pending if self._conn.execute(exists, (token,)).fetchone() is None]
+        if new:
+            self._conn.execute("INSERT INTO names (tokens) VALUES (?)", (b'\n'.join(new),))
+        self._conn.executemany(
+            "INSERT INTO tokens (token, ids) VALUES (?, ?) "
+            "ON CONFLICT(token) DO UPDATE SET ids = CAST(ids || excluded.ids AS BLOB)",
+            ((token, ids.tobytes()) for token, ids in self._pending.items())
+        )
+        self._pending = {}
+        self._found = {}
+
+    def _token_names(self):
+        """所有标识符，以换行连接的若干段bytes，只读取上次之后新写入的批次"""
+        if self._names is None:
+            self._names = [0]
+        rows = self._conn.execute("SELECT id, tokens FROM names WHERE id > ? ORDER BY id", (self._names[0],))
+        for name_id, data in rows:
+            self._names[0] = name_id
+            self._names.append(data)
+        return self._names[1:]
+
+    def find(self, piece):
+        """包含片段（小写ASCII标识符字符）的标识符所在的文件id集合，可能含已失效的id"""
+        with self._lock:
+            self._write_pending()
+            found = self._found.get(piece)
+            if found is not None:
+                return found
+            needle = piece.encode('ascii')
+            matched = []
+            for names in self._token_names():
+                # 命中后跳到该标识符末尾，每个标识符只取一次
+                start = names.find(needle)
+                while start >= 0:
+                    begin = names.rfind(b'\n', 0, start) + 1
+                    end = names.find(b'\n', start)
+                    if end < 0:
+                        end = len(names)
+                    matched.append(names[begin:end])
+                    start = names.find(needle, end)
+            # 按主键分批读取文件id列表；names与倒排表在同一事务中更新，查不到时按没有该标识符处理
+            found = set()
+            for i in range(0, len(matched), LOOKUP_BATCH):
+                batch = matched[i:i + LOOKUP_BATCH]
+                query = f"SELECT ids FROM tokens WHERE token IN ({', '.join('?' * len(batch))})"
+                for (data,) in self._conn.execute(query, batch):
+                    ids = array('I')
+                    ids.frombytes(data)
+                    found.update(ids)
+            self._found[piece] = found
+            return found
+
+    def flush(self):
+        """写入倒排表并提交，失效的文件id过多时整理倒排表"""
+        with self._lock:
+            self._write_pending()
+            dead = int(self._meta('dead') or 0)
+            live = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            if dead > max(live, COMPACT_MIN_DEAD):
+                self._compact()
+            self._conn.commit()
+
+    def _compact(self):
+        """从倒排表中去除已失效的文件id"""
+        live = {row[0] for row in self._conn.execute("SELECT id FROM files")}
+        updates = []
+        for rowid, data in self._conn.execute("SELECT rowid, ids FROM tokens").fetchall():
+            ids = array('I')
+            ids.frombytes(data)
+            kept = array('I', (i for i in ids if i in live))
+            if len(kept) != len(ids):
+                updates.append((kept.tobytes(), rowid))
+        self._conn.executemany("UPDATE tokens SET ids = ? WHERE rowid = ?", updates)
+        self._conn.execute("DELETE FROM tokens WHERE length(ids) = 0")
+        # 重写标识符文本，去掉已删除的标识符
+        self._conn.execute("DELETE FROM names")
+        tokens = [token for (token,) in self._conn.execute("SELECT token FROM tokens")]
+        if tokens:
+            self._conn.execute("INSERT INTO names (tokens) VALUES (?)", (b'\n'.join(tokens),))
+        self._set_meta('dead', 0)
+        self._found = {}
+        self._names = None
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            self._reset(self._meta('lexer'))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        """提交并关闭索引数据库"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
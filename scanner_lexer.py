@@ -0,0 +1,222 @@
+import re
+
+# 剥离模式：只去除注释，或同时去除字符串字面量和PHP标签之外的HTML
+STRIP_COMMENTS = 'comments'
+STRIP_STRINGS = 'strings'
+LEXER_MODES = (STRIP_COMMENTS, STRIP_STRINGS)
+
+# 文件中没有include/require时strings模式使用的内部规则：不必识别include语句，
+# 代码部分只在 /#'"?< 处停下，而不是在每个r/i字母处都进入分支
+_STRINGS_NO_INCLUDE = 'strings-no-include'
+
+# 各类记号的正则片段。_OPEN为未闭合时一直延伸到文本末尾的写法，保证任何输入下都只扫描一遍；
+# _CLOSED要求记号在文本末尾之前结束，用于判断某个位置是否落在记号内部
+_SINGLE = r"'[^'\\]*(?:\\.[^'\\]*)*"
+_DOUBLE = r'"[^"\\]*(?:\\.[^"\\]*)*'
+_HEREDOC_START = r"""<<<[ \t]*(?P<quote>["']?)(?P<label>[A-Za-z_]\w*)(?P=quote)\r?\n.*?"""
+_HEREDOC_END = r'\n[ \t]*(?P=label)\b'
+_STRING_OPEN = rf"""{_SINGLE}(?:'|\\?\Z)|{_DOUBLE}(?:"|\\?\Z)|{_HEREDOC_START}(?:{_HEREDOC_END}|\Z)"""
+# 前缀匹配截止于命中位置，结束标识符正好在截止处时看不到其后是否还有标识符字符（如 EOTAUTH），按未结束处理
+_STRING_CLOSED = rf"""{_SINGLE}'|{_DOUBLE}"|{_HEREDOC_START}{_HEREDOC_END}(?!\Z)"""
+# 单行注释在换行（含单独的\r，与文本模式的换行转换一致）或 ?> 处结束；#[ 是PHP 8的注解，不是注释
+_LINE_COMMENT = r'(?://|#(?!\[))[^\r\n?]*(?:\?(?!>)[^\r\n?]*)*'
+_BLOCK_COMMENT = r'/\*[^*]*(?:\*(?!/)[^*]*)*'
+_COMMENT_OPEN = rf'{_LINE_COMMENT}|{_BLOCK_COMMENT}(?:\*/|\Z)'
+_COMMENT_CLOSED = rf'{_LINE_COMMENT}(?=[\r\n]|\?>)|{_BLOCK_COMMENT}\*/'
+# PHP标签之外的HTML：每个 ?> 到下一个起始标签；文件开头到第一个起始标签的部分单独处理
+_OPEN_TAG = r'<\?(?:php|=)?'
+_HTML = r'\?>[^<]*(?:<(?!\?)[^<]*)*'
+_HTML_OPEN = rf'{_HTML}(?:{_OPEN_TAG}|\Z)'
+_HTML_CLOSED = rf'{_HTML}{_OPEN_TAG}'
+_LEAD_HTML = rf'(?!\s*<\?)[^<]*(?:<(?!\?)[^<]*)*(?:{_OPEN_TAG}|\Z)'
+# include/require语句中的文件名本身就是鉴权依据（如 require 'auth.php'），strings模式下整条语句保留
+_INCLUDE = r'\b(?i:require|include)(?i:_once)?\b[^;\n?]*'
+# 不构成heredoc起始的 <
+_LESS = r"""<(?!<<[ \t]*(?P<q2>["']?)[A-Za-z_]\w*(?P=q2)\r?\n)"""
+
+# 代码写成"普通字符串 (其他写法 普通字符串)*"的展开形式，循环次数只与特殊记号数有关。
+# strings模式需要识别include语句，r/i开头的单词单独处理
+_CODE_RUN = r'''[^/#'"?<]*'''
+_CODE_RUN_INCLUDE = r'''[^/#'"?<rRiI]*'''
+
+
+def _code(run, alternatives):
+    return rf"{run}(?:(?:{'|'.join(alternatives)}){run})*"
+
+
+# 保留的内容，在第一个被剥离的记号处停下
+_KEEP = {
+    STRIP_COMMENTS: _code(_CODE_RUN, [_STRING_OPEN, _HTML_OPEN, r'/(?![/*])', r'#(?=\[)', r'\?', r'<']),
+    STRIP_STRINGS: _code(_CODE_RUN_INCLUDE, [_INCLUDE, r'[rRiI]\w*', r'/(?![/*])', r'#(?=\[)', r'\?(?!>)', _LESS]),
+    _STRINGS_NO_INCLUDE: _code(_CODE_RUN, [r'/(?![/*])', r'#(?=\[)', r'\?(?!>)', _LESS]),
+}
+# 被剥离的记号
+_REMOVED = {
+    STRIP_COMMENTS: _COMMENT_OPEN,
+    STRIP_STRINGS: rf'{_COMMENT_OPEN}|{_STRING_OPEN}|{_HTML_OPEN}',
+}
+_REMOVED[_STRINGS_NO_INCLUDE] = _REMOVED[STRIP_STRINGS]
+# 判断位置状态：从代码状态出发，消耗代码和所有完整的记号，在第一个未结束的被剥离记号处停下，
+# 匹配终点等于目标位置说明该位置位于代码（或保留的记号）中
+_STATE = {
+    STRIP_COMMENTS: _code(_CODE_RUN, [_STRING_OPEN, _HTML_OPEN, _COMMENT_CLOSED,
+                                      r'/(?![/*])', r'#(?=\[)', r'\?', r'<']),
+    STRIP_STRINGS: _code(_CODE_RUN_INCLUDE, [_INCLUDE, r'[rRiI]\w*', _STRING_CLOSED, _HTML_CLOSED, _COMMENT_CLOSED,
+                                             r'/(?![/*])', r'#(?=\[)', r'\?(?!>)', _LESS]),
+    _STRINGS_NO_INCLUDE: _code(_CODE_RUN, [_STRING_CLOSED, _HTML_CLOSED, _COMMENT_CLOSED,
+                                           r'/(?![/*])', r'#(?=\[)', r'\?(?!>)', _LESS]),
+}
+
+_LEXERS = {}
+_FILTERS = {}
+_INCLUDE_WORDS = {False: ('require', 'include'), True: (b'require', b'include')}
+
+
+def _blank(text, space, newline):
+    """替换为等长空白，保留换行使行号不变"""
+    if newline not in text:
+        return space * len(text)
+    return newline.join(space * len(part) for part in text.split(newline))
+
+
+class _Lexer:
+    """按剥离模式和输入类型（str/bytes）编译的词法规则"""
+
+    def __init__(self, mode, binary):
+        if mode not in _KEEP:
+            raise ValueError(f"未知的剥离模式: {mode}")
+
+        def compile_(source):
+            # str也按ASCII规则处理\w和\b，与bytes的判定保持一致
+            return re.compile(source.encode('ascii'), re.DOTALL) if binary else re.compile(source, re.DOTALL | re.ASCII)
+
+        self.strip_html = mode != STRIP_COMMENTS
+        self.space, self.newline = (b' ', b'\n') if binary else (' ', '\n')
+        self.heredoc = b'<<<' if binary else '<<<'
+        self.lead = compile_(rf'(?:{_LEAD_HTML})?').match
+        self.removed = compile_(_REMOVED[mode]).match
+        self.state = compile_(_STATE[mode]).match
+        # 每次匹配"保留内容+一个被剥离的记号"，替换函数的调用次数只与被剥离的记号数有关
+        self.sub = compile_(rf'\A(?P<lead>{_LEAD_HTML})|(?P<keep>{_KEEP[mode]})(?:{_REMOVED[mode]}|\Z)').sub
+
+    def lead_end(self, content):
+        """文件开头PHP起始标签之前的HTML的结束位置"""
+        return self.lead(content).end()
+
+    def replace(self, match):
+        text = match.group()
+        if match.lastgroup == 'lead':
+            return _blank(text, self.space, self.newline) if self.strip_html else text
+        keep = match.end('keep') - match.start()
+        if keep == len(text):
+            return text
+        return text[:keep] + _blank(text[keep:], self.space, self.newline)
+
+
+def _lexer(mode, binary):
+    """获取编译好的词法规则（每个进程只编译一次）"""
+    key = (mode, binary)
+    if key not in _LEXERS:
+        _LEXERS[key] = _Lexer(mode, binary)
+    return _LEXERS[key]
+
+
+def _content_lexer(mode, content):
+    """按内容选择词法规则：strings模式下文件中没有include/require时使用不识别include语句的规则，结果相同"""
+    binary = isinstance(content, bytes)
+    if mode == STRIP_STRINGS:
+        # 转小写后查找子串比忽略大小写的正则快一个数量级
+        lowered = content.lower()
+        require, include = _INCLUDE_WORDS[binary]
+        if require not in lowered and include not in lowered:
+            mode = _STRINGS_NO_INCLUDE
+    return _lexer(mode, binary)
+
+
+def strip_php(content, mode=STRIP_COMMENTS):
+    """单次线性扫描PHP源码，将注释（strings模式下还有字符串字面量和标签外的HTML）替换为等长空白
+
+    content可以是str或bytes；替换前后长度不变、换行保留，匹配位置可直接对应原文件。
+    """
+    lexer = _content_lexer(mode, content)
+    return lexer.sub(lexer.replace, content)
+
+
+class CodeFilter:
+    """只接受位于代码中的命中，判定与先strip_php再查找一致，但不生成剥离后的副本
+
+    只在候选命中处从上一个确定处于代码状态的位置向前做一次前缀匹配（在正则引擎内完成），
+    不含关键词的文件完全不做词法分析，已鉴权文件只分析到第一个有效命中为止。
+    """
+
+    def __init__(self, mode=STRIP_COMMENTS, binary=False):
+        self.mode = mode
+        self.binary = binary
+        _lexer(mode, binary)  # 尽早报告未知的剥离模式
+
+    def search(self, find, content, keep=None):
+        """用find(content, pos)逐个查找候选命中，返回第一个起点位于代码中的命中或None
+
+        keep(命中)为真的命中（如文档注释中的注解）不论位于何处都接受，此时被剥离记号中的命中需逐个检查。
+        """
+        lexer = None
+        pos = 0
+        while True:
+            hit = find(content, pos)
+            if hit is None:
+                return None
+            if lexer is None:
+                # 只在出现候选命中时才选择词法规则，不含关键词的文件不做任何分析
+                lexer = _content_lexer(self.mode, content)
+                lead_end = lexer.lead_end(content)
+                resume = lead_end  # 已确定处于代码状态的位置
+            if keep is not None and keep(hit):
+                return hit
+            start = hit.start()
+            if start < lead_end:
+                # 位于文件开头的HTML中
+                if not lexer.strip_html:
+                    return hit
+                pos = lead_end if keep is None else start + 1
+                continue
+            if start < resume:
+                # 位于已跳过的被剥离记号中（只在keep不为None时出现）
+                pos = start + 1
+                continue
+            end = lexer.state(content, resume, start).end()
+            if end == start:
+                end = self._heredoc_opener(lexer, content, resume, start)
+                if end is None:
+                    return hit
+            # 命中位于从end开始的被剥离记号内，跳过整个记号继续查找
+            token = lexer.removed(content, end)
+            if token is None or token.end() <= end:
+                return hit
+            resume = token.end()
+            pos = max(resume, start) if keep is None else start + 1
+
+    def _heredoc_opener(self, lexer, content, resume, start):
+        """strings模式下命中位于heredoc起始行（如 <<<AUTH 的标识符）中时返回 <<< 的位置
+
+        前缀匹配截止于命中位置，看不到标识符之后的换行，无法识别这种情况，需要放宽到行尾再确认一次。
+        """
+        if not lexer.strip_html:
+            return None
+        line_start = content.rfind(lexer.newline, resume, start) + 1
+        opener = content.rfind(lexer.heredoc, max(resume, line_start), start)
+        if opener == -1:
+            return None
+        line_end = content.find(lexer.newline, start)
+        line_end = len(content) if line_end == -1 else line_end + 1
+        if lexer.state(content, resume, line_end).end() != opener:
+            return None
+        token = lexer.removed(content, opener)
+        return opener if token is not None and token.end() > start else None
+
+
+def code_filter(mode, binary=False):
+    """获取（按模式和输入类型缓存的）CodeFilter"""
+    key = (mode, binary)
+    if key not in _FILTERS:
+        _FILTERS[key] = CodeFilter(mode, binary)
+    return _FILTERS[key]
@@ -0,0 +1,209 @@
+import re
+
+
+def keyword_patterns(keyword):
+    """生成单个关键词对应的正则分支"""
+    escaped_keyword = re.escape(keyword)
+    # 移除单词边界匹配符\b，使其能够匹配包含特殊字符的关键词
+    return [
+        escaped_keyword,  # 直接匹配关键词，适用于任何字符
+        rf'\${escaped_keyword}\[',
+        rf'{escaped_keyword}\(',
+        rf'require.*{escaped_keyword}\.php',
+        rf'extends\s+{escaped_keyword}',
+        rf'use\s+.*{escaped_keyword}',
+        rf'\${escaped_keyword}',
+        rf'\$_{escaped_keyword}',
+        rf'\${escaped_keyword}\s*[=!]=\s*[\'"]?\d[\'"]?'
+    ]
+
+
+# 结构化分支的名称，与keyword_patterns的顺序一一对应（第一个为关键词本身）
+RULE_NAMES = [
+    'keyword', 'array_access', 'call', 'require', 'extends',
+    'use', 'variable', 'superglobal', 'compare'
+]
+
+# 结构化分支回溯查找的最大字符数（require/use/extends 可能出现在关键词之前）
+LOOKBEHIND = 256
+
+
+def build_trie_regex(words):
+    """将字面量集合构建为前缀树形式的正则，公共前缀只匹配一次"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        terminal = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        if len(branches) == 1:
+            return f"(?:{branches[0]})?" if terminal else branches[0]
+        body = f"(?:{'|'.join(branches)})"
+        return body + '?' if terminal else body
+
+    return build(trie)
+
+
+class KeywordMatch:
+    """关键词匹配结果，接口与re.Match的常用部分保持一致"""
+
+    __slots__ = ('keyword', 'rule', '_text', '_start', '_end')
+
+    def __init__(self, keyword, rule, text, start, end):
+        self.keyword = keyword
+        self.rule = rule
+        self._text = text
+        self._start = start
+        self._end = end
+
+    def group(self, index=0):
+        if index != 0:
+            raise IndexError("no such group")
+        return self._text
+
+    def start(self):
+        return self._start
+
+    def end(self):
+        return self._end
+
+    def span(self):
+        return self._start, self._end
+
+    def __repr__(self):
+        return f"<KeywordMatch keyword={self.keyword!r} rule={self.rule!r} span={self.span()}>"
+
+
+class KeywordMatcher:
+    """多关键词匹配引擎
+
+    generate_regex生成的每个分支都包含转义后的关键词本身，因此文件是否命中只取决于
+    关键词字面量是否出现（忽略大小写）。引擎先用前缀树字面量正则一次性查找所有关键词，
+    仅在命中位置附近执行该关键词的结构化分支，用于给出具体的命中规则。
+
+    annotations中的关键词（如文档注释中的 @IsGranted）同样参与匹配，且剥离注释时仍然有效。
+    """
+
+    flags = re.IGNORECASE
+    # search/search_bytes支持code参数（scanner_lexer.CodeFilter），只接受位于代码中的命中
+    code_filtering = True
+
+    def __init__(self, keywords, annotations=()):
+        self.keywords = tuple(dict.fromkeys([*keywords, *annotations]))
+        self.annotations = tuple(dict.fromkeys(annotations))
+        # 纯ASCII关键词统一转为小写以合并前缀，非ASCII关键词保持原样以免改变忽略大小写的语义
+        literals = {kw.lower() if kw.isascii() else kw for kw in self.keywords}
+        literal_source = build_trie_regex(literals)
+        self._literal = re.compile(literal_source, self.flags) if literals else None
+        # 关键词全部为ASCII时可直接在原始字节上匹配，无需解码。字节的忽略大小写只涉及ASCII字母，
+        # 与先bytes.lower()再区分大小写匹配完全等价，而后者能利用正则引擎的前缀快速扫描，快数倍
+        self.bytes_pattern = None
+        if literals and all(kw.isascii() for kw in self.keywords):
+            self.bytes_pattern = re.compile(literal_source.encode('ascii'))
+        self._lookup = {kw.lower(): kw for kw in self.keywords}
+        # 字面量命中的最大长度，分块读取时相邻分块至少需要重叠这么多字符
+        self.max_literal_length = max((len(kw) for kw in self.keywords), default=0)
+        self._structured = {}
+        self.pattern = '|'.join(p for kw in self.keywords for p in keyword_patterns(kw))
+        # 注解命中无论是否位于注释中都接受，按命中的字面量（str与小写bytes两种形式）判断
+        self._keep = self._keep_bytes = None
+        if self.annotations:
+            texts = {kw.lower() for kw in self.annotations}
+            self._keep = lambda hit: hit.group(0).lower() in texts
+            if self.bytes_pattern is not None:
+                raw = {text.encode('ascii') for text in texts}
+                self._keep_bytes = lambda hit: hit.group(0) in raw
+
+    def __reduce__(self):
+        # 只传递关键词，工作进程中重新构建（re模块会缓存编译结果）
+        return self.__class__, (self.keywords, self.annotations)
+
+    def __eq__(self, other):
+        return isinstance(other, KeywordMatcher) and (self.keywords, self.annotations) == \
+            (other.keywords, other.annotations)
+
+    def __hash__(self):
+        return hash((self.keywords, self.annotations))
+
+    def __repr__(self):
+        if self.annotations:
+            return f"KeywordMatcher({list(self.keywords)!r}, annotations={list(self.annotations)!r})"
+        return f"KeywordMatcher({list(self.keywords)!r})"
+
+    def subset(self, keywords):
+        """只包含指定关键词的匹配引擎，保留其中关键词的注解属性（供缓存只评估缺失的关键词）"""
+        keywords = list(keywords)
+        return self.__class__(keywords, [kw for kw in self.annotations if kw in keywords])
+
+    def _structured_pattern(self, keyword):
+        """关键词的结构化分支（不含关键词本身），使用命名分组标识命中的规则"""
+        if keyword not in self._structured:
+            branches = keyword_patterns(keyword)[1:]
+            self._structured[keyword] = re.compile(
+                '|'.join(f"(?P<{name}>{branch})" for name, branch in zip(RULE_NAMES[1:], branches)),
+                self.flags
+            )
+        return self._structured[keyword]
+
+    def _keyword_for(self, text):
+        """根据命中的字面量找到对应的关键词"""
+        keyword = self._lookup.get(text.lower())
+        if keyword is not None:
+            return keyword
+        for kw in self.keywords:
+            if re.fullmatch(re.escape(kw), text, self.flags):
+                return kw
+        return text
+
+    def _describe(self, keyword, text, hit_start, hit_end):
+        """在命中点附近（同一行及之前的有限范围内）执行结构化分支，返回 (规则, 起点, 终点)"""
+        window_start = max(0, hit_start - LOOKBEHIND)
+        line_end = text.find('\n', hit_end)
+        window_end = len(text) if line_end == -1 else line_end
+        for m in self._structured_pattern(keyword).finditer(text, window_start, window_end):
+            if m.start() <= hit_start < m.end():
+                return m.lastgroup, m.start(), m.end()
+        return RULE_NAMES[0], hit_start, hit_end
+
+    def search(self, content, code=None):
+        """查找第一个关键词，返回KeywordMatch或None；code不为None时跳过注释等被剥离内容中的关键词"""
+        if self._literal is None:
+            return None
+        if code is None:
+            hit = self._literal.search(content)
+        else:
+            hit = code.search(self._literal.search, content, self._keep)
+        if hit is None:
+            return None
+        keyword = self._keyword_for(hit.group(0))
+        rule, start, end = self._describe(keyword, content, hit.start(), hit.end())
+        return KeywordMatch(keyword, rule, content[start:end], start, end)
+
+    def search_bytes(self, data, code=None):
+        """在原始字节中查找第一个关键词（仅当bytes_pattern可用时），返回KeywordMatch或None
+
+        返回的位置为字节偏移，只对命中点附近的少量字节解码；code须为字节模式的CodeFilter。
+        """
+        lowered = data.lower()
+        if code is None:
+            hit = self.bytes_pattern.search(lowered)
+        else:
+            hit = code.search(self.bytes_pattern.search, lowered, self._keep_bytes)
+        if hit is None:
+            return None
+        keyword = self._keyword_for(hit.group(0).decode('ascii'))
+        base = max(0, hit.start() - LOOKBEHIND)
+        line_end = data.find(b'\n', hit.end())
+        prefix = data[base:hit.start()].decode('utf-8', errors='ignore')
+        text = prefix + data[hit.start():len(data) if line_end == -1 else line_end].decode('utf-8', errors='ignore')
+        rule, start, end = self._describe(keyword, text, len(prefix), len(prefix) + len(keyword))
+        matched = text[start:end]
+        # 从命中点向前换算字节偏移（窗口开头可能截断了多字节字符，不能从窗口起点累加）
+        byte_start = hit.start() - len(text[start:len(prefix)].encode('utf-8'))
+        return KeywordMatch(keyword, rule, matched, byte_start, byte_start + len(matched.encode('utf-8')))
@@ -0,0 +1,109 @@
+import heapq
+import re
+import time
+
+from scanner_matcher import keyword_patterns
+from scanner_reader import decode_text
+
+# 统计的阶段：目录遍历、文件读取、匹配，以及其余开销（解码、空文件判断等）
+PHASES = ('walk', 'read', 'decode', 'match')
+PHASE_NAMES = {'walk': '遍历', 'read': '读取', 'decode': '解码及其他', 'match': '匹配'}
+
+DEFAULT_TOP_N = 10
+
+
+class ScanProfile:
+    """扫描性能统计：分阶段耗时、计数器和最慢文件
+
+    挂到 PHPAuthScanner.profile 上即启用；为None时扫描过程不做任何计时。
+    多进程扫描时读取、解码和匹配耗时为各工作进程的累计值，可能大于实际用时。
+    """
+
+    def __init__(self, top_n=DEFAULT_TOP_N):
+        self.top_n = top_n
+        self.reset()
+
+    def reset(self, keywords=None):
+        """开始新一次扫描"""
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.counters = {'files': 0, 'bytes': 0, 'cached': 0}
+        self.verdicts = {}
+        self.keywords = keywords
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self._slowest = []  # 小顶堆，保存耗时最长的top_n个文件
+
+    def add_walk(self, seconds):
+        self.phases['walk'] += seconds
+
+    def add_record(self, record):
+        """累计单个文件的结果"""
+        self.counters['files'] += 1
+        self.verdicts[record.verdict] = self.verdicts.get(record.verdict, 0) + 1
+        if record.size:
+            self.counters['bytes'] += record.size
+        if record.scan_time is None:
+            self.counters['cached'] += 1
+            return
+        if record.timings is not None:
+            read, match = record.timings
+            self.phases['read'] += read
+            self.phases['match'] += match
+            self.phases['decode'] += max(0.0, record.scan_time - read - match)
+        entry = (record.scan_time, record.path, record.size)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def finish(self):
+        self.wall = time.perf_counter() - self.started
+
+    def slowest_files(self, n=None):
+        """耗时最长的文件，返回 [(耗时, 路径, 大小)]，按耗时从高到低排列"""
+        return sorted(self._slowest, reverse=True)[:n or self.top_n]
+
+    def alternative_costs(self, n=None, files=None):
+        """在最慢的文件上逐个执行generate_regex的各个分支，返回 [(分支, 累计耗时)]，按耗时从高到低排列
+
+        只在需要报告时计算，不影响扫描本身。
+        """
+        if not self.keywords:
+            return []
+        alternatives = [p for kw in self.keywords for p in keyword_patterns(kw)]
+        compiled = [(p, re.compile(p, re.IGNORECASE)) for p in dict.fromkeys(alternatives)]
+        costs = dict.fromkeys((p for p, _ in compiled), 0.0)
+        for path in files if files is not None else [path for _, path, _ in self.slowest_files()]:
+            try:
+                with open(path, 'rb') as f:
+                    content = decode_text(f.read())
+            except OSError:
+                continue
+            for source, regex in compiled:
+                start = time.perf_counter()
+                regex.search(content)
+                costs[source] += time.perf_counter() - start
+        return sorted(costs.items(), key=lambda item: item[1], reverse=True)[:n or self.top_n]
+
+    def summary(self):
+        """一行耗时摘要"""
+        phases = "，".join(f"{PHASE_NAMES[name]} {self.phases[name]:.2f}s" for name in PHASES)
+        text = (f"耗时统计: 用时 {self.wall:.2f}s，{phases}；"
+                f"共 {self.counters['files']} 个文件 {self.counters['bytes'] / 1e6:.1f} MB")
+        if self.counters['cached']:
+            text += f"，{self.counters['cached']} 个来自缓存"
+        return text
+
+    def report(self, n=None):
+        """多行性能报告：摘要、最慢文件和耗时最多的正则分支"""
+        lines = [self.summary()]
+        slowest = self.slowest_files(n)
+        if slowest:
+            lines.append(f"最慢的 {len(slowest)} 个文件:")
+            lines.extend(f"  {seconds * 1000:8.2f} ms  {size or 0:>10} 字节  {path}"
+                         for seconds, path, size in slowest)
+        costs = self.alternative_costs(n, [path for _, path, _ in slowest]) if slowest else []
+        if costs:
+            lines.append("耗时最多的正则分支（在上述文件上单独执行）:")
+            lines.extend(f"  {seconds * 1000:8.2f} ms  {source}" for source, seconds in costs)
+        return "\n".join(lines)
@@ -0,0 +1,356 @@
+import codecs
+import io
+import os
+from collections import namedtuple
+from time import perf_counter
+
+from scanner_lexer import code_filter, strip_php
+
+# 单个文件的判定结果
+VERDICT_AUTH = 'auth'            # 检测到鉴权代码
+VERDICT_NO_AUTH = 'no_auth'      # 未检测到鉴权代码
+VERDICT_EMPTY = 'empty'          # 只有PHP起始标签，不参与判断
+VERDICT_TOO_LARGE = 'too_large'  # 超过大小上限，已跳过
+VERDICT_ERROR = 'error'          # 读取失败
+VERDICT_SUPPRESSED = 'suppressed'                  # 未鉴权，但已登记在忽略列表中
+VERDICT_SUPPRESSED_CHANGED = 'suppressed_changed'  # 已登记在忽略列表中，但内容有改动，需要重新确认
+VERDICT_INHERITED = 'inherited'  # 自身未检测到鉴权代码，但include的文件或父类中有（见scanner_graph）
+
+# 分块读取时每块的字节数
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# chunk_size: 分块大小，None表示整文件读取
+# overlap: 相邻分块重叠的字符数，需不小于匹配文本的最大长度
+# max_file_size: 文件大小上限（字节），None表示不限制
+# binary: 匹配规则支持时直接在原始字节上匹配
+# timing: 分别统计读取和匹配耗时（性能分析用）
+# lexer: 匹配前去除注释（及字符串）的剥离模式，None表示直接匹配原文（见scanner_lexer）
+ReadOptions = namedtuple('ReadOptions', 'chunk_size overlap max_file_size binary timing lexer',
+                         defaults=(False, None))
+FULL_READ = ReadOptions(None, 0, None, False)
+
+# 命中信息: 匹配文本、命中的关键词（未知时为None）、匹配位置（解码后文本中的字符偏移）
+Hit = namedtuple('Hit', 'text keyword offset')
+
+# 可打印ASCII字符之外的所有字节，用于快速统计非空白字符数
+_NOT_PRINTABLE = bytes(b for b in range(256) if not 0x21 <= b <= 0x7e)
+
+
+def is_empty_php(content):
+    """判断文件是否只有PHP起始标签（此类文件不参与鉴权判断）"""
+    stripped_content = content.strip()
+    return len(stripped_content) <= 5 and stripped_content.startswith('<?php')
+
+
+def _new_decoder():
+    """与文本模式 open(encoding='utf-8', errors='ignore') 等价的增量解码器（含换行符转换）"""
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(errors='ignore'), translate=True)
+
+
+def decode_text(raw):
+    """把文件的全部字节解码为文本，与扫描时读取文件的方式一致（忽略无效的UTF-8字节，统一换行符）"""
+    return _new_decoder().decode(raw, final=True)
+
+
+class _EmptyProbe:
+    """流式判断文件内容去除首尾空白后是否只有PHP起始标签"""
+
+    __slots__ = ('offset', 'start', 'end', 'head')
+
+    def __init__(self):
+        self.offset = 0
+        self.start = None  # 第一个非空白字符的位置
+        self.end = None    # 最后一个非空白字符之后的位置
+        self.head = ''     # 从第一个非空白字符起的前5个字符
+
+    def feed(self, text):
+        left = len(text) - len(text.lstrip())
+        if left < len(text):
+            if self.start is None:
+                self.start = self.offset + left
+                self.head = text[left:left + 5]
+            elif len(self.head) < 5:
+                self.head += text[:5 - len(self.head)]
+            self.end = self.offset + len(text.rstrip())
+        elif self.start is not None and len(self.head) < 5:
+            self.head += text[:5 - len(self.head)]
+        self.offset += len(text)
+
+    def may_be_empty(self):
+        """目前读到的内容是否仍可能被判定为空文件"""
+        return self.start is None or self.end - self.start <= 5
+
+    def is_empty(self):
+        return self.start is not None and self.end - self.start <= 5 and self.head.startswith('<?php')
+
+
+class PhaseTimer:
+    """单个文件的读取与匹配耗时累加器（在工作进程中使用）"""
+
+    __slots__ = ('read', 'match')
+
+    def __init__(self):
+        self.read = 0.0
+        self.match = 0.0
+
+
+class TimedFile:
+    """为文件对象的read计时"""
+
+    def __init__(self, f, timer):
+        self._f = f
+        self._timer = timer
+
+    def read(self, size=-1):
+        start = perf_counter()
+        data = self._f.read(size)
+        self._timer.read += perf_counter() - start
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+class TimedPattern:
+    """为匹配规则的search/search_bytes计时，其余属性原样转发"""
+
+    def __init__(self, pattern, timer):
+        self._pattern = pattern
+        self._timer = timer
+
+    def search(self, content, *args):
+        start = perf_counter()
+        match = self._pattern.search(content, *args)
+        self._timer.match += perf_counter() - start
+        return match
+
+    def search_bytes(self, data, *args):
+        start = perf_counter()
+        match = self._pattern.search_bytes(data, *args)
+        self._timer.match += perf_counter() - start
+        return match
+
+    def __getattr__(self, name):
+        return getattr(self._pattern, name)
+
+
+def _hit(match, offset):
+    """由匹配结果构造命中信息，offset为匹配在整个文件解码文本中的字符偏移"""
+    return Hit(match.group(0), getattr(match, 'keyword', None), offset)
+
+
+def _char_offset(raw, byte_offset):
+    """将字节偏移换算为解码后文本中的字符偏移（纯ASCII且无回车符时两者相同）"""
+    prefix = raw[:byte_offset]
+    if prefix.isascii() and b'\r' not in prefix:
+        return byte_offset
+    return len(decode_text(prefix))
+
+
+def _char_offset_in_file(f, byte_offset):
+    """从文件开头重新解码到指定字节偏移，换算字符偏移（只在命中时执行一次）"""
+    position = f.tell()
+    f.seek(0)
+    decoder = _new_decoder()
+    count = 0
+    remaining = byte_offset
+    while remaining > 0:
+        raw = f.read(min(remaining, DEFAULT_CHUNK_SIZE))
+        if not raw:
+            break
+        remaining -= len(raw)
+        count += len(decoder.decode(raw, final=remaining <= 0))
+    f.seek(position)
+    return count
+
+
+def match_file(file_path, pattern, options=FULL_READ, hasher=None, timer=None):
+    """读取并匹配单个文件，返回 (判定, 命中信息Hit或None, 文件大小)
+
+    分块模式下按重叠分块解码和匹配，命中后立即停止匹配，内存占用与文件大小无关；
+    hasher不为None时会读完整个文件以计算内容摘要；timer不为None时累计读取和匹配耗时。
+    """
+    with open(file_path, 'rb') as f:
+        return match_stream(f, os.fstat(f.fileno()).st_size, pattern, options, hasher, timer)
+
+
+def match_stream(f, size, pattern, options=FULL_READ, hasher=None, timer=None):
+    """匹配已打开的二进制流（需支持seek，如压缩包成员读入内存后的BytesIO），size为内容字节数，返回值同match_file"""
+    if timer is not None:
+        # 只在性能分析时包装，未启用时不增加任何开销
+        f = TimedFile(f, timer)
+        pattern = TimedPattern(pattern, timer) if pattern is not None else None
+    if options.max_file_size is not None and size > options.max_file_size:
+        return VERDICT_TOO_LARGE, None, size
+    if pattern is None:
+        # 只需计算摘要和空文件判断
+        return _probe_stream(f, options, hasher), None, size
+    if options.lexer:
+        return _match_lexed(f, pattern, options, hasher) + (size,)
+    if options.binary and getattr(pattern, 'bytes_pattern', None) is not None:
+        verdict, hit, ascii_only = _match_bytes(f, pattern, options, hasher)
+        if verdict != VERDICT_NO_AUTH or ascii_only:
+            return verdict, hit, size
+        # 文件含非ASCII字节时，解码会丢弃无效字节、忽略大小写时还存在ſ/K等字符，
+        # 可能产生字节匹配之外的命中，按文本模式重新确认以保证判定一致（摘要已计算完毕）
+        f.seek(0)
+        hasher = None
+    if not options.chunk_size:
+        raw = f.read()
+        if hasher is not None:
+            hasher.update(raw)
+        content = decode_text(raw)
+        if is_empty_php(content):
+            return VERDICT_EMPTY, None, size
+        match = pattern.search(content)
+        return (VERDICT_AUTH, _hit(match, match.start()), size) if match else (VERDICT_NO_AUTH, None, size)
+    return _match_stream(f, pattern, options, hasher) + (size,)
+
+
+def _match_lexed(f, pattern, options, hasher):
+    """整文件读取，只接受注释（及字符串）之外的命中
+
+    注释跨越分块边界时无法单独判断，因此不分块。多关键词匹配引擎只在候选命中处判断是否位于代码中，
+    其他正则先生成剥离后的等长副本再匹配；两种方式的命中位置都对应原文件。
+    """
+    raw = f.read()
+    if hasher is not None:
+        hasher.update(raw)
+    filtering = getattr(pattern, 'code_filtering', False)
+    if options.binary and getattr(pattern, 'bytes_pattern', None) is not None:
+        if _printable_count(raw) <= 5 and is_empty_php(decode_text(raw)):
+            return VERDICT_EMPTY, None
+        if filtering:
+            match = pattern.search_bytes(raw, code_filter(options.lexer, binary=True))
+        else:
+            match = pattern.search_bytes(strip_php(raw, options.lexer))
+        if match:
+            return VERDICT_AUTH, _hit(match, _char_offset(raw, match.start()))
+        if raw.isascii():
+            return VERDICT_NO_AUTH, None
+        # 与直接匹配相同，含非ASCII字节时按文本模式重新确认
+    content = decode_text(raw)
+    if is_empty_php(content):
+        return VERDICT_EMPTY, None
+    if filtering:
+        match = pattern.search(content, code_filter(options.lexer))
+    else:
+        match = pattern.search(strip_php(content, options.lexer))
+    return (VERDICT_AUTH, _hit(match, match.start())) if match else (VERDICT_NO_AUTH, None)
+
+
+def _match_stream(f, pattern, options, hasher):
+    """重叠分块匹配"""
+    decoder = _new_decoder()
+    probe = _EmptyProbe()
+    tail = ''
+    matched = None
+    while True:
+        raw = f.read(options.chunk_size)
+        final = not raw
+        if hasher is not None and raw:
+            hasher.update(raw)
+        if matched is not None and not probe.may_be_empty():
+            if final:
+                break
+            # 已命中，剩余内容只用于计算摘要
+            continue
+        text = decoder.decode(raw, final=final)
+        window_offset = probe.offset - len(tail)
+        probe.feed(text)
+        if matched is None and text:
+            window = tail + text
+            match = pattern.search(window)
+            if match:
+                matched = _hit(match, window_offset + match.start())
+                if hasher is None and not probe.may_be_empty():
+                    break
+            tail = window[-options.overlap:] if options.overlap else ''
+        if final:
+            break
+    if probe.is_empty():
+        return VERDICT_EMPTY, None
+    return (VERDICT_AUTH, matched) if matched is not None else (VERDICT_NO_AUTH, None)
+
+
+def _printable_count(raw):
+    """统计可打印ASCII字符数（这些字节解码后必然是非空白字符）"""
+    count = len(raw[:256].translate(None, _NOT_PRINTABLE))
+    return count if count > 5 else len(raw.translate(None, _NOT_PRINTABLE))
+
+
+def _match_bytes(f, pattern, options, hasher):
+    """在原始字节上匹配，返回 (判定, 命中信息, 已读内容是否全为ASCII)
+
+    只有可打印字符不超过5个的文件才可能是空文件，只对这类文件解码判断。
+    """
+    if not options.chunk_size:
+        raw = f.read()
+        if hasher is not None:
+            hasher.update(raw)
+        if _printable_count(raw) <= 5 and is_empty_php(decode_text(raw)):
+            return VERDICT_EMPTY, None, True
+        match = pattern.search_bytes(raw)
+        if match:
+            return VERDICT_AUTH, _hit(match, _char_offset(raw, match.start())), True
+        return VERDICT_NO_AUTH, None, raw.isascii()
+
+    decoder = _new_decoder()
+    probe = _EmptyProbe()
+    printable = 0
+    ascii_only = True
+    plain = True  # 命中之前的内容是否纯ASCII且无回车符（此时字节偏移即字符偏移）
+    consumed = 0
+    tail = b''
+    matched = None
+    while True:
+        raw = f.read(options.chunk_size)
+        final = not raw
+        if hasher is not None and raw:
+            hasher.update(raw)
+        if printable <= 5:
+            printable += _printable_count(raw)
+            if printable <= 5:
+                probe.feed(decoder.decode(raw, final=final))
+        if matched is None and raw:
+            ascii_only = ascii_only and raw.isascii()
+            window = tail + raw
+            match = pattern.search_bytes(window)
+            if match:
+                byte_offset = consumed - len(tail) + match.start()
+                if plain and window[:match.start()].isascii() and b'\r' not in window[:match.start()]:
+                    offset = byte_offset
+                else:
+                    offset = _char_offset_in_file(f, byte_offset)
+                matched = _hit(match, offset)
+                if hasher is None and printable > 5:
+                    break
+            else:
+                plain = plain and ascii_only and b'\r' not in raw
+            tail = window[-options.overlap:] if options.overlap else b''
+            consumed += len(raw)
+        elif matched is not None and hasher is None and printable > 5:
+            break
+        if final:
+            break
+    if printable <= 5 and probe.is_empty():
+        return VERDICT_EMPTY, None, True
+    if matched is not None:
+        return VERDICT_AUTH, matched, True
+    return VERDICT_NO_AUTH, None, ascii_only
+
+
+def _probe_stream(f, options, hasher):
+    """只计算摘要并判断是否为空文件"""
+    decoder = _new_decoder()
+    probe = _EmptyProbe()
+    chunk_size = options.chunk_size or DEFAULT_CHUNK_SIZE
+    while True:
+        raw = f.read(chunk_size)
+        if hasher is not None and raw:
+            hasher.update(raw)
+        if probe.may_be_empty():
+            probe.feed(decoder.decode(raw, final=not raw))
+        if not raw:
+            break
+    return VERDICT_EMPTY if probe.is_empty() else None
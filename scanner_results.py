@@ -0,0 +1,183 @@
+import csv
+import json
+import os
+import pathlib
+from collections import namedtuple
+
+from scanner_reader import VERDICT_ERROR, VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED, VERDICT_TOO_LARGE
+
+# 单个文件的扫描结果
+# directory: 所属扫描目录    path: 文件路径            verdict: 判定（VERDICT_*）
+# keyword: 命中的关键词      matched: 匹配文本        offset: 匹配位置（解码后文本中的字符偏移）
+# size: 文件大小（字节）     scan_time: 扫描耗时（秒，结论来自缓存时为None）
+# error: 读取失败时的错误信息     timings: 启用性能统计时的 (读取耗时, 匹配耗时)
+# via: 经由依赖获得鉴权时的依赖链（文件路径元组，最后一个文件含鉴权代码）
+# duplicate_of: 启用去重时，内容完全相同、判定被沿用的首个文件路径
+# digest: 扫描时顺带得到的内容摘要（缓存中已有或忽略列表需要校验时给出，不写入结构化输出）
+ScanRecord = namedtuple(
+    'ScanRecord', 'directory path verdict keyword matched offset size scan_time error timings via duplicate_of digest',
+    defaults=(None, None, None, None, None, None, None, None, None, None)
+)
+
+# 结构化输出支持的格式
+FORMATS = ('jsonl', 'csv', 'sarif')
+
+# 文件扩展名与输出格式的对应关系
+FORMAT_EXTENSIONS = {'.jsonl': 'jsonl', '.csv': 'csv', '.sarif': 'sarif'}
+
+CSV_FIELDS = ['directory', 'path', 'verdict', 'keyword', 'matched', 'offset', 'size', 'scan_time', 'error', 'via',
+              'duplicate_of']
+
+TOOL_NAME = "PHPAuthScanner"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+# SARIF规则: 未鉴权文件（含忽略后有改动的文件）为告警，读取失败和过大跳过为提示
+SARIF_RULES = {
+    VERDICT_NO_AUTH: ("missing-auth", "warning", "未检测到鉴权代码"),
+    VERDICT_SUPPRESSED_CHANGED: ("suppressed-changed", "warning", "已忽略的未鉴权文件内容有改动，需要重新确认"),
+    VERDICT_ERROR: ("read-error", "note", "无法读取文件"),
+    VERDICT_TOO_LARGE: ("file-too-large", "note", "文件过大，已跳过"),
+}
+
+
+def make_record(directory, file_path, verdict, hit, size, scan_time, timer=None):
+    """构造单个文件的扫描结果，hit为scanner_reader.Hit，timer为PhaseTimer（未计时为None）"""
+    timings = (timer.read, timer.match) if timer is not None else None
+    if hit is None:
+        return ScanRecord(directory, file_path, verdict, size=size, scan_time=scan_time, timings=timings)
+    return ScanRecord(directory, file_path, verdict, hit.keyword, hit.text, hit.offset, size, scan_time,
+                      timings=timings)
+
+
+def relative_path(record):
+    """结果文件相对于扫描目录的路径"""
+    if record.directory is None:
+        return record.path
+    return os.path.relpath(record.path, start=record.directory)
+
+
+def record_to_dict(record):
+    """将结果转换为可序列化的字典，路径为相对扫描目录的路径"""
+    data = record._asdict()
+    data['path'] = relative_path(record)
+    del data['digest']
+    timings = data.pop('timings')
+    if timings is not None:
+        data['read_time'], data['match_time'] = timings
+    if record.via is not None and record.directory is not None:
+        data['via'] = [os.path.relpath(p, start=record.directory) for p in record.via]
+    if record.duplicate_of is not None and record.directory is not None:
+        data['duplicate_of'] = os.path.relpath(record.duplicate_of, start=record.directory)
+    return data
+
+
+def record_from_dict(data):
+    """由record_to_dict的结果还原ScanRecord，相对路径重新拼接到扫描目录之下"""
+    directory = data.get('directory')
+
+    def full_path(path):
+        if path is None or directory is None:
+            return path
+        return os.path.join(directory, *path.replace('\\', '/').split('/'))
+
+    timings = None
+    if data.get('read_time') is not None:
+        timings = (data['read_time'], data.get('match_time'))
+    via = data.get('via')
+    return ScanRecord(directory, full_path(data['path']), data['verdict'], data.get('keyword'), data.get('matched'),
+                      data.get('offset'), data.get('size'), data.get('scan_time'), data.get('error'), timings,
+                      tuple(full_path(p) for p in via) if via else None, full_path(data.get('duplicate_of')))
+
+
+class JsonlWriter:
+    """JSON Lines输出：每条结果一行，写入后立即刷新"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record_to_dict(record), ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+class CsvWriter:
+    """CSV输出：首行为字段名，之后每条结果一行"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, record):
+        data = record_to_dict(record)
+        if data['via'] is not None:
+            data['via'] = ' -> '.join(data['via'])
+        self._writer.writerow(data)
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+class SarifWriter:
+    """SARIF 2.1.0输出：先写出文件头，结果逐条追加到results数组，close时补全文件尾
+
+    只输出需要关注的结果（未鉴权、忽略后有改动、读取失败、过大跳过），已鉴权和已忽略的文件不写入。
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._count = 0
+        rules = [
+            {"id": rule_id, "shortDescription": {"text": text}, "defaultConfiguration": {"level": level}}
+            for rule_id, level, text in SARIF_RULES.values()
+        ]
+        header = json.dumps({
+            "$schema": SARIF_SCHEMA,
+            "version": "2.1.0",
+            "runs": [{"tool": {"driver": {"name": TOOL_NAME, "rules": rules}}, "results": []}]
+        }, ensure_ascii=False)
+        # 在results数组的结尾处截断，之后逐条写入结果
+        self._footer = header[header.rindex("[]") + 1:]
+        self.stream.write(header[:header.rindex("[]") + 1])
+
+    def _result(self, record):
+        rule_id, level, text = SARIF_RULES[record.verdict]
+        if record.verdict == VERDICT_ERROR:
+            text = f"{text}: {record.error}"
+        elif record.verdict == VERDICT_TOO_LARGE:
+            text = f"{text}（{record.size} 字节）"
+        location = {
+            "physicalLocation": {
+                "artifactLocation": {"uri": pathlib.Path(os.path.abspath(record.path)).as_uri()}
+            }
+        }
+        return {"ruleId": rule_id, "level": level, "message": {"text": text}, "locations": [location]}
+
+    def write(self, record):
+        if record.verdict not in SARIF_RULES:
+            return
+        prefix = "," if self._count else ""
+        self.stream.write(prefix + "\n" + json.dumps(self._result(record), ensure_ascii=False))
+        self.stream.flush()
+        self._count += 1
+
+    def close(self):
+        self.stream.write(("\n" if self._count else "") + self._footer + "\n")
+        self.stream.flush()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter, 'sarif': SarifWriter}
+
+
+def open_writer(fmt, stream):
+    """创建指定格式的流式结果写入器"""
+    return WRITERS[fmt](stream)
+
+
+def format_for_path(output_path, default=None):
+    """根据文件扩展名推断输出格式，无法推断时返回default"""
+    return FORMAT_EXTENSIONS.get(os.path.splitext(output_path)[1].lower(), default)
@@ -0,0 +1,163 @@
+import json
+import os
+from collections import namedtuple
+
+from scanner_matcher import KeywordMatcher
+
+# 框架规则包：
+#   name/version   名称与版本，编译好的匹配引擎按 (名称, 版本) 缓存，修改规则时须同时修改版本
+#   markers        项目根目录下用于识别框架的文件或目录（任一存在即可）
+#   packages       composer.json 中用于识别框架的依赖包名
+#   app_dirs       存放应用代码的目录（相对项目根目录，用/分隔），在其中查找控制器目录
+#   controller_dir 控制器目录名（不区分大小写）
+#   keywords       鉴权调用写法
+#   middleware     中间件/过滤器/行为的挂载写法
+#   annotations    注解写法，位于文档注释中，剥离注释（--lexer）时仍然有效
+RulePack = namedtuple('RulePack', 'name version title markers packages app_dirs controller_dir keywords middleware '
+                                  'annotations')
+
+BUILTIN_PACKS = {pack.name: pack for pack in (
+    RulePack(
+        'thinkphp', 1, 'ThinkPHP',
+        markers=('think', 'thinkphp', 'ThinkPHP'),
+        packages=('topthink/framework', 'topthink/think'),
+        app_dirs=('app', 'application'),  # app: 5.x/6.x，application: 3.2
+        controller_dir='controller',
+        keywords=('checkLogin', 'check_login', 'isLogin', 'is_login', "session('user", 'session("user',
+                  'Session::get(', 'Session::has(', '$this->auth'),
+        middleware=('protected $middleware', "->middleware('auth", '->middleware("auth', 'AuthMiddleware'),
+        annotations=(),
+    ),
+    RulePack(
+        'laravel', 1, 'Laravel',
+        markers=('artisan',),
+        packages=('laravel/framework',),
+        app_dirs=('app/Http',),
+        controller_dir='Controllers',
+        keywords=('Auth::check', 'Auth::user', 'Auth::id', 'Auth::guard', 'auth()->', 'Gate::', '$this->authorize(',
+                  'authorizeResource(', '->can('),
+        middleware=("middleware('auth", 'middleware("auth', "middleware(['auth", 'middleware(["auth',
+                    "middleware('can:", 'middleware("can:', 'Authenticate::class'),
+        annotations=(),
+    ),
+    RulePack(
+        'symfony', 1, 'Symfony',
+        markers=('symfony.lock', 'bin/console'),
+        packages=('symfony/framework-bundle',),
+        app_dirs=('src',),
+        controller_dir='Controller',
+        keywords=('denyAccessUnlessGranted', 'isGranted(', 'IS_AUTHENTICATED', 'AccessDeniedException',
+                  'AuthorizationCheckerInterface'),
+        middleware=('#[IsGranted', '#[Security'),
+        annotations=('@IsGranted', '@Security('),
+    ),
+    RulePack(
+        'yii', 1, 'Yii',
+        markers=('yii',),
+        packages=('yiisoft/yii2',),
+        app_dirs=('controllers', 'modules', 'backend', 'frontend', 'api'),
+        controller_dir='controllers',
+        keywords=('isGuest', 'Yii::$app->user->can(', 'Yii::$app->user->id', 'checkAccess('),
+        middleware=('AccessControl', 'HttpBearerAuth', 'HttpBasicAuth', 'QueryParamAuth', 'CompositeAuth'),
+        annotations=(),
+    ),
+    RulePack(
+        'codeigniter', 1, 'CodeIgniter',
+        markers=('spark', 'system/CodeIgniter.php', 'system/core/CodeIgniter.php'),
+        packages=('codeigniter4/framework', 'codeigniter/framework'),
+        app_dirs=('application', 'app'),  # application: 3.x，app: 4.x
+        controller_dir='controllers',
+        keywords=("session->userdata('", 'session->has_userdata(', "session()->get('", 'logged_in', 'isLoggedIn',
+                  'auth()->loggedIn'),
+        middleware=("'filter' => 'auth", '"filter" => "auth'),
+        annotations=(),
+    ),
+)}
+
+_LIST_FIELDS = ('markers', 'packages', 'app_dirs', 'keywords', 'middleware', 'annotations')
+
+_MATCHERS = {}
+
+
+def load_pack(path):
+    """从JSON文件加载规则包，字段与RulePack相同，name和version必填，其余可省略"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not data.get('name') or not isinstance(data.get('version'), (int, str)):
+        raise ValueError(f"规则包缺少name或version: {path}")
+    fields = {name: tuple(data.get(name) or ()) for name in _LIST_FIELDS}
+    return RulePack(str(data['name']), data['version'], data.get('title') or str(data['name']),
+                    controller_dir=data.get('controller_dir') or 'controller', **fields)
+
+
+def resolve_packs(names):
+    """按名称（内置规则包）或JSON文件路径获取规则包列表，同名的只保留第一个"""
+    packs = {}
+    for name in names:
+        if name.lower() in BUILTIN_PACKS:
+            pack = BUILTIN_PACKS[name.lower()]
+        elif os.path.isfile(name):
+            pack = load_pack(name)
+        else:
+            raise ValueError(f"未知的规则包: {name}（内置: {', '.join(BUILTIN_PACKS)}）")
+        packs.setdefault(pack.name, pack)
+    return list(packs.values())
+
+
+def pack_keywords(packs):
+    """规则包中除注解外的全部关键词（按规则包顺序去重）"""
+    return list(dict.fromkeys(kw for pack in packs for kw in (*pack.keywords, *pack.middleware)))
+
+
+def compile_matcher(packs, keywords=()):
+    """把额外关键词和所有规则包编译为同一个匹配引擎，规则包再多也只对文件做一次查找
+
+    编译结果按 (额外关键词, 各规则包的名称和版本) 缓存，同一进程中重复扫描不再重新编译。
+    """
+    keywords = tuple(dict.fromkeys(keywords))
+    key = (keywords, tuple((pack.name, pack.version) for pack in packs))
+    matcher = _MATCHERS.get(key)
+    if matcher is None:
+        annotations = [kw for pack in packs for kw in pack.annotations]
+        matcher = _MATCHERS[key] = KeywordMatcher([*keywords, *pack_keywords(packs)], annotations)
+    return matcher
+
+
+def _composer_packages(project_dir):
+    """composer.json 中声明的依赖包名，文件不存在或无法解析时返回空集合"""
+    try:
+        with open(os.path.join(project_dir, 'composer.json'), encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if not isinstance(data, dict):
+        return set()
+    return {name.lower() for section in ('require', 'require-dev') for name in (data.get(section) or {})}
+
+
+def detect_packs(project_dir, packs=None):
+    """根据标志文件和composer依赖识别项目使用的框架，返回匹配的规则包列表"""
+    packages = _composer_packages(project_dir)
+    found = []
+    for pack in (BUILTIN_PACKS.values() if packs is None else packs):
+        if any(p.lower() in packages for p in pack.packages) or \
+                any(os.path.exists(os.path.join(project_dir, *m.split('/'))) for m in pack.markers):
+            found.append(pack)
+    return found
+
+
+def app_dirs(project_dir, pack):
+    """返回项目中存在的、该框架存放应用代码的目录"""
+    candidates = (os.path.join(project_dir, *d.split('/')) for d in pack.app_dirs)
+    return [d for d in candidates if os.path.isdir(d)]
+
+
+def detect_enclosing_packs(directory):
+    """从扫描目录向上查找第一个能识别出框架的项目根目录（扫描目录通常是项目中的控制器目录）"""
+    directory = os.path.abspath(directory)
+    while True:
+        found = detect_packs(directory)
+        parent = os.path.dirname(directory)
+        if found or parent == directory:
+            return found
+        directory = parent
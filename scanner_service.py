@@ -0,0 +1,638 @@
+"""常驻扫描服务：通过本机HTTP/JSON接口（或Unix套接字）提交扫描任务并获取结果
+
+用法:
+    python scanner_service.py --port 8765
+    python scanner_service.py --socket /tmp/phpauth.sock --cache
+
+接口:
+    POST   /scan              提交任务，请求体 {"directories": [...], "keywords": [...], "rules": [...],
+                              "exclude": [...], "include": [...], "ext": [...], "lexer": null,
+                              "dedup": false, "all": false, "client": "名称"}，返回202和任务信息
+    GET    /jobs              所有任务的进度
+    GET    /jobs/<id>         任务进度及offset之后的结果（?offset=N&wait=秒 等待新结果，用于轮询）
+    GET    /jobs/<id>/stream  以JSON Lines持续推送结果和进度，任务结束后关闭连接
+    DELETE /jobs/<id>         取消任务
+    GET    /status            服务状态（队列、匹配引擎缓存、判定缓存）
+
+服务在各次扫描之间保留编译好的匹配引擎、目录列表和文件判定，重复扫描同一批目录时只读取有改动的文件。
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from scanner_archive import is_archive
+from scanner_cache import DEFAULT_CACHE_PATH, ScanCache
+from scanner_core import DEFAULT_KEYWORDS, PHPAuthScanner
+from scanner_lexer import LEXER_MODES
+from scanner_reader import VERDICT_ERROR, VERDICT_NO_AUTH, VERDICT_TOO_LARGE
+from scanner_results import record_to_dict
+from scanner_rules import detect_enclosing_packs, resolve_packs
+from scanner_walk import DEFAULT_EXTENSIONS, FileWalker
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 保留的匹配引擎数量（按关键词和规则包区分），超出时淘汰最久未使用的
+PATTERN_CACHE_SIZE = 32
+# 同时执行的任务数，其余任务排队
+DEFAULT_MAX_JOBS = 4
+# 保留的已结束任务数，超出时丢弃最早结束的任务及其结果
+JOB_HISTORY = 100
+# 轮询和推送时单次等待新结果的最长时间（秒）
+MAX_WAIT = 30.0
+STREAM_PROGRESS_INTERVAL = 1.0
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_CANCELLED = 'cancelled'
+JOB_ERROR = 'error'
+_FINISHED = (JOB_DONE, JOB_CANCELLED, JOB_ERROR)
+
+# 不带 all 时只返回这些判定的结果（与命令行的文本输出一致）
+REPORTED_VERDICTS = (VERDICT_NO_AUTH, VERDICT_ERROR, VERDICT_TOO_LARGE)
+
+
+class PatternCache:
+    """编译好的匹配引擎的LRU缓存，键为 (关键词, 规则包名称及版本)"""
+
+    def __init__(self, size=PATTERN_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._patterns = OrderedDict()
+
+    def get(self, scanner, keywords, packs):
+        """返回与scanner.generate_matcher(keywords, packs)相同的匹配引擎，命中时不再重新编译"""
+        keywords = tuple(dict.fromkeys(keywords))
+        key = (keywords, tuple((pack.name, pack.version) for pack in packs))
+        with self._lock:
+            pattern = self._patterns.get(key)
+            if pattern is not None:
+                self._patterns.move_to_end(key)
+                self.hits += 1
+                return pattern
+            self.misses += 1
+        pattern = scanner.generate_matcher(keywords, packs)
+        with self._lock:
+            self._patterns[key] = pattern
+            self._patterns.move_to_end(key)
+            while len(self._patterns) > self.size:
+                self._patterns.popitem(last=False)
+        return pattern
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._patterns), 'capacity': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+class _RoundRobin:
+    """按客户端分组的队列：每次从下一个有待处理项的客户端取出一项，同一客户端内先进先出"""
+
+    def __init__(self):
+        self._queues = OrderedDict()  # 客户端 -> deque
+
+    def put(self, client, item):
+        self._queues.setdefault(client, deque()).append(item)
+
+    def pop(self):
+        """取出下一项，队列为空时返回None"""
+        if not self._queues:
+            return None
+        client, queue = next(iter(self._queues.items()))
+        item = queue.popleft()
+        # 取过的客户端排到最后，没有待处理项的客户端移出
+        del self._queues[client]
+        if queue:
+            self._queues[client] = queue
+        return item
+
+    def remove(self, client, item):
+        queue = self._queues.get(client)
+        if queue is not None and item in queue:
+            queue.remove(item)
+            if not queue:
+                del self._queues[client]
+            return True
+        return False
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+
+class _FairPool:
+    """把各任务的扫描批次按客户端轮流送入共用的进程池
+
+    进程池中同时最多limit个批次，其余批次在各客户端的队列中等待，
+    提交了大量批次的任务不会让之后提交的小任务排在它的全部批次之后。
+    """
+
+    def __init__(self, executor, limit):
+        self._executor = executor
+        self._limit = limit
+        self._running = 0
+        self._pending = _RoundRobin()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, name='fair-pool', daemon=True)
+        self._thread.start()
+
+    def submit(self, client, fn, *args):
+        future = Future()
+        with self._cond:
+            self._pending.put(client, (future, fn, args))
+            self._cond.notify()
+        return future
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._running >= self._limit or not len(self._pending)):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                future, fn, args = self._pending.pop()
+                if not future.set_running_or_notify_cancel():
+                    continue  # 已被取消（任务提前结束）
+                self._running += 1
+            try:
+                inner = self._executor.submit(fn, *args)
+            except Exception as e:
+                self._done(future, None, e)
+                continue
+            inner.add_done_callback(lambda inner, future=future: self._done(future, inner))
+
+    def _done(self, future, inner, error=None):
+        if inner is not None:
+            error = inner.exception()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(inner.result())
+        with self._cond:
+            self._running -= 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+
+class _ClientExecutor:
+    """交给PHPAuthScanner.executor的提交接口，批次记在该客户端名下"""
+
+    def __init__(self, pool, client):
+        self._pool = pool
+        self._client = client
+
+    def submit(self, fn, *args):
+        return self._pool.submit(self._client, fn, *args)
+
+
+class ScanJob:
+    """一个扫描任务：记录状态、进度和已产出的结果，结果追加时唤醒等待中的轮询"""
+
+    def __init__(self, job_id, client, directories, report_all):
+        self.id = job_id
+        self.client = client
+        self.directories = directories
+        self.report_all = report_all
+        self.state = JOB_QUEUED
+        self.error = None
+        self.scanner = None
+        self.pattern = None
+        self.results = []  # record_to_dict后的结果
+        self.scanned = 0
+        self.counts = {}  # 判定 -> 文件数
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.cond = threading.Condition()
+
+    @property
+    def ended(self):
+        """任务是否已结束（完成、取消或出错）"""
+        return self.state in _FINISHED
+
+    def snapshot(self):
+        """任务进度（不含结果）"""
+        scanner = self.scanner
+        return {
+            'id': self.id,
+            'client': self.client,
+            'state': self.state,
+            'error': self.error,
+            'directories': self.directories,
+            'discovered': scanner.files_discovered if scanner is not None else 0,
+            'scanned': self.scanned,
+            'results': len(self.results),
+            'counts': dict(self.counts),
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+    def wait(self, offset, timeout):
+        """等待offset之后出现新结果或任务结束，返回 (offset之后的结果, 是否已结束)"""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while len(self.results) <= offset and not self.ended:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            return self.results[offset:], self.ended
+
+    def set_state(self, state, error=None):
+        with self.cond:
+            self.state = state
+            self.error = error
+            if state in _FINISHED:
+                self.finished = time.time()
+            self.cond.notify_all()
+
+
+class ScanService:
+    """常驻扫描服务：共用进程池、文件判定缓存、目录列表缓存和匹配引擎缓存，按客户端公平地执行任务"""
+
+    def __init__(self, workers=os.cpu_count() or 1, cache_path=':memory:', max_jobs=DEFAULT_MAX_JOBS,
+                 max_file_size=None, pattern_cache_size=PATTERN_CACHE_SIZE):
+        self.workers = max(1, workers or 1)
+        self.max_file_size = max_file_size
+        self.cache = ScanCache(cache_path)
+        self.listings = {}  # 各扫描任务的FileWalker共用的目录列表缓存
+        self.patterns = PatternCache(pattern_cache_size)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        # 进程池中保留少量排队的批次，保证工作进程不空闲
+        self._pool = _FairPool(self._executor, self.workers * 2) if self._executor is not None else None
+        self._jobs = OrderedDict()
+        self._queue = _RoundRobin()
+        self._ids = itertools.count(1)
+        self._lock = threading.Condition()
+        self._closed = False
+        self._runners = [threading.Thread(target=self._run, name=f'scan-runner-{n}', daemon=True)
+                         for n in range(max(1, max_jobs))]
+        for runner in self._runners:
+            runner.start()
+
+    def submit(self, request):
+        """校验请求并加入队列，返回ScanJob，请求不合法时抛出ValueError"""
+        if not isinstance(request, dict):
+            raise ValueError("请求体必须是JSON对象")
+        directories = request.get('directories')
+        if isinstance(directories, str):
+            directories = [directories]
+        if not directories or not all(isinstance(d, str) for d in directories):
+            raise ValueError("directories 必须是非空的路径列表")
+        directories = [os.path.abspath(d) for d in directories]
+        for directory in directories:
+            if not os.path.isdir(directory) and not is_archive(directory):
+                raise ValueError(f"目录不存在: {directory}")
+        keywords = _string_list(request, 'keywords', DEFAULT_KEYWORDS)
+        rules = _string_list(request, 'rules', [])
+        lexer = request.get('lexer')
+        if lexer not in (None, *LEXER_MODES):
+            raise ValueError(f"lexer 只能是 {', '.join(LEXER_MODES)} 或 null")
+        names = [name for name in rules if name != 'auto']
+        if 'auto' in rules:
+            names += [pack.name for d in directories for pack in detect_enclosing_packs(d)]
+        try:
+            packs = resolve_packs(names)
+        except OSError as e:
+            raise ValueError(str(e))
+        if not keywords and not packs:
+            raise ValueError("keywords 和 rules 不能同时为空")
+
+        extensions = _string_list(request, 'ext', list(DEFAULT_EXTENSIONS))
+        exclude = _string_list(request, 'exclude', [])
+        include = _string_list(request, 'include', [])
+        # re:前缀的规则语法错误时FileWalker抛出ValueError，与其他请求错误一样返回400
+        walker = FileWalker(extensions=extensions, exclude=exclude, include=include, listings=self.listings)
+        scanner = PHPAuthScanner(workers=self.workers, cache=self.cache, max_file_size=self.max_file_size,
+                                 walker=walker, lexer=lexer)
+        scanner.dedup = bool(request.get('dedup'))
+        client = str(request.get('client') or 'default')
+        if self._pool is not None:
+            scanner.executor = _ClientExecutor(self._pool, client)
+        with self._lock:
+            if self._closed:
+                raise ValueError("服务正在关闭")
+            job = ScanJob(next(self._ids), client, directories, bool(request.get('all')))
+            job.scanner = scanner
+            job.pattern = self.patterns.get(scanner, keywords, packs)
+            self._jobs[job.id] = job
+            self._queue.put(client, job)
+            self._forget_finished()
+            self._lock.notify()
+        return job
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.ended]
+        for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job):
+        """取消任务：排队中的直接移出队列，执行中的在下一个结果产出时停止"""
+        job.cancel_event.set()
+        with self._lock:
+            if self._queue.remove(job.client, job):
+                job.set_state(JOB_CANCELLED)
+
+    def status(self):
+        with self._lock:
+            states = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+        return {
+            'workers': self.workers,
+            'jobs': states,
+            'patterns': self.patterns.stats(),
+            'cached_files': len(self.cache),
+            'cached_directories': len(self.listings),
+        }
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed and not len(self._queue):
+                    self._lock.wait()
+                if self._closed:
+                    return
+                job = self._queue.pop()
+            self._execute(job)
+
+    def _execute(self, job):
+        job.started = time.time()
+        job.set_state(JOB_RUNNING)
+        try:
+            with closing(job.scanner.iter_records(job.directories, job.pattern)) as records:
+                for record in records:
+                    if job.cancel_event.is_set():
+                        break
+                    with job.cond:
+                        job.scanned += 1
+                        job.counts[record.verdict] = job.counts.get(record.verdict, 0) + 1
+                        if job.report_all or record.verdict in REPORTED_VERDICTS:
+                            job.results.append(record_to_dict(record))
+                            job.cond.notify_all()
+        except Exception as e:
+            job.set_state(JOB_ERROR, str(e))
+            return
+        job.set_state(JOB_CANCELLED if job.cancel_event.is_set() else JOB_DONE)
+
+    def close(self):
+        """停止接受任务，取消所有任务并关闭进程池和缓存"""
+        with self._lock:
+            self._closed = True
+            jobs = list(self._jobs.values())
+            self._lock.notify_all()
+        for job in jobs:
+            job.cancel_event.set()
+        for runner in self._runners:
+            runner.join()
+        if self._pool is not None:
+            self._pool.close()
+            self._executor.shutdown(cancel_futures=True)
+        self.cache.close()
+
+
+def _string_list(request, key, default):
+    value = request.get(key)
+    if value is None:
+        return list(default)
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{key} 必须是字符串列表")
+    return value
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """HTTP/JSON接口，self.server.service为ScanService"""
+
+    server_version = 'PHPAuthScanner'
+    verbose = False
+
+    def address_string(self):
+        # Unix套接字的客户端地址不是 (主机, 端口)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send_json(status, {'error': message})
+
+    def _route(self):
+        """解析路径，返回 (路径片段, 查询参数)"""
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return parts, query
+
+    def _find_job(self, parts):
+        try:
+            job = self.server.service.job(int(parts[1]))
+        except ValueError:
+            job = None
+        if job is None:
+            self._error(404, f"任务不存在: {parts[1]}")
+        return job
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts != ['scan']:
+            self._error(404, "未知的接口")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError("Content-Length 不能为负数")
+            request = json.loads(self.rfile.read(length) or b'{}')
+            job = self.server.service.submit(request)
+        except (ValueError, UnicodeDecodeError) as e:
+            self._error(400, str(e))
+            return
+        except Exception as e:
+            # 未预料的错误也要给客户端回应，而不是直接断开连接
+            self._error(500, f"提交任务失败: {e}")
+            return
+        self._send_json(202, job.snapshot())
+
+    def do_GET(self):
+        parts, query = self._route()
+        service = self.server.service
+        if parts == ['status']:
+            self._send_json(200, service.status())
+        elif parts == ['jobs']:
+            self._send_json(200, {'jobs': [job.snapshot() for job in service.jobs()]})
+        elif len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['stream']):
+            try:
+                offset = max(0, int(query.get('offset', 0)))
+                wait = min(MAX_WAIT, max(0.0, float(query.get('wait', 0))))
+            except ValueError:
+                self._error(400, "offset 和 wait 必须是数字")
+                return
+            job = self._find_job(parts)
+            if job is None:
+                return
+            if parts[2:] == ['stream']:
+                self._stream(job, offset)
+                return
+            results, _ = job.wait(offset, wait)
+            data = job.snapshot()
+            data['offset'] = offset
+            data['next_offset'] = offset + len(results)
+            data['records'] = results
+            self._send_json(200, data)
+        else:
+            self._error(404, "未知的接口")
+
+    def _stream(self, job, offset):
+        """逐行推送 {"event": "record"} 结果，等待期间推送 {"event": "progress"}，最后推送 {"event": "end"}"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def send(event):
+            self.wfile.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+
+        try:
+            while True:
+                results, finished = job.wait(offset, STREAM_PROGRESS_INTERVAL)
+                for record in results:
+                    send({'event': 'record', 'record': record})
+                offset += len(results)
+                if finished and offset >= len(job.results):
+                    send({'event': 'end', 'job': job.snapshot()})
+                    break
+                if not results:
+                    send({'event': 'progress', 'job': job.snapshot()})
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端断开，任务继续执行
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            self._error(404, "未知的接口")
+            return
+        job = self._find_job(parts)
+        if job is not None:
+            self.server.service.cancel(job)
+            self._send_json(200, job.snapshot())
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """创建HTTP服务器（socket_path不为None时监听Unix套接字，仅当前用户可访问）"""
+    handler = type('Handler', (ServiceHandler,), {'verbose': verbose})
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            # 上次未正常退出时残留的套接字文件
+            probe = socket.socket(socket.AF_UNIX)
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise OSError(f"套接字已被其他服务占用: {socket_path}")
+            finally:
+                probe.close()
+        server = _UnixHTTPServer(socket_path, handler)
+        os.chmod(socket_path, 0o600)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="scanner_service",
+        description="常驻扫描服务：通过本机HTTP/JSON接口提交扫描任务，各次扫描之间保留缓存"
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="监听地址（默认: %(default)s，接口不做身份验证，请勿监听对外地址）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="监听端口（默认: %(default)s）")
+    parser.add_argument("--socket", default=None, metavar="PATH", help="改为监听Unix套接字")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="并行扫描进程数，所有任务共用（默认: CPU核心数）")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS,
+                        help="同时执行的任务数，其余任务按客户端轮流排队（默认: %(default)s）")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=":memory:", metavar="PATH",
+                        help="文件判定缓存写入磁盘（默认只保存在内存中），可指定缓存文件路径")
+    parser.add_argument("--max-size", type=int, default=None, metavar="BYTES",
+                        help="跳过超过该大小的文件（字节）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出每个请求的访问日志")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    service = ScanService(workers=args.workers, cache_path=args.cache, max_jobs=args.max_jobs,
+                          max_file_size=args.max_size)
+    try:
+        server = make_server(service, args.host, args.port, args.socket, args.verbose)
+    except OSError as e:
+        service.close()
+        print(f"错误: 无法启动服务: {e}", file=sys.stderr)
+        return 2
+    where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"扫描服务已启动: {where}（{service.workers} 个扫描进程，Ctrl+C 退出）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket:
+            try:
+                os.unlink(args.socket)
+            except OSError:
+                pass
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""分片扫描：把一次扫描按文件路径哈希拆到多台机器上执行，再合并各分片的结果
+
+用法:
+    python scanner_cli.py ./repos -k session auth --shard 0/4 -o part0.jsonl   # 每个节点执行其中一个分片
+    python scanner_shard.py part0.jsonl part1.jsonl part2.jsonl part3.jsonl -o scan_results.txt
+
+分片结果文件为JSON Lines：第一行记录分片号、分片数、匹配规则指纹和扫描配置，随后每行一个文件的结果
+（包括已鉴权和空文件，即该分片覆盖的全部文件），最后一行标记分片扫描完成。
+合并时核对各分片来自同一次扫描（匹配规则指纹、扫描目录和遍历规则一致）、分片号齐全且不重复、
+每个文件都属于写出它的分片；扫描目录在本机存在时再遍历一次，核对所有文件都已被某个分片覆盖。
+输出文件扩展名为 .jsonl/.csv/.sarif 时写出结构化结果，否则写出与图形界面“保存结果”相同的文本报告。
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+from datetime import datetime
+
+from scanner_cache import pattern_fingerprint
+from scanner_core import PHPAuthScanner
+from scanner_reader import VERDICT_ERROR, VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED, VERDICT_TOO_LARGE
+from scanner_results import FORMATS, format_for_path, record_from_dict, record_to_dict
+from scanner_walk import FileWalker, shard_of
+
+# 分片结果文件格式版本
+PARTIAL_VERSION = 1
+PARTIAL_HEADER = 'shard'
+PARTIAL_FOOTER = 'shard_end'
+
+# 各分片必须一致的扫描配置（关键词和规则包已包含在匹配规则指纹中）
+JOB_FIELDS = ('shards', 'pattern', 'lexer', 'max_size', 'directories', 'walker')
+
+# 问题列表中每类问题最多列出的文件数
+MAX_LISTED = 5
+
+EXIT_OK = 0
+EXIT_FOUND = 1
+EXIT_USAGE = 2
+
+
+def parse_shard(text):
+    """解析 I/N 形式的分片参数（I从0开始），返回 (分片号, 分片数)"""
+    try:
+        shard, shards = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"分片参数应为 I/N 的形式（如 0/4）: {text}")
+    if shards < 1 or not 0 <= shard < shards:
+        raise ValueError(f"分片号应在 0 到 N-1 之间: {text}")
+    return shard, shards
+
+
+def job_fingerprint(pattern, lexer=None):
+    """匹配规则指纹：匹配规则和剥离模式都相同时各分片的判定才能合并"""
+    source = pattern.pattern
+    if lexer:
+        source = f"{source}\0lexer={lexer}"
+    return pattern_fingerprint(source, pattern.flags)
+
+
+def shard_header(shard, shards, directories, keywords, packs, pattern, scanner):
+    """分片结果文件的第一行：分片信息、匹配规则指纹和影响覆盖范围与判定的扫描配置"""
+    walker = scanner.walker
+    return {
+        'type': PARTIAL_HEADER,
+        'version': PARTIAL_VERSION,
+        'shard': shard,
+        'shards': shards,
+        'pattern': job_fingerprint(pattern, scanner.lexer),
+        'regex': pattern.pattern,
+        'keywords': list(keywords),
+        'rules': [f"{pack.name}@{pack.version}" for pack in packs],
+        'lexer': scanner.lexer,
+        'max_size': scanner.max_file_size,
+        'directories': list(directories),
+        'walker': {
+            'extensions': list(walker.extensions),
+            'exclude': list(walker.exclude),
+            'include': list(walker.include),
+            'follow_symlinks': walker.follow_symlinks,
+        },
+        'host': socket.gethostname(),
+        'started': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+class PartialWriter:
+    """分片结果文件：header之后每个文件一行结果，close时写入结束标记（没有结束标记的分片视为未完成）"""
+
+    def __init__(self, stream, header):
+        self.stream = stream
+        self.files = 0
+        self._write(header)
+
+    def _write(self, data):
+        self.stream.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+    def write(self, record):
+        self._write(record_to_dict(record))
+        self.files += 1
+
+    def close(self):
+        self._write({'type': PARTIAL_FOOTER, 'files': self.files,
+                     'finished': datetime.now().isoformat(timespec='seconds')})
+        self.stream.flush()
+
+
+class ShardPartial:
+    """读入的分片结果文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.records = []  # record_to_dict的结果
+        self.footer = None
+        with open(path, encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                kind = data.get('type')
+                if number == 1:
+                    if kind != PARTIAL_HEADER:
+                        raise ValueError(f"{path} 不是分片结果文件（第一行缺少分片信息）")
+                    if data.get('version') != PARTIAL_VERSION:
+                        raise ValueError(f"{path} 的分片结果格式版本 {data.get('version')} 不受支持")
+                    self.header = data
+                elif kind == PARTIAL_FOOTER:
+                    self.footer = data
+                elif self.footer is None:
+                    self.records.append(data)
+        if self.header is None:
+            raise ValueError(f"{path} 是空文件")
+
+    @property
+    def shard(self):
+        return self.header['shard']
+
+    @property
+    def label(self):
+        return f"分片 {self.shard}/{self.header['shards']}（{self.path}，{self.header.get('host')}）"
+
+
+def check_partials(partials, verify=True):
+    """核对各分片能否合并，返回问题列表（为空表示可以合并）和提示信息列表"""
+    problems = []
+    notes = []
+    first = partials[0]
+    for partial in partials[1:]:
+        for field in JOB_FIELDS:
+            if partial.header.get(field) != first.header.get(field):
+                label = '匹配规则指纹' if field == 'pattern' else field
+                problems.append(f"{partial.label} 的 {label} 与 {first.label} 不一致")
+    if problems:
+        return problems, notes
+
+    shards = first.header['shards']
+    by_shard = {}
+    for partial in partials:
+        by_shard.setdefault(partial.shard, []).append(partial)
+    for shard, group in sorted(by_shard.items()):
+        if len(group) > 1:
+            problems.append(f"分片 {shard} 重复: {', '.join(p.path for p in group)}")
+    missing = [str(shard) for shard in range(shards) if shard not in by_shard]
+    if missing:
+        problems.append(f"缺少 {len(missing)} 个分片: {', '.join(missing)}（共 {shards} 个）")
+
+    covered = {}
+    repeated = []
+    for partial in partials:
+        if partial.footer is None:
+            problems.append(f"{partial.label} 未完成（缺少结束标记，节点可能中途退出）")
+        elif partial.footer.get('files') != len(partial.records):
+            problems.append(f"{partial.label} 记录了 {partial.footer.get('files')} 个文件，实际只有 "
+                            f"{len(partial.records)} 条结果")
+        misplaced = []
+        for data in partial.records:
+            key = (data['directory'], data['path'].replace('\\', '/'))
+            if shard_of(key[0], key[1], shards) != partial.shard:
+                misplaced.append(key[1])
+            if covered.setdefault(key, partial) is not partial:
+                repeated.append(key[1])
+        if misplaced:
+            problems.append(f"{partial.label} 中有 {len(misplaced)} 个文件不属于该分片，如 "
+                            f"{', '.join(misplaced[:MAX_LISTED])}")
+    if repeated:
+        problems.append(f"{len(repeated)} 个文件出现在多个分片中，如 {', '.join(repeated[:MAX_LISTED])}")
+
+    if verify:
+        directories = first.header['directories']
+        absent = [d for d in directories if not os.path.isdir(d)]
+        if absent:
+            notes.append(f"扫描目录在本机不存在（{', '.join(absent[:MAX_LISTED])}），未核对覆盖范围")
+        else:
+            problems += _check_coverage(first.header, covered)
+    return problems, notes
+
+
+def _check_coverage(header, covered):
+    """按分片记录的遍历规则重新遍历扫描目录，核对每个文件都恰好被一个分片覆盖"""
+    settings = header['walker']
+    walker = FileWalker(extensions=settings['extensions'], exclude=settings['exclude'],
+                        include=settings['include'], follow_symlinks=settings['follow_symlinks'])
+    expected = set()
+    for directory in header['directories']:
+        for file_path in walker.iter_files(directory):
+            expected.add((directory, os.path.relpath(file_path, directory).replace(os.sep, '/')))
+    problems = []
+    uncovered = sorted(expected.difference(covered))
+    if uncovered:
+        problems.append(f"{len(uncovered)} 个文件未被任何分片覆盖（可能在扫描后新增），如 "
+                        f"{', '.join(path for _, path in uncovered[:MAX_LISTED])}")
+    extra = sorted(set(covered).difference(expected))
+    if extra:
+        problems.append(f"{len(extra)} 个文件已不在扫描范围内（可能在扫描后删除），如 "
+                        f"{', '.join(path for _, path in extra[:MAX_LISTED])}")
+    return problems
+
+
+def merged_records(partials):
+    """按扫描目录顺序和相对路径排列的所有分片的结果（ScanRecord）"""
+    order = {}
+    for i, directory in enumerate(partials[0].header['directories']):
+        order.setdefault(directory, i)
+    records = [data for partial in partials for data in partial.records]
+    records.sort(key=lambda data: (order.get(data['directory'], len(order)), data['path'].replace('\\', '/')))
+    return [record_from_dict(data) for data in records]
+
+
+def save_report(partials, records, output_path):
+    """写出与PHPAuthScanner.save_results相同格式的文本报告，返回未鉴权文件数"""
+    header = partials[0].header
+    results = []
+    flagged = set()
+    for record in records:
+        if record.verdict in (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED):
+            entry = (record.directory, os.path.relpath(record.path, record.directory))
+            results.append(entry)
+            flagged.add(record.path)
+    duplicates = {}
+    for record in records:
+        if record.duplicate_of in flagged and record.path in flagged:
+            original = (record.directory, os.path.relpath(record.duplicate_of, record.directory))
+            duplicates.setdefault(original, []).append(
+                (record.directory, os.path.relpath(record.path, record.directory)))
+    PHPAuthScanner().save_results(
+        keywords=' '.join(header['keywords']),
+        regex=header['regex'],
+        directories=header['directories'],
+        results=results,
+        output_path=output_path,
+        duplicates=duplicates
+    )
+    return len(results)
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="scanner_shard",
+        description="合并各节点 scanner_cli.py --shard I/N 写出的分片结果，核对覆盖范围和匹配规则一致后输出一份报告"
+    )
+    parser.add_argument("partials", nargs="+", help="分片结果文件")
+    parser.add_argument("-o", "--output", default="scan_results.txt", metavar="PATH",
+                        help="合并后的结果文件（默认: %(default)s；.jsonl/.csv/.sarif 为结构化格式，其余为文本报告）")
+    parser.add_argument("-f", "--format", choices=["text", *FORMATS], default=None,
+                        help="输出格式（默认按输出文件扩展名推断）")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="不重新遍历扫描目录核对覆盖范围（在没有源码的机器上合并时使用）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出合并统计信息")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        partials = [ShardPartial(path) for path in args.partials]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"错误: 无法读取分片结果: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    problems, notes = check_partials(partials, verify=not args.no_verify)
+    for note in notes:
+        print(f"提示: {note}", file=sys.stderr)
+    if problems:
+        for problem in problems:
+            print(f"错误: {problem}", file=sys.stderr)
+        print(f"分片结果不完整或不一致，未生成报告（{len(problems)} 个问题）", file=sys.stderr)
+        return EXIT_USAGE
+
+    records = merged_records(partials)
+    fmt = args.format or format_for_path(args.output) or "text"
+    if fmt == "text":
+        found = save_report(partials, records, args.output)
+    else:
+        PHPAuthScanner().save_records(records, args.output, fmt)
+        found = sum(1 for r in records if r.verdict in (VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED))
+
+    if not args.quiet:
+        counts = {VERDICT_ERROR: 0, VERDICT_TOO_LARGE: 0}
+        for record in records:
+            if record.verdict in counts:
+                counts[record.verdict] += 1
+        hosts = sorted({partial.header.get('host') or '?' for partial in partials})
+        print(f"已合并 {len(partials)} 个分片（{len(hosts)} 台机器: {', '.join(hosts)}），共 {len(records)} 个文件: "
+              f"{found} 个文件未检测到鉴权代码，{counts[VERDICT_ERROR]} 个文件读取失败，"
+              f"{counts[VERDICT_TOO_LARGE]} 个文件因过大被跳过", file=sys.stderr)
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    return EXIT_FOUND if found else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
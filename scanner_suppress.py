@@ -0,0 +1,163 @@
+import ast
+import csv
+import json
+import os
+import threading
+import time
+
+from scanner_cache import new_hasher
+from scanner_diff import directory_key, normalize_relpath, parse_text_report
+from scanner_reader import VERDICT_NO_AUTH, VERDICT_SUPPRESSED, VERDICT_SUPPRESSED_CHANGED
+from scanner_results import format_for_path, relative_path
+
+# 忽略列表默认保存位置
+DEFAULT_SUPPRESSIONS_PATH = os.path.join(os.path.expanduser("~"), ".phpauthscanner", "suppressions.json")
+
+
+def file_digest(file_path):
+    """计算文件内容摘要（与扫描缓存使用相同的算法）"""
+    hasher = new_hasher()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class SuppressionIndex:
+    """已确认无需鉴权的文件（如登录页、接口回调）的忽略列表
+
+    以 扫描目录 -> 相对路径 -> 内容摘要 保存为JSON文件，便于评审和纳入版本管理；查询为一次字典查找。
+    不同扫描目录下的同名文件互不影响；旧版（version 1）只有相对路径的条目对所有扫描目录生效。
+    文件内容与登记时不同则不再忽略，而是标记为"已忽略但有改动"，提示重新确认。
+    """
+
+    def __init__(self, path=DEFAULT_SUPPRESSIONS_PATH):
+        self.path = path
+        # (扫描目录, 相对路径) -> {'digest': 摘要, 'reason': 说明, 'added': 登记时间}，扫描目录为None表示任意目录
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            for relpath, entry in data.get('files', {}).items():
+                self.entries[(None, relpath)] = entry
+            for directory, files in data.get('directories', {}).items():
+                for relpath, entry in files.items():
+                    self.entries[(directory, relpath)] = entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, record):
+        return self._lookup(record.directory, relative_path(record)) is not None
+
+    def _lookup(self, directory, relpath):
+        relpath = normalize_relpath(relpath)
+        entry = self.entries.get((directory_key(directory), relpath))
+        return entry if entry is not None else self.entries.get((None, relpath))
+
+    def add(self, directory, relpath, digest, reason=''):
+        """登记扫描目录directory下的单个文件，digest为None表示不校验内容"""
+        with self._lock:
+            self.entries[(directory_key(directory), normalize_relpath(relpath))] = {
+                'digest': digest, 'reason': reason, 'added': time.strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+    def remove(self, directory, relpath):
+        with self._lock:
+            return self.entries.pop((directory_key(directory), normalize_relpath(relpath)), None) is not None
+
+    def add_record(self, record, reason=''):
+        """登记一条扫描结果（按当前文件内容计算摘要，扫描时已得到摘要的直接使用）"""
+        self.add(record.directory, relative_path(record), record.digest or file_digest(record.path), reason)
+
+    def digest_paths(self, directory):
+        """扫描目录下需要校验内容摘要的文件路径集合，扫描时对这些文件顺带计算摘要，apply时无需再次读取"""
+        key = directory_key(directory)
+        return {os.path.join(directory, *relpath.split('/')) for (base, relpath), entry in self.entries.items()
+                if base in (key, None) and entry.get('digest') is not None}
+
+    def apply(self, record):
+        """对未鉴权结果应用忽略列表，返回判定可能被改写的结果
+
+        结果未带摘要时（如由索引直接得出判定的文件）才重新读取文件计算摘要。
+        """
+        if record.verdict != VERDICT_NO_AUTH:
+            return record
+        entry = self._lookup(record.directory, relative_path(record))
+        if entry is None:
+            return record
+        digest = entry.get('digest')
+        if digest is not None:
+            current = record.digest
+            if current is None:
+                try:
+                    current = file_digest(record.path)
+                except OSError:
+                    current = None
+            if current != digest:
+                return record._replace(verdict=VERDICT_SUPPRESSED_CHANGED)
+        return record._replace(verdict=VERDICT_SUPPRESSED)
+
+    def import_report(self, report_path, directories=None, reason=''):
+        """从save_results的文本报告或jsonl/csv结果批量导入未鉴权文件，返回 (导入数, 未找到的文件数)
+
+        文本报告只记录相对路径，按directories和报告中的扫描目录依次查找，登记到首个存在该文件的目录下。
+        """
+        fmt = format_for_path(report_path)
+        with open(report_path, encoding='utf-8', newline='') as f:
+            if fmt in ('jsonl', 'csv'):
+                if fmt == 'jsonl':
+                    rows = [json.loads(line) for line in f if line.strip()]
+                else:
+                    rows = list(csv.DictReader(f))
+                items = [(r.get('directory'), r['path']) for r in rows if r.get('verdict') == VERDICT_NO_AUTH]
+            else:
+                lines = f.read().splitlines()
+                report_dirs = _report_directories(lines)
+                items = [(None, relpath) for relpath in parse_text_report(lines)]
+                directories = list(directories or []) + report_dirs
+        imported = missing = 0
+        for directory, relpath in items:
+            candidates = [directory] if directory else directories or []
+            for base in candidates:
+                file_path = os.path.join(base, relpath)
+                if os.path.isfile(file_path):
+                    self.add(base, relpath, file_digest(file_path), reason)
+                    imported += 1
+                    break
+            else:
+                missing += 1
+        return imported, missing
+
+    def save(self, path=None):
+        """写回JSON文件（按路径排序，便于比较差异）"""
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            legacy = {}
+            directories = {}
+            for (directory, relpath), entry in sorted(self.entries.items(), key=lambda i: (i[0][0] or '', i[0][1])):
+                if directory is None:
+                    legacy[relpath] = entry
+                else:
+                    directories.setdefault(directory, {})[relpath] = entry
+            data = {'version': 2, 'directories': directories}
+            if legacy:
+                data['files'] = legacy
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+def _report_directories(lines):
+    """从save_results文本报告的配置部分读取扫描目录"""
+    for line in lines:
+        if line.startswith('扫描目录: '):
+            try:
+                value = ast.literal_eval(line[len('扫描目录: '):])
+            except (ValueError, SyntaxError):
+                return []
+            return [value] if isinstance(value, str) else list(value)
+    return []
@@ -0,0 +1,244 @@
+import bisect
+
+from scanner_reader import (
+    VERDICT_AUTH, VERDICT_EMPTY, VERDICT_ERROR, VERDICT_INHERITED, VERDICT_NO_AUTH, VERDICT_SUPPRESSED,
+    VERDICT_SUPPRESSED_CHANGED, VERDICT_TOO_LARGE
+)
+from scanner_results import relative_path
+
+# 排序方式：None为发现顺序
+SORT_DISCOVERED = None
+SORT_PATH = 'path'
+SORT_VERDICT = 'verdict'
+
+# 按判定排序时的先后（需要处理的排在前面）
+_VERDICT_RANK = {verdict: rank for rank, verdict in enumerate((
+    VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED, VERDICT_ERROR, VERDICT_TOO_LARGE, VERDICT_INHERITED,
+    VERDICT_SUPPRESSED, VERDICT_EMPTY, VERDICT_AUTH
+))}
+
+# 可见行的类型
+ROW_GROUP = 'group'  # (ROW_GROUP, 目录, 该目录下符合过滤条件的结果数, 是否折叠)
+ROW_RECORD = 'record'  # (ROW_RECORD, ScanRecord)
+
+
+def _normalize(path):
+    return path.replace('\\', '/')
+
+
+def _relative(record):
+    """相对扫描目录的路径（结果路径由扫描目录拼接而成，直接截取，比os.path.relpath快得多）"""
+    directory = record.directory
+    if directory and record.path.startswith(directory):
+        return record.path[len(directory):].lstrip('/\\')
+    return relative_path(record)
+
+
+class ResultStore:
+    """结果列表的数据模型：按目录分组，支持按路径前缀和判定过滤、排序，按行号取出可见行
+
+    每个目录只保存符合当前过滤条件的结果序号（按当前排序插入），界面只需取出可见的几十行，
+    取行的开销与结果总数无关；只有修改过滤或排序条件时才重新整理一遍。
+    去重扫描中与其他文件内容相同（判定也相同）的结果不单独占一行，合并到首个文件的行中（见copies）。
+    """
+
+    def __init__(self):
+        self._records = []  # 序号 -> ScanRecord，移除后为None
+        self._index = {}  # 文件路径 -> 序号
+        self._groups = {}  # 目录 -> [序号]，只含符合过滤条件的结果，按排序键有序
+        self._removed = 0
+        self._copies = {}  # 首个文件路径 -> [合并到该行的内容相同的文件路径]
+        self._original = {}  # 合并显示的文件路径 -> 首个文件路径
+        self.collapsed = set()  # 折叠的目录
+        self.prefix = ''
+        self.verdicts = None  # 显示的判定集合，None表示全部
+        self.sort = SORT_DISCOVERED
+        self.reverse = False
+        self._starts = None  # 各目录分组在可见行中的起始行号（惰性计算）
+        self._visible_groups = None
+        self._row_count = 0
+
+    def __len__(self):
+        return len(self._records) - self._removed
+
+    def _sort_key(self, i):
+        record = self._records[i]
+        if self.sort == SORT_PATH:
+            return record.path
+        if self.sort == SORT_VERDICT:
+            return _VERDICT_RANK.get(record.verdict, len(_VERDICT_RANK)), i
+        return i
+
+    def _matches(self, record):
+        if self.verdicts is not None and record.verdict not in self.verdicts:
+            return False
+        if not self.prefix:
+            return True
+        prefix = self.prefix
+        return _normalize(record.path).startswith(prefix) or _normalize(_relative(record)).startswith(prefix)
+
+    def _place(self, i):
+        record = self._records[i]
+        group = self._groups.setdefault(record.directory, [])
+        if record.path not in self._original and self._matches(record):
+            if self.sort == SORT_DISCOVERED and (not group or group[-1] < i):
+                group.append(i)  # 新结果序号最大，追加即有序
+            else:
+                bisect.insort(group, i, key=self._sort_key)
+        self._starts = None
+
+    def add(self, record):
+        """添加结果，同一文件已有结果时替换"""
+        self.discard(record.path)
+        original = record.duplicate_of
+        if original in self._index and self._records[self._index[original]].verdict == record.verdict:
+            self._original[record.path] = original
+            self._copies.setdefault(original, []).append(record.path)
+        self._index[record.path] = len(self._records)
+        self._records.append(record)
+        self._place(len(self._records) - 1)
+
+    def discard(self, path):
+        """移除文件的结果（如监视模式下文件被删除或已加上鉴权），返回是否存在"""
+        i = self._index.pop(path, None)
+        if i is None:
+            return False
+        record = self._records[i]
+        group = self._groups.get(record.directory)
+        original = self._original.pop(path, None)
+        if original is not None:
+            copies = self._copies[original]
+            copies.remove(path)
+            if not copies:
+                del self._copies[original]
+        elif group is not None:
+            pos = bisect.bisect_left(group, self._sort_key(i), key=self._sort_key)
+            if pos < len(group) and group[pos] == i:
+                del group[pos]
+        self._records[i] = None
+        self._removed += 1
+        self._starts = None
+        copies = self._copies.pop(path, None)
+        if copies:
+            # 首个文件被移除（如监视模式下内容改变），由下一个内容相同的文件代替它显示
+            head = copies.pop(0)
+            del self._original[head]
+            if copies:
+                self._copies[head] = copies
+                self._original.update((p, head) for p in copies)
+            self._place(self._index[head])
+        if self._removed > len(self._records) // 2:
+            # 占位过多时整理一遍
+            self.set_view(self.prefix, self.verdicts, self.sort, self.reverse)
+        return True
+
+    def clear(self):
+        self._records = []
+        self._index = {}
+        self._groups = {}
+        self._removed = 0
+        self._copies = {}
+        self._original = {}
+        self.collapsed.clear()
+        self._starts = None
+
+    def set_view(self, prefix='', verdicts=None, sort=SORT_DISCOVERED, reverse=False):
+        """修改过滤和排序条件，重新整理各目录分组"""
+        self.prefix = _normalize(prefix or '')
+        self.verdicts = None if verdicts is None else set(verdicts)
+        self.sort = sort
+        self.reverse = reverse
+        # 顺带丢弃已移除结果的占位，序号重新编排
+        records = [r for r in self._records if r is not None]
+        self._records = records
+        self._index = {r.path: i for i, r in enumerate(records)}
+        self._removed = 0
+        groups = self._groups = {directory: [] for directory in self._groups}
+        matches = self._matches
+        merged = self._original
+        for i, record in enumerate(records):
+            group = groups.setdefault(record.directory, [])
+            if record.path not in merged and matches(record):
+                group.append(i)
+        if self.sort != SORT_DISCOVERED:
+            for group in groups.values():
+                group.sort(key=self._sort_key)
+        self._starts = None
+
+    def toggle(self, directory):
+        """折叠或展开目录分组"""
+        self.collapsed.symmetric_difference_update((directory,))
+        self._starts = None
+
+    def _layout(self):
+        if self._starts is None:
+            self._visible_groups = [(d, g) for d, g in self._groups.items() if g]
+            if self.reverse:
+                self._visible_groups.reverse()
+            starts = []
+            row = 0
+            for directory, group in self._visible_groups:
+                starts.append(row)
+                row += 1 if directory in self.collapsed else 1 + len(group)
+            self._starts = starts
+            self._row_count = row
+        return self._starts
+
+    def row_count(self):
+        """可见行数（含目录标题行）"""
+        self._layout()
+        return self._row_count
+
+    def visible_count(self):
+        """符合过滤条件的结果数"""
+        return sum(len(g) for g in self._groups.values())
+
+    def rows(self, start, stop):
+        """取出第start到stop-1行（见ROW_GROUP/ROW_RECORD），只访问这些行所在的目录分组"""
+        starts = self._layout()
+        stop = min(stop, self._row_count)
+        rows = []
+        if start >= stop:
+            return rows
+        g = bisect.bisect_right(starts, start) - 1
+        row = start
+        while row < stop and g < len(starts):
+            directory, group = self._visible_groups[g]
+            offset = row - starts[g]
+            if offset == 0:
+                rows.append((ROW_GROUP, directory, len(group), directory in self.collapsed))
+                offset = 1
+                row += 1
+            if directory not in self.collapsed:
+                end = min(len(group), offset - 1 + stop - row)
+                for k in range(offset - 1, end):
+                    i = group[len(group) - 1 - k] if self.reverse else group[k]
+                    rows.append((ROW_RECORD, self._records[i]))
+                row += max(0, end - (offset - 1))
+            g += 1
+        return rows
+
+    def copies(self, path):
+        """合并到该文件行中的内容相同的文件路径"""
+        return self._copies.get(path, ())
+
+    def duplicates(self, verdicts=(VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED)):
+        """未鉴权文件中内容相同的文件，{(目录, 相对路径): [内容相同的文件的 (目录, 相对路径)]}，用于保存报告"""
+        groups = {}
+        for path, copies in self._copies.items():
+            record = self._records[self._index[path]]
+            if record.verdict in verdicts:
+                groups[record.directory, relative_path(record)] = [
+                    (copy.directory, relative_path(copy)) for copy in (self._records[self._index[p]] for p in copies)
+                ]
+        return groups
+
+    def records(self):
+        """按发现顺序产出全部结果（不受过滤条件影响），用于导出"""
+        return (r for r in self._records if r is not None)
+
+    def found(self, verdicts=(VERDICT_NO_AUTH, VERDICT_SUPPRESSED_CHANGED)):
+        """按发现顺序产出未鉴权文件的 (目录, 相对路径)"""
+        for record in self.records():
+            if record.verdict in verdicts:
+                yield record.directory, relative_path(record)
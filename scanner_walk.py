@@ -0,0 +1,196 @@
+import fnmatch
+import hashlib
+import os
+import re
+import time
+
+# 默认只扫描.php文件
+DEFAULT_EXTENSIONS = ('.php',)
+
+# 框架项目中常见的、通常无需审计的目录
+COMMON_EXCLUDES = ('vendor', 'runtime', 'node_modules', '.git', '.svn', '.hg', '.idea', 'cache')
+
+# 修改时间距今不足该纳秒数的目录不缓存列表：同一时间戳内再次修改时修改时间可能不变
+LISTING_SETTLE_NS = 2 * 10 ** 9
+
+
+def compile_rules(patterns):
+    """编译包含/排除规则：以 re: 开头的按正则处理，其余按通配符（glob）处理，正则无效时抛出ValueError"""
+    rules = []
+    for pattern in patterns or ():
+        if pattern.startswith('re:'):
+            try:
+                rules.append(re.compile(pattern[3:]))
+            except re.error as e:
+                raise ValueError(f"无效的正则规则 {pattern}: {e}")
+        else:
+            rules.append(re.compile(fnmatch.translate(pattern)))
+    return rules
+
+
+def shard_of(directory, rel_path, shards):
+    """按 扫描目录+相对路径 的哈希把文件分到 0..shards-1 中的一个分片，与机器和遍历顺序无关
+
+    目录按命令行中给出的写法参与计算（只统一分隔符），各节点需使用相同的目录参数。
+    """
+    directory = os.path.normpath(directory).replace('\\', '/')
+    key = f"{directory}\0{rel_path}".encode('utf-8', 'surrogateescape')
+    return int.from_bytes(hashlib.sha1(key).digest()[:8], 'big') % shards
+
+
+def _matches(rules, name, rel_path):
+    """规则同时匹配条目名称和相对路径（统一使用/分隔）"""
+    for rule in rules:
+        if rule.match(name) or rule.match(rel_path):
+            return True
+    return False
+
+
+class FileWalker:
+    """基于os.scandir的目录遍历器
+
+    排除规则命中的目录在进入之前即被剪枝；跟随符号链接时记录已访问目录的
+    (设备号, inode) 防止循环；同一文件通过硬链接或符号链接多次出现时只产出一次。
+    遍历顺序与os.walk一致：先产出当前目录的文件，再依次进入子目录。
+
+    listings为字典时缓存各目录的条目列表（多个遍历器可共用同一个字典），目录修改时间不变时
+    不再重新列出目录，适用于反复扫描同一批目录的常驻进程。
+
+    shard为 (分片号, 分片数) 时iter_files只产出分到该分片的文件（见shard_of），用于把一次扫描拆到多台机器上。
+    """
+
+    def __init__(self, extensions=DEFAULT_EXTENSIONS, exclude=None, include=None,
+                 follow_symlinks=False, dedupe_files=True, listings=None, shard=None):
+        self.extensions = tuple(extensions)
+        self.exclude = list(exclude or ())
+        self.include = list(include or ())
+        self.follow_symlinks = follow_symlinks
+        self.dedupe_files = dedupe_files
+        self.listings = listings  # 目录路径 -> (设备号, inode, 修改时间, 条目列表)
+        self.shard = shard
+        self._exclude_rules = compile_rules(self.exclude)
+        self._include_rules = compile_rules(self.include)
+
+    def is_source_file(self, name):
+        """按扩展名判断是否为需要扫描的文件"""
+        return name.endswith(self.extensions)
+
+    def _excluded(self, name, rel_path):
+        return bool(self._exclude_rules) and _matches(self._exclude_rules, name, rel_path)
+
+    def _included(self, name, rel_path):
+        return not self._include_rules or _matches(self._include_rules, name, rel_path)
+
+    def _scan(self, directory, onerror):
+        """遍历目录树，产出 (目录路径, 相对路径, 设备号, 子目录名列表, 文件DirEntry列表)"""
+        visited = set()
+        stack = [(directory, '')]
+        while stack:
+            path, rel = stack.pop()
+            try:
+                st = os.stat(path)
+                key = (st.st_dev, st.st_ino)
+                if key in visited:
+                    continue
+                visited.add(key)
+                entries = self._list(path, st)
+            except OSError as e:
+                if onerror is not None:
+                    onerror(e)
+                continue
+            dirs = []
+            files = []
+            for entry in entries:
+                rel_path = f"{rel}/{entry.name}" if rel else entry.name
+                if self._excluded(entry.name, rel_path):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if self.follow_symlinks or not entry.is_symlink():
+                        dirs.append(entry.name)
+                else:
+                    files.append(entry)
+            yield path, rel, st.st_dev, dirs, files
+            for name in reversed(dirs):
+                stack.append((os.path.join(path, name), f"{rel}/{name}" if rel else name))
+
+    def _list(self, path, st):
+        """列出目录条目，启用listings时修改时间未变的目录直接沿用上次的列表"""
+        listings = self.listings
+        if listings is not None:
+            cached = listings.get(path)
+            if cached is not None and cached[:3] == (st.st_dev, st.st_ino, st.st_mtime_ns):
+                return cached[3]
+        with os.scandir(path) as it:
+            entries = list(it)
+        if listings is not None and time.time_ns() - st.st_mtime_ns > LISTING_SETTLE_NS:
+            listings[path] = (st.st_dev, st.st_ino, st.st_mtime_ns, entries)
+        return entries
+
+    def accepts_relpath(self, rel_path):
+        """只按扩展名和包含/排除规则判断相对路径（/分隔）是否需要扫描，不访问文件系统（如压缩包成员）"""
+        parts = rel_path.split('/')
+        name = parts[-1]
+        if not self.is_source_file(name) or not self._included(name, rel_path):
+            return False
+        # 路径上任意一级目录被排除，遍历时都不会进入
+        for i, part in enumerate(parts):
+            if self._excluded(part, '/'.join(parts[:i + 1])):
+                return False
+        return True
+
+    def accepts(self, directory, file_path):
+        """判断指定文件是否会在遍历directory时被产出（用于只扫描变更文件的场景）"""
+        rel_path = os.path.relpath(file_path, directory).replace(os.sep, '/')
+        if rel_path == '..' or rel_path.startswith('../') or os.path.isabs(rel_path):
+            return False
+        if not self.accepts_relpath(rel_path):
+            return False
+        parts = rel_path.split('/')
+        if not self.follow_symlinks:
+            current = directory
+            for part in parts[:-1]:
+                current = os.path.join(current, part)
+                if os.path.islink(current):
+                    return False
+        return os.path.isfile(file_path)
+
+    def walk(self, directory, onerror=None):
+        """按os.walk的方式产出 (目录路径, 子目录名列表, 文件名列表)，已排除的条目不会出现
+
+        调用方可以像os.walk一样原地修改子目录名列表来跳过部分子目录。
+        """
+        for path, _, _, dirs, files in self._scan(directory, onerror):
+            yield path, dirs, [entry.name for entry in files]
+
+    def iter_files(self, directory, onerror=None):
+        """按发现顺序产出需要扫描的文件路径"""
+        seen = set()
+        shard, shards = self.shard or (None, None)
+        for _, rel, device, _, files in self._scan(directory, onerror):
+            for entry in files:
+                name = entry.name
+                if not self.is_source_file(name):
+                    continue
+                rel_path = f"{rel}/{name}" if rel else name
+                if self._include_rules and not self._included(name, rel_path):
+                    continue
+                if self.dedupe_files:
+                    try:
+                        # 普通文件直接使用目录项中的inode，符号链接取其指向的文件
+                        key = (device, entry.inode()) if not entry.is_symlink() else \
+                            (entry.stat().st_dev, entry.stat().st_ino)
+                    except OSError:
+                        # 无法读取状态的文件交给扫描阶段报告错误
+                        key = None
+                    if key is not None:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                # 在去除重复链接之后再分片，各分片合起来与不分片时产出的文件完全一致
+                if shard is not None and shard_of(directory, rel_path, shards) != shard:
+                    continue
+                yield entry.path
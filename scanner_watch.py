@@ -0,0 +1,332 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from collections import namedtuple
+
+# 轮询模式下两次遍历之间的间隔（秒）
+DEFAULT_POLL_INTERVAL = 1.0
+# 收到变化后等待后续事件的静默时间（秒），编辑器保存、git checkout 等会在短时间内产生一连串事件
+DEFAULT_DEBOUNCE = 0.05
+# watch()每次等待事件的最长时间（秒），决定响应stop的速度
+WAIT_TIMEOUT = 0.5
+
+# 增量结果：kind为 added/changed/removed；record为新结果（removed时为None），previous为之前的结果（added时为None）
+WatchUpdate = namedtuple('WatchUpdate', 'kind record previous')
+UPDATE_ADDED = 'added'
+UPDATE_CHANGED = 'changed'
+UPDATE_REMOVED = 'removed'
+
+# inotify事件掩码（见 <sys/inotify.h>）
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct('iIII')
+
+
+class InotifyBackend:
+    """Linux inotify：由内核推送变化的路径，等待期间不遍历目录、不占用CPU
+
+    每个目录一个监视（新建或移入的子目录随事件自动加入）；内核事件队列溢出时要求全量重新核对。
+    """
+
+    def __init__(self, walker):
+        self.walker = walker
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            self._raise()
+        self._paths = {}  # 监视描述符 -> 目录路径
+        self._wds = {}  # 目录路径 -> 监视描述符
+
+    def _raise(self, path=None):
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), path)
+
+    def add_tree(self, directory):
+        """监视目录及其（未被排除的）所有子目录，监视数超过系统上限时抛出OSError"""
+        for root, _, _ in self.walker.walk(directory):
+            if root in self._wds:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), _WATCH_MASK)
+            if wd < 0:
+                self._raise(root)
+            self._paths[wd] = root
+            self._wds[root] = wd
+
+    def _forget_tree(self, directory):
+        """目录被移走后，其下的监视描述符仍指向旧路径，全部移除"""
+        prefix = directory + os.sep
+        for path in [p for p in self._wds if p == directory or p.startswith(prefix)]:
+            wd = self._wds.pop(path)
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def wait(self, timeout):
+        """等待变化，返回可能变化的路径集合（超时返回空集合），需要全量核对时返回None"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    changed = None
+                    continue
+                directory = self._paths.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    if mask & IN_IGNORED:
+                        self._paths.pop(wd, None)
+                        if self._wds.get(directory) == wd:
+                            del self._wds[directory]
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if not mask & (IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                        continue  # 目录属性变化不影响其中的文件
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # 先建立监视再由调用方遍历新目录，之间新建的文件两边都能看到，不会遗漏
+                        self.add_tree(path)
+                    elif mask & IN_MOVED_FROM:
+                        self._forget_tree(path)
+                if changed is not None:
+                    changed.add(path)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingBackend:
+    """轮询：定期遍历目录并比较文件的修改时间和大小，用于非Linux系统、网络文件系统等inotify不可用的场景"""
+
+    def __init__(self, walker, interval=DEFAULT_POLL_INTERVAL):
+        self.walker = walker
+        self.interval = interval
+        self._roots = []
+        self._snapshot = {}  # 文件路径 -> (修改时间, 大小)
+        self._next_poll = time.monotonic() + interval
+
+    def _stat_tree(self, directory):
+        snapshot = {}
+        for file_path in self.walker.iter_files(directory):
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[os.path.abspath(file_path)] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def add_tree(self, directory):
+        if directory not in self._roots:
+            self._roots.append(directory)
+            self._snapshot.update(self._stat_tree(directory))
+
+    def wait(self, timeout):
+        """到达轮询时间时遍历一次，返回新增、修改和删除的文件路径集合"""
+        delay = self._next_poll - time.monotonic()
+        if delay > 0:
+            if timeout is not None and timeout < delay:
+                time.sleep(max(timeout, 0))
+                return set()
+            time.sleep(delay)
+        snapshot = {}
+        for root in self._roots:
+            snapshot.update(self._stat_tree(root))
+        self._next_poll = time.monotonic() + self.interval
+        changed = {p for p, state in snapshot.items() if self._snapshot.get(p) != state}
+        changed.update(p for p in self._snapshot if p not in snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_backend(walker, poll_interval=None):
+    """Linux上优先使用inotify，不可用或指定了轮询间隔时使用轮询"""
+    if poll_interval is None and sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend(walker)
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend(walker, poll_interval or DEFAULT_POLL_INTERVAL)
+
+
+class ScanWatcher:
+    """监视模式：内存中保留每个文件的判定，只重新判定新建、修改和删除的文件
+
+    首次扫描之前建立监视，扫描期间发生的变化也不会遗漏。更换匹配规则时只对已知文件重新判定，
+    不再遍历目录（配合扫描缓存，已缓存关键词的结论无需重新读取文件）。
+    追踪include/继承时只重新判定变化的文件本身，依赖它的文件在下次完整扫描时更新。
+    """
+
+    def __init__(self, scanner, directories, pattern, poll_interval=None, debounce=DEFAULT_DEBOUNCE):
+        self.scanner = scanner
+        self.directories = list(dict.fromkeys(directories))
+        self.pattern = pattern
+        self.debounce = debounce
+        self.records = {}  # 文件绝对路径 -> ScanRecord
+        self.last_rescan = None  # 最近一次增量判定的 (文件数, 耗时秒)
+        self.backend = None
+        self._poll_interval = poll_interval
+
+    @property
+    def backend_name(self):
+        return 'inotify' if isinstance(self.backend, InotifyBackend) else 'polling'
+
+    def _open_backend(self, polling=False):
+        if polling:
+            self.backend = PollingBackend(self.scanner.walker, self._poll_interval or DEFAULT_POLL_INTERVAL)
+        else:
+            self.backend = open_backend(self.scanner.walker, self._poll_interval)
+        try:
+            for directory in self.directories:
+                self.backend.add_tree(os.path.abspath(directory))
+        except OSError:
+            if polling:
+                raise
+            # 监视数超过系统上限（fs.inotify.max_user_watches）等，改为轮询
+            self._fall_back()
+
+    def _fall_back(self):
+        """inotify无法继续使用时改为轮询"""
+        self.backend.close()
+        self._open_backend(polling=True)
+
+    def iter_records(self, pattern=None):
+        """产出所有文件的当前结果：首次调用时完整扫描，之后（如更换匹配规则）只对已知文件重新判定"""
+        if pattern is not None:
+            self.pattern = pattern
+        if self.backend is None:
+            self._open_backend()
+            records = self.scanner.iter_records(self.directories, self.pattern)
+        else:
+            records = self.scanner.iter_changed_records(self.directories, self.pattern, list(self.records))
+        seen = set()
+        for record in records:
+            key = os.path.abspath(record.path)
+            if key in seen:
+                continue  # 扫描目录互相包含时同一文件只保留一份
+            seen.add(key)
+            self.records[key] = record
+            yield record
+        for key in [k for k in self.records if k not in seen]:
+            del self.records[key]
+
+    def _expand(self, paths):
+        """把变化的路径展开为需要重新判定的文件和已不存在的文件"""
+        present = set()
+        gone = set()
+        for path in paths:
+            if os.path.isdir(path):
+                present.update(os.path.abspath(p) for p in self.scanner.walker.iter_files(path))
+                continue
+            if os.path.isfile(path):
+                present.add(path)
+                continue
+            if path in self.records:
+                gone.add(path)
+                continue
+            # 删除或移走的可能是目录，其下所有已知文件一并移除
+            prefix = path + os.sep
+            gone.update(k for k in self.records if k == path or k.startswith(prefix))
+        return present, gone
+
+    def rescan(self, paths):
+        """重新判定变化的路径（None表示全部核对一遍），返回判定有变化的WatchUpdate列表"""
+        started = time.perf_counter()
+        if paths is None:
+            paths = set(self.records)
+            for directory in self.directories:
+                paths.update(os.path.abspath(p) for p in self.scanner.walker.iter_files(directory))
+        present, gone = self._expand({os.path.abspath(p) for p in paths})
+        updates = []
+        for key in sorted(gone - present):
+            previous = self.records.pop(key, None)
+            if previous is not None:
+                updates.append(WatchUpdate(UPDATE_REMOVED, None, previous))
+        if present:
+            # 少量文件直接在当前进程中判定，省去进程池的启动开销
+            workers = 1 if len(present) < self.scanner.batch_size else None
+            seen = set()
+            records = self.scanner.iter_changed_records(self.directories, self.pattern, sorted(present), workers)
+            for record in records:
+                key = os.path.abspath(record.path)
+                if key in seen:
+                    continue
+                seen.add(key)
+                previous = self.records.get(key)
+                self.records[key] = record
+                if previous is None:
+                    updates.append(WatchUpdate(UPDATE_ADDED, record, None))
+                elif previous.verdict != record.verdict:
+                    updates.append(WatchUpdate(UPDATE_CHANGED, record, previous))
+            # 不再属于扫描范围的文件（如变成了符号链接）
+            for key in present - seen:
+                previous = self.records.pop(key, None)
+                if previous is not None:
+                    updates.append(WatchUpdate(UPDATE_REMOVED, None, previous))
+        self.last_rescan = (len(present) + len(gone), time.perf_counter() - started)
+        return updates
+
+    def wait(self, timeout=None):
+        """等待文件变化（最长timeout秒），重新判定后返回WatchUpdate列表，没有变化时返回空列表"""
+        if self.backend is None:
+            raise RuntimeError("请先调用iter_records完成首次扫描")
+        try:
+            changed = self.backend.wait(timeout)
+        except OSError:
+            # 新建的子目录超出监视数上限，改为轮询并全部核对一遍
+            self._fall_back()
+            return self.rescan(None)
+        if changed is not None and not changed:
+            return []
+        while changed is not None:
+            try:
+                more = self.backend.wait(self.debounce)
+            except OSError:
+                self._fall_back()
+                more = None
+            if more is None:
+                changed = None
+            elif not more:
+                break
+            else:
+                changed |= more
+        return self.rescan(changed)
+
+    def watch(self, stop=None):
+        """持续监视，每批变化产出一个WatchUpdate列表，直到stop（threading.Event）被设置"""
+        while stop is None or not stop.is_set():
+            updates = self.wait(WAIT_TIMEOUT)
+            if updates:
+                yield updates
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
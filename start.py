@@ -1,3 +1,4 @@
+import multiprocessing
 import customtkinter as ctk
 from scanner_gui import ScannerGUI
 
@@ -11,4 +12,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # 打包为EXE后并行扫描的工作进程需要此调用
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# benchmarks/下的辅助模块（如latency）也供测试使用
+sys.path.insert(1, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,102 @@
+import bz2
+import io
+import os
+import struct
+import tarfile
+import zipfile
+import zlib
+
+import pytest
+
+from scanner_core import PHPAuthScanner
+from scanner_reader import VERDICT_ERROR
+from scanner_results import relative_path
+
+FILES = {
+    "app/Index.php": b"<?php echo 1;",
+    "app/Login.php": b"<?php\n// \xc3\xa9\xc3\xa9 comment\nsession_start();",
+    "app/Empty.php": b"<?php ",
+    "app/Big.php": b"<?php\n" + b"$a = 1;\n" * 40000 + b"checkLogin();",
+    "app/Wide.php": "<?php // ſession \n".encode() + b"echo 2;" * 5000,
+    "readme.txt": b"session",
+}
+
+
+def write_phar(path):
+    entries = data = b""
+    for i, (name, content) in enumerate(FILES.items()):
+        flags, stored = 0, content
+        if i % 3 == 1:
+            flags, stored = 0x1000, zlib.compress(content)[2:-4]
+        elif i % 3 == 2:
+            flags, stored = 0x2000, bz2.compress(content)
+        encoded = name.encode()
+        entries += struct.pack("<I", len(encoded)) + encoded
+        entries += struct.pack("<6I", len(content), 0, len(stored), zlib.crc32(content), flags | 0o644, 0)
+        data += stored
+    manifest = struct.pack("<I", len(FILES)) + b"\x11\x00" + struct.pack("<III", 0x10000, 0, 0) + entries
+    with open(path, "wb") as f:
+        f.write(b"<?php __HALT_COMPILER(); ?>\r\n" + struct.pack("<I", len(manifest)) + manifest + data)
+
+
+def write_archive(path):
+    if path.endswith(".phar"):
+        write_phar(path)
+    elif path.endswith(".zip"):
+        method = {"stored": zipfile.ZIP_STORED, "deflate": zipfile.ZIP_DEFLATED, "bzip2": zipfile.ZIP_BZIP2,
+                  "lzma": zipfile.ZIP_LZMA}[os.path.basename(path)[:-4]]
+        with zipfile.ZipFile(path, "w", method) as zf:
+            for name, content in FILES.items():
+                zf.writestr(name, content)
+    else:
+        with tarfile.open(path, "w:gz" if path.endswith(".tar.gz") else "w") as tf:
+            for name, content in FILES.items():
+                info = tarfile.TarInfo("./" + name)
+                info.size = len(content)
+                tf.addfile(info, io.BytesIO(content))
+
+
+def records(scanner, path):
+    pattern = scanner.generate_matcher(["session", "checkLogin"])
+    return sorted((relative_path(r).replace(os.sep, "/"), r.verdict, r.keyword, r.offset, r.size)
+                  for r in scanner.iter_records([path], pattern))
+
+
+@pytest.mark.parametrize("name", ["stored.zip", "deflate.zip", "bzip2.zip", "lzma.zip", "plain.tar",
+                                  "packed.tar.gz", "native.phar"])
+def test_archive_members_match_extracted_files(tmp_path, name):
+    for rel_path, content in FILES.items():
+        target = tmp_path / "extracted" / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+    archive = str(tmp_path / name)
+    write_archive(archive)
+    for kwargs in ({}, {"lexer": "comments"}):
+        scanner = PHPAuthScanner(**kwargs)
+        scanner.chunk_size = 4096
+        scanner.bytes_matching = True
+        assert records(scanner, archive) == records(scanner, str(tmp_path / "extracted"))
+
+
+def test_members_are_streamed_not_read_whole(tmp_path, monkeypatch):
+    archive = str(tmp_path / "deflate.zip")
+    write_archive(archive)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("成员不应整体读入内存")
+
+    monkeypatch.setattr(zipfile.ZipFile, "read", fail)
+    monkeypatch.setattr(zipfile.ZipFile, "open", fail)
+    scanner = PHPAuthScanner()
+    verdicts = [verdict for _, verdict, _, _, _ in records(scanner, archive)]
+    assert len(verdicts) == 5 and VERDICT_ERROR not in verdicts
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="需要/proc")
+def test_archive_is_closed_after_scan(tmp_path):
+    archive = str(tmp_path / "native.phar")
+    write_archive(archive)
+    records(PHPAuthScanner(), archive)
+    opened = [os.readlink(f"/proc/self/fd/{fd}") for fd in os.listdir("/proc/self/fd")
+              if os.path.exists(f"/proc/self/fd/{fd}")]
+    assert archive not in opened
@@ -0,0 +1,58 @@
+import asyncio
+import os
+
+from latency import LatencyShim
+from scanner_core import VERDICT_AUTH, VERDICT_ERROR, VERDICT_NO_AUTH, PHPAuthScanner
+
+
+def scan(directory, **kwargs):
+    scanner = PHPAuthScanner(workers=1)
+    pattern = scanner.generate_matcher(["session"])
+
+    async def collect():
+        return [record async for record in scanner.aiter_records([str(directory)], pattern, **kwargs)]
+
+    return asyncio.run(collect())
+
+
+class FailFirstOpen(LatencyShim):
+    """每个文件第一次打开时抛出瞬时错误，之后正常读取"""
+
+    def __init__(self):
+        super().__init__(latency=0)
+        self.failed = set()
+
+    def _open(self, file, *args, **kwargs):
+        if file not in self.failed:
+            self.failed.add(file)
+            with self._lock:
+                self.opened += 1
+            raise OSError(f"模拟的瞬时读取错误: {file}")
+        return super()._open(file, *args, **kwargs)
+
+
+def test_slow_read_times_out_and_is_retried(tmp_path):
+    (tmp_path / "a.php").write_text("<?php echo 1;")
+    with LatencyShim(latency=0, stall_rate=1.0, stall=0.5) as shim:
+        records = scan(tmp_path, timeout=0.1, retries=1)
+    assert [r.verdict for r in records] == [VERDICT_ERROR]
+    assert "读取超时" in records[0].error and "已重试 1 次" in records[0].error
+    assert shim.opened == 2
+
+
+def test_transient_error_is_retried(tmp_path):
+    (tmp_path / "a.php").write_text("<?php echo 1;")
+    (tmp_path / "b.php").write_text("<?php session_start();")
+    with FailFirstOpen() as shim:
+        records = scan(tmp_path, timeout=1.0, retries=1)
+    assert {os.path.basename(r.path): r.verdict for r in records} == {"a.php": VERDICT_NO_AUTH,
+                                                                        "b.php": VERDICT_AUTH}
+    assert shim.opened == 4
+
+
+def test_without_retries_error_is_reported(tmp_path):
+    (tmp_path / "a.php").write_text("<?php echo 1;")
+    with FailFirstOpen():
+        records = scan(tmp_path, retries=0)
+    assert [r.verdict for r in records] == [VERDICT_ERROR]
+    assert "模拟的瞬时读取错误" in records[0].error
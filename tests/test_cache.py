@@ -0,0 +1,66 @@
+import os
+
+from scanner_cache import ScanCache
+from scanner_core import PHPAuthScanner
+from scanner_reader import VERDICT_AUTH, VERDICT_NO_AUTH
+
+
+def make_project(tmp_path):
+    files = {
+        "Session.php": "<?php if (!session('uid')) exit;",
+        "Login.php": "<?php checkLogin();",
+        "Open.php": "<?php echo 'open';",
+    }
+    for name, text in files.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    return str(tmp_path)
+
+
+def scan(scanner, directory, keywords):
+    records = scanner.iter_records([directory], scanner.generate_matcher(keywords))
+    return {os.path.basename(r.path): r.verdict for r in records}
+
+
+def test_unchanged_files_come_from_cache(tmp_path):
+    directory = make_project(tmp_path)
+    scanner = PHPAuthScanner(cache=ScanCache(":memory:"))
+    first = scan(scanner, directory, ["session"])
+    assert scanner.cache_stats == {'cached': 0, 'rescanned': 3}
+    assert scan(scanner, directory, ["session"]) == first
+    assert scanner.cache_stats == {'cached': 3, 'rescanned': 0}
+    assert first == {"Session.php": VERDICT_AUTH, "Login.php": VERDICT_NO_AUTH, "Open.php": VERDICT_NO_AUTH}
+
+
+def test_edited_file_is_rescanned(tmp_path):
+    directory = make_project(tmp_path)
+    scanner = PHPAuthScanner(cache=ScanCache(str(tmp_path / "cache" / "scan.sqlite3")))
+    scan(scanner, directory, ["session"])
+    path = tmp_path / "Open.php"
+    path.write_text("<?php $_SESSION['uid'];", encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    verdicts = scan(scanner, directory, ["session"])
+    assert scanner.cache_stats == {'cached': 2, 'rescanned': 1}
+    assert verdicts["Open.php"] == VERDICT_AUTH
+
+    # 只修改时间变化、内容未变的文件沿用缓存结论
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert scan(scanner, directory, ["session"])["Open.php"] == VERDICT_AUTH
+    assert scanner.cache_stats == {'cached': 3, 'rescanned': 0}
+
+
+def test_keyword_change_only_evaluates_new_keyword(tmp_path):
+    directory = make_project(tmp_path)
+    scanner = PHPAuthScanner(cache=ScanCache(":memory:"))
+    scan(scanner, directory, ["session"])
+    # 已由session判定为鉴权的文件无需读取，其余文件只补充评估新关键词
+    verdicts = scan(scanner, directory, ["session", "checkLogin"])
+    assert scanner.cache_stats == {'cached': 1, 'rescanned': 2}
+    assert verdicts == {"Session.php": VERDICT_AUTH, "Login.php": VERDICT_AUTH, "Open.php": VERDICT_NO_AUTH}
+    # Session.php此前只评估过session，换成checkLogin后只有它需要补充评估
+    assert scan(scanner, directory, ["checkLogin"]) == {
+        "Session.php": VERDICT_NO_AUTH, "Login.php": VERDICT_AUTH, "Open.php": VERDICT_NO_AUTH}
+    assert scanner.cache_stats == {'cached': 2, 'rescanned': 1}
+    scan(scanner, directory, ["checkLogin", "session"])
+    assert scanner.cache_stats == {'cached': 3, 'rescanned': 0}
@@ -0,0 +1,22 @@
+from scanner_cli import EXIT_FOUND, EXIT_OK, EXIT_USAGE, main
+
+
+def test_invalid_exclude_regex_is_usage_error(tmp_path, capsys):
+    (tmp_path / "a.php").write_text("<?php echo 1;", encoding="utf-8")
+    assert main([str(tmp_path), "-e", "re:(", "-w", "1"]) == EXIT_USAGE
+    assert "无效的正则规则" in capsys.readouterr().err
+
+
+def test_exit_codes_distinguish_findings(tmp_path):
+    (tmp_path / "open.php").write_text("<?php echo 1;", encoding="utf-8")
+    (tmp_path / "guarded.php").write_text("<?php session_start();", encoding="utf-8")
+    assert main([str(tmp_path), "-w", "1", "-q"]) == EXIT_FOUND
+    (tmp_path / "open.php").write_text("<?php checkLogin();", encoding="utf-8")
+    assert main([str(tmp_path), "-w", "1", "-q"]) == EXIT_OK
+
+
+def test_async_rejects_cache(tmp_path, capsys):
+    (tmp_path / "a.php").write_text("<?php echo 1;", encoding="utf-8")
+    cache = str(tmp_path / "cache.sqlite3")
+    assert main([str(tmp_path), "--async", "4", "--cache", cache, "-q"]) == EXIT_USAGE
+    assert "--cache" in capsys.readouterr().err
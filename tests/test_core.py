@@ -0,0 +1,31 @@
+from scanner_core import PHPAuthScanner
+from scanner_reader import VERDICT_AUTH, VERDICT_EMPTY, VERDICT_NO_AUTH, VERDICT_TOO_LARGE
+
+
+def make_project(tmp_path):
+    directories = []
+    for d in range(3):
+        directory = tmp_path / f"app{d}"
+        directory.mkdir()
+        for i in range(40):
+            text = "<?php session_start();" if i % 3 == 0 else f"<?php echo {i};"
+            (directory / f"F{i}.php").write_text(text, encoding="utf-8")
+        (directory / "Empty.php").write_text("<?php\n", encoding="utf-8")
+        (directory / "Large.php").write_text("<?php " + "x" * 5000, encoding="utf-8")
+        directories.append(str(directory))
+    return directories
+
+
+def scan(directories, workers):
+    # 批次很小，使每个目录拆成多个批次提交到进程池
+    scanner = PHPAuthScanner(workers=workers, batch_size=7, max_file_size=4096)
+    records = scanner.iter_records(directories, scanner.generate_matcher(["session", "checkLogin"]))
+    return [r._replace(scan_time=None, timings=None) for r in records]
+
+
+def test_process_pool_gives_same_records_as_single_worker(tmp_path):
+    directories = make_project(tmp_path)
+    single = scan(directories, 1)
+    assert len(single) == 3 * 42
+    assert {r.verdict for r in single} == {VERDICT_AUTH, VERDICT_NO_AUTH, VERDICT_EMPTY, VERDICT_TOO_LARGE}
+    assert scan(directories, 2) == single
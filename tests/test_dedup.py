@@ -0,0 +1,67 @@
+import os
+
+import scanner_core
+from scanner_core import PHPAuthScanner
+from scanner_reader import VERDICT_AUTH, VERDICT_NO_AUTH
+from scanner_view import ResultStore
+
+FILES = {
+    "Open.php": "<?php echo 'open';",
+    "Auth.php": "<?php session_start();",
+}
+
+
+def make_dirs(tmp_path):
+    directories = []
+    for name in ("a", "b"):
+        directory = tmp_path / name
+        directory.mkdir()
+        for file_name, text in FILES.items():
+            (directory / file_name).write_text(text, encoding="utf-8")
+        directories.append(str(directory))
+    (tmp_path / "b" / "Other.php").write_text("<?php echo 'other';", encoding="utf-8")
+    return directories
+
+
+def test_identical_files_across_directories_are_read_once(tmp_path, monkeypatch):
+    directories = make_dirs(tmp_path)
+    scanned = []
+    scan_batch = scanner_core._scan_batch
+
+    def counting_scan_batch(directory, file_paths, *args):
+        scanned.extend(file_paths)
+        return scan_batch(directory, file_paths, *args)
+
+    monkeypatch.setattr(scanner_core, "_scan_batch", counting_scan_batch)
+    scanner = PHPAuthScanner()
+    scanner.dedup = True
+    records = {os.path.relpath(r.path, tmp_path): r
+               for r in scanner.iter_records(directories, scanner.generate_matcher(["session"]))}
+
+    assert sorted(os.path.relpath(p, tmp_path) for p in scanned) == ["a/Auth.php", "a/Open.php", "b/Other.php"]
+    assert scanner.dedup_stats == {'duplicates': 2, 'hashed': 4}
+    for name, verdict in (("Open.php", VERDICT_NO_AUTH), ("Auth.php", VERDICT_AUTH)):
+        original, copy = records[f"a/{name}"], records[f"b/{name}"]
+        assert original.verdict == copy.verdict == verdict
+        assert original.duplicate_of is None
+        assert copy.duplicate_of == original.path
+        assert original.digest is not None and copy.digest == original.digest
+    assert records["b/Other.php"].duplicate_of is None
+
+
+def test_save_results_lists_duplicates(tmp_path):
+    directories = make_dirs(tmp_path)
+    scanner = PHPAuthScanner()
+    scanner.dedup = True
+    store = ResultStore()
+    for record in scanner.iter_records(directories, scanner.generate_matcher(["session"])):
+        store.add(record)
+    output = tmp_path / "result.txt"
+    scanner.save_results("session", "session", directories, list(store.found()), str(output),
+                         duplicates=store.duplicates())
+
+    assert store.duplicates() == {(directories[0], "Open.php"): [(directories[1], "Open.php")]}
+    text = output.read_text(encoding="utf-8")
+    assert "共发现 3 个文件未检测到鉴权代码，其中 1 个与其他文件内容相同" in text
+    # 内容相同的文件缩进列在首个文件之下
+    assert "Open.php\n    Open.php\nOther.php\n" in text
@@ -0,0 +1,45 @@
+import os
+
+from scanner_cli import EXIT_FOUND, EXIT_OK, main
+from scanner_core import PHPAuthScanner
+
+
+def make_project(tmp_path):
+    for name in ("admin", "api"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "admin" / "Index.php").write_text("<?php echo 1;", encoding="utf-8")
+    (tmp_path / "api" / "Login.php").write_text("<?php session_start();", encoding="utf-8")
+    return [str(tmp_path / "admin"), str(tmp_path / "api")]
+
+
+def test_jsonl_baseline_is_keyed_by_directory(tmp_path, capsys):
+    directories = make_project(tmp_path)
+    baseline = str(tmp_path / "baseline.jsonl")
+    assert main([*directories, "-w", "1", "-q", "-f", "jsonl", "-o", baseline]) == EXIT_FOUND
+    assert main([*directories, "-w", "1", "-q", "--baseline", baseline]) == EXIT_OK
+
+    # 另一个目录下新增的同名文件不能被基线掩盖
+    (tmp_path / "api" / "Index.php").write_text("<?php echo 2;", encoding="utf-8")
+    capsys.readouterr()
+    assert main([*directories, "-w", "1", "-q", "--baseline", baseline]) == EXIT_FOUND
+    out = capsys.readouterr().out
+    assert os.path.join(directories[1], "Index.php") in out
+    assert os.path.join(directories[0], "Index.php") not in out
+
+
+def test_baseline_directory_spelling_is_normalized(tmp_path, monkeypatch):
+    make_project(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    assert main(["./admin", "api", "-w", "1", "-q", "-f", "jsonl", "-o", "baseline.jsonl"]) == EXIT_FOUND
+    assert main(["admin/", "./api/", "-w", "1", "-q", "--baseline", "baseline.jsonl"]) == EXIT_OK
+
+
+def test_text_baseline_warns_about_ambiguous_paths(tmp_path, capsys):
+    directories = make_project(tmp_path)
+    baseline = str(tmp_path / "baseline.txt")
+    PHPAuthScanner().save_results(["session"], "", directories, [(directories[0], "Index.php")], baseline)
+    (tmp_path / "api" / "Index.php").write_text("<?php echo 2;", encoding="utf-8")
+    capsys.readouterr()
+    assert main([*directories, "-w", "1", "-q", "--baseline", baseline]) == EXIT_OK
+    err = capsys.readouterr().err
+    assert "警告" in err and "Index.php" in err
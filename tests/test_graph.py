@@ -0,0 +1,81 @@
+import os
+
+from scanner_core import PHPAuthScanner
+from scanner_reader import VERDICT_AUTH, VERDICT_INHERITED, VERDICT_NO_AUTH
+
+FILES = {
+    "auth.php": "<?php if (!session('uid')) exit;",
+    "Included.php": "<?php require 'auth.php'; echo 1;",
+    # 互相include且都没有鉴权代码
+    "CycleA.php": "<?php include 'CycleB.php';",
+    "CycleB.php": "<?php include 'CycleA.php';",
+    # 环中有一个文件include了鉴权文件，整个环都获得鉴权
+    "CycleC.php": "<?php require_once __DIR__ . '/CycleD.php';",
+    "CycleD.php": "<?php require 'CycleC.php';\nrequire 'auth.php';",
+    "AuthController.php": "<?php\nclass AuthController\n{\n    public function __construct() { session('uid') or die(); }\n}\n",
+    "User.php": "<?php\nclass User extends AuthController\n{\n}\n",
+    "Open.php": "<?php echo 1;",
+}
+
+
+def scan(directories, follow_includes=True):
+    scanner = PHPAuthScanner(follow_includes=follow_includes)
+    records = scanner.iter_records(directories, scanner.generate_matcher(["session"]))
+    return {os.path.basename(r.path): r for r in records}
+
+
+def make_tree(root, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def test_auth_propagates_through_includes_cycles_and_inheritance(tmp_path):
+    make_tree(tmp_path, FILES)
+    records = scan([str(tmp_path)])
+    verdicts = {name: record.verdict for name, record in records.items()}
+    assert verdicts == {
+        "auth.php": VERDICT_AUTH,
+        "AuthController.php": VERDICT_AUTH,
+        "Included.php": VERDICT_INHERITED,
+        "User.php": VERDICT_INHERITED,
+        "CycleC.php": VERDICT_INHERITED,
+        "CycleD.php": VERDICT_INHERITED,
+        "CycleA.php": VERDICT_NO_AUTH,
+        "CycleB.php": VERDICT_NO_AUTH,
+        "Open.php": VERDICT_NO_AUTH,
+    }
+    via = {name: [os.path.basename(p) for p in record.via or ()] for name, record in records.items()}
+    assert via["Included.php"] == ["auth.php"]
+    assert via["User.php"] == ["AuthController.php"]
+    assert via["CycleC.php"] == ["CycleD.php", "auth.php"]
+
+
+def test_without_follow_includes_verdicts_are_unchanged(tmp_path):
+    make_tree(tmp_path, FILES)
+    verdicts = {name: record.verdict for name, record in scan([str(tmp_path)], follow_includes=False).items()}
+    assert verdicts["Included.php"] == verdicts["User.php"] == verdicts["CycleC.php"] == VERDICT_NO_AUTH
+
+
+def test_dependency_outside_scanned_directory(tmp_path):
+    make_tree(tmp_path, {
+        "common/auth.php": "<?php session_start();",
+        "controller/Index.php": "<?php require '../common/auth.php';",
+        "controller/Other.php": "<?php include 'Index.php';",
+    })
+    records = scan([str(tmp_path / "controller")])
+    assert {name: record.verdict for name, record in records.items()} == {
+        "Index.php": VERDICT_INHERITED, "Other.php": VERDICT_INHERITED}
+    assert os.path.basename(records["Other.php"].via[-1]) == "auth.php"
+
+
+def test_long_include_cycle_terminates(tmp_path):
+    # 远超递归深度上限的环，迭代式Tarjan算法不受影响
+    count = 1500
+    make_tree(tmp_path, {f"F{i}.php": f"<?php include 'F{(i + 1) % count}.php';" for i in range(count)})
+    assert {r.verdict for r in scan([str(tmp_path)]).values()} == {VERDICT_NO_AUTH}
+    (tmp_path / "F0.php").write_text("<?php include 'F1.php'; session_start();", encoding="utf-8")
+    records = scan([str(tmp_path)])
+    assert records["F0.php"].verdict == VERDICT_AUTH
+    assert {r.verdict for name, r in records.items() if name != "F0.php"} == {VERDICT_INHERITED}
@@ -0,0 +1,39 @@
+import scanner_index
+from scanner_index import IdentifierIndex
+
+
+def test_find_matches_substrings_of_identifiers(tmp_path):
+    index = IdentifierIndex(str(tmp_path / "index.sqlite3"))
+    index.store("/a.php", 1, 10, False, {b"checklogin", b"foo"})
+    index.store("/b.php", 1, 10, False, {b"islogin", b"login"})
+    assert index.find("login") == {1, 2}
+    assert index.find("checklog") == {1}
+    assert index.find("bar") == set()
+    # 新写入的标识符在下次查找时可见
+    index.store("/c.php", 1, 10, False, {b"userlogin_id"})
+    assert index.find("login") == {1, 2, 3}
+    index.close()
+
+    reopened = IdentifierIndex(str(tmp_path / "index.sqlite3"))
+    assert reopened.find("login") == {1, 2, 3}
+    assert reopened.find("_id") == {3}
+    reopened.close()
+
+
+def test_find_after_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(scanner_index, "COMPACT_MIN_DEAD", 0)
+    index = IdentifierIndex(str(tmp_path / "index.sqlite3"))
+    index.store("/a.php", 1, 10, False, {b"checklogin", b"foo"})
+    index.store("/b.php", 1, 10, False, {b"islogin"})
+    index.flush()
+    assert index.find("foo") == {1}
+    for mtime in (2, 3, 4):
+        index.store("/a.php", mtime, 10, False, {b"bar"})
+        index.flush()
+    assert index.find("foo") == set()
+    assert index.find("login") == {2}
+    assert index.find("bar") == {5}
+    index.store("/c.php", 1, 10, False, {b"foobar"})
+    assert index.find("foo") == {6}
+    assert index.find("bar") == {5, 6}
+    index.close()
@@ -0,0 +1,84 @@
+import random
+import re
+
+import pytest
+
+import scanner_lexer
+from scanner_lexer import LEXER_MODES, STRIP_COMMENTS, STRIP_STRINGS, CodeFilter, code_filter, strip_php
+
+
+def blanked(source, *segments):
+    """把source中的各段替换为等长空白（保留换行），即strip_php的预期输出"""
+    for segment in segments:
+        assert segment in source
+        source = source.replace(segment, re.sub(r'[^\n]', ' ', segment), 1)
+    return source
+
+
+CASES = [
+    # (源码, 模式, 应被剥离的片段)
+    ("<?php a(); // session\nb(); /* auth\n */ c(); # login\nd();", STRIP_COMMENTS,
+     ["// session", "/* auth\n */", "# login"]),
+    ("<?php $a = 'session'; $b = \"auth\\\"x\";", STRIP_COMMENTS, []),
+    ("<?php $a = 'session'; $b = \"auth\\\"x\";", STRIP_STRINGS, ["'session'", "\"auth\\\"x\""]),
+    ("<?php $a = <<<EOT\nsession\nEOT;\nauth();", STRIP_STRINGS, ["<<<EOT\nsession\nEOT"]),
+    ("<?php $a = <<<'EOT'\n$session\n  EOT;\nauth();", STRIP_STRINGS, ["<<<'EOT'\n$session\n  EOT"]),
+    ("<?php a(); ?><p>session</p><?php b();", STRIP_COMMENTS, []),
+    ("<?php a(); ?><p>session</p><?php b();", STRIP_STRINGS, ["?><p>session</p><?php"]),
+    ("<html>session<?php a();", STRIP_STRINGS, ["<html>session<?php"]),
+    ("<?php // session ?>auth", STRIP_COMMENTS, ["// session "]),
+    ("<?php #[IsGranted('ROLE_ADMIN')]\n# session\nfunction a() {}", STRIP_COMMENTS, ["# session"]),
+    ("<?php require_once 'auth.php'; $x = 'session';", STRIP_STRINGS, ["'session'"]),
+    ("<?php INCLUDE __DIR__ . '/login.php'; // x", STRIP_STRINGS, ["// x"]),
+]
+
+
+@pytest.mark.parametrize("source, mode, segments", CASES)
+def test_strip_php(source, mode, segments):
+    expected = blanked(source, *segments)
+    assert strip_php(source, mode) == expected
+    assert strip_php(source.encode(), mode) == expected.encode()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        strip_php("<?php", "html")
+    with pytest.raises(ValueError):
+        CodeFilter("html")
+
+
+def test_strings_mode_skips_include_rules_without_include():
+    plain = "<?php $a = 'require'; // x\nauth();"
+    assert scanner_lexer._content_lexer(STRIP_STRINGS, "<?php a('x');") is \
+        scanner_lexer._lexer(scanner_lexer._STRINGS_NO_INCLUDE, False)
+    assert scanner_lexer._content_lexer(STRIP_STRINGS, plain) is scanner_lexer._lexer(STRIP_STRINGS, False)
+    assert scanner_lexer._content_lexer(STRIP_STRINGS, b"<?php REQUIRE 'a.php';") is \
+        scanner_lexer._lexer(STRIP_STRINGS, True)
+    # 不含include/require的文件两套规则结果相同
+    full = scanner_lexer._lexer(STRIP_STRINGS, False)
+    fast = scanner_lexer._lexer(scanner_lexer._STRINGS_NO_INCLUDE, False)
+    for source, _, _ in CASES:
+        if "require" not in source.lower() and "include" not in source.lower():
+            assert fast.sub(fast.replace, source) == full.sub(full.replace, source)
+
+
+ATOMS = ['x', 'kw', 'KW', ' ', '\n', '\r', '/', '//', '/*', '*/', '#', '#[', '?', '?>', '<?php', '<?=', '<',
+         '<<<', 'EOT', '"', "'", '\\', '<<<EOT\n', '\nEOT;', "<<<'EOT'\n", 'require ', 'include_once(', ';', '<p>']
+
+
+@pytest.mark.parametrize("mode", LEXER_MODES)
+def test_code_filter_agrees_with_strip_then_search(mode):
+    rng = random.Random(mode)
+    text_pattern = re.compile('kw', re.IGNORECASE)
+    bytes_pattern = re.compile(b'kw')
+    sources = [source for source, _, _ in CASES]
+    sources += [''.join(rng.choice(ATOMS) for _ in range(rng.randint(0, 25))) for _ in range(3000)]
+    for source in sources:
+        expected = text_pattern.search(strip_php(source, mode))
+        hit = code_filter(mode).search(text_pattern.search, source)
+        assert (hit and hit.start()) == (expected and expected.start()), source
+        # bytes按小写后的内容查找，与扫描时一致
+        raw = source.encode().lower()
+        expected = bytes_pattern.search(strip_php(raw, mode))
+        hit = code_filter(mode, True).search(bytes_pattern.search, raw)
+        assert (hit and hit.start()) == (expected and expected.start()), source
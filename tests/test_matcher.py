@@ -0,0 +1,48 @@
+import pytest
+
+from scanner_core import PHPAuthScanner
+from scanner_matcher import KeywordMatcher
+
+KEYWORD_SETS = [
+    ["session"],
+    ["Session", "checkLogin"],
+    ["auth", "authorize", "AuthController"],
+    ["a.b", "x+y", "$uid"],
+    ["登录", "session"],
+    ["Ärger"],
+]
+
+CONTENTS = [
+    "",
+    "<?php echo 'open';",
+    "<?php SESSION_START();",
+    "<?php if ($_SESSION['uid'] == 1) {}",
+    "<?php $session = 1;",
+    "<?php require 'lib/Session.php';",
+    "<?php use App\\Http\\CheckLogin;",
+    "<?php class A extends AUTHCONTROLLER {}",
+    "<?php $this->Authorize('admin');",
+    "<?php a.b(); x+y;",
+    "<?php axb(); xxy;",
+    "<?php $UID == '1';",
+    "<?php // 用户登录校验\nlogin();",
+    "<?php // ÄRGER\n",
+    "<?php // ärger\n",
+    "<?php // ARGER\n",
+]
+
+
+@pytest.mark.parametrize("keywords", KEYWORD_SETS, ids=lambda keywords: "-".join(keywords))
+@pytest.mark.parametrize("content", CONTENTS)
+def test_matcher_agrees_with_alternation_regex(keywords, content):
+    expected = PHPAuthScanner().generate_regex(keywords).search(content)
+    matcher = KeywordMatcher(keywords)
+    hit = matcher.search(content)
+    assert (hit and hit.start()) == (expected and expected.start())
+    # 命中文本给出的是更具体的规则（如 a.b( 为调用），只要求它包含命中的关键词
+    if hit is not None:
+        assert hit.keyword in keywords and hit.keyword.lower() in hit.group(0).lower()
+    # 关键词全部为ASCII时在原始字节上匹配，偏移为字节偏移
+    if matcher.bytes_pattern is not None:
+        hit = matcher.search_bytes(content.encode())
+        assert (hit and hit.start()) == (expected and len(content[:expected.start()].encode()))
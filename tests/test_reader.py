@@ -0,0 +1,20 @@
+from scanner_reader import FULL_READ, VERDICT_AUTH, VERDICT_EMPTY, VERDICT_NO_AUTH, decode_text, match_file
+from scanner_matcher import KeywordMatcher
+
+
+def test_decode_text_matches_text_mode_reading(tmp_path):
+    raw = b"<?php\r\n// \xff session\r\necho 1;\r\n"
+    path = tmp_path / "a.php"
+    path.write_bytes(raw)
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        assert decode_text(raw) == f.read()
+
+
+def test_match_file_verdicts(tmp_path):
+    pattern = KeywordMatcher(["session"])
+    cases = {"auth.php": (b"<?php session_start();", VERDICT_AUTH),
+             "open.php": (b"<?php echo 1;", VERDICT_NO_AUTH),
+             "empty.php": (b"<?php ", VERDICT_EMPTY)}
+    for name, (raw, verdict) in cases.items():
+        (tmp_path / name).write_bytes(raw)
+        assert match_file(str(tmp_path / name), pattern, FULL_READ)[0] == verdict
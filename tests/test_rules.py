@@ -0,0 +1,70 @@
+import pytest
+
+from scanner_core import PHPAuthScanner
+from scanner_lexer import STRIP_COMMENTS
+from scanner_reader import VERDICT_AUTH, VERDICT_NO_AUTH
+from scanner_rules import BUILTIN_PACKS, compile_matcher, pack_keywords
+
+
+def write_fixture(root, packs):
+    """每个关键词、中间件和注解写法各一个文件，另加一个不含任何写法的文件"""
+    expected = {}
+    for pack in packs:
+        for i, keyword in enumerate((*pack_keywords([pack]), *pack.annotations)):
+            name = f"{pack.name}_{i}.php"
+            (root / name).write_text(f"<?php\nclass A\n{{\n    /** {keyword} */\n    function a() {{}}\n}}\n"
+                                     if keyword in pack.annotations else f"<?php\n{keyword}\n", encoding="utf-8")
+            expected[name] = VERDICT_AUTH
+    (root / "Open.php").write_text("<?php echo 'open';", encoding="utf-8")
+    expected["Open.php"] = VERDICT_NO_AUTH
+    return expected
+
+
+def scan(directory, packs, lexer=None):
+    scanner = PHPAuthScanner(lexer=lexer)
+    records = scanner.iter_records([str(directory)], scanner.generate_matcher([], packs))
+    return {r.path.rsplit("/", 1)[-1]: r.verdict for r in records}
+
+
+@pytest.mark.parametrize("name", list(BUILTIN_PACKS))
+def test_each_pack_matches_its_rules(tmp_path, name):
+    pack = BUILTIN_PACKS[name]
+    expected = write_fixture(tmp_path, [pack])
+    assert scan(tmp_path, [pack]) == expected
+    # 每个文件命中的正是写入的那条规则
+    scanner = PHPAuthScanner()
+    rules = [*pack_keywords([pack]), *pack.annotations]
+    for record in scanner.iter_records([str(tmp_path)], scanner.generate_matcher([], [pack])):
+        if record.verdict == VERDICT_AUTH:
+            assert record.keyword == rules[int(record.path.rsplit("_", 1)[1][:-4])]
+
+
+def test_all_packs_compile_into_one_matcher(tmp_path):
+    packs = list(BUILTIN_PACKS.values())
+    expected = write_fixture(tmp_path, packs)
+    matcher = compile_matcher(packs)
+    assert set(matcher.keywords) == {*pack_keywords(packs), *(kw for pack in packs for kw in pack.annotations)}
+    assert scan(tmp_path, packs) == expected
+
+
+def test_annotations_count_inside_comments_when_stripping(tmp_path):
+    symfony = BUILTIN_PACKS["symfony"]
+    (tmp_path / "Annotated.php").write_text("<?php\n/**\n * @IsGranted(\"ROLE_ADMIN\")\n */\nfunction a() {}\n",
+                                            encoding="utf-8")
+    (tmp_path / "Commented.php").write_text("<?php\n// denyAccessUnlessGranted\n", encoding="utf-8")
+    assert scan(tmp_path, [symfony], lexer=STRIP_COMMENTS) == {
+        "Annotated.php": VERDICT_AUTH, "Commented.php": VERDICT_NO_AUTH}
+
+
+def test_matcher_cache_key_includes_keywords_and_pack_versions():
+    laravel, symfony = BUILTIN_PACKS["laravel"], BUILTIN_PACKS["symfony"]
+    matcher = compile_matcher([laravel], ["session"])
+    assert compile_matcher([laravel], ["session"]) is matcher
+    assert compile_matcher([laravel], ["session", "session"]) is matcher
+    assert compile_matcher([laravel], ["login"]) is not matcher
+    assert compile_matcher([symfony], ["session"]) is not matcher
+    # 修改规则时须同时修改版本，新版本得到重新编译的匹配引擎
+    changed = laravel._replace(version=laravel.version + 1, keywords=(*laravel.keywords, "mustLogin"))
+    updated = compile_matcher([changed], ["session"])
+    assert updated is not matcher
+    assert "mustLogin" in updated.keywords and "mustLogin" not in matcher.keywords
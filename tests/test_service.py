@@ -0,0 +1,73 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from scanner_service import ScanService, make_server
+
+
+@pytest.fixture(scope="module")
+def server():
+    service = ScanService(workers=1)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def post(server, body):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    try:
+        conn.request("POST", "/scan", body if isinstance(body, bytes) else json.dumps(body))
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def wait_done(server, job_id):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    try:
+        while True:
+            conn.request("GET", f"/jobs/{job_id}?wait=5")
+            data = json.loads(conn.getresponse().read())
+            if data["state"] not in ("queued", "running"):
+                return data
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    b"\xff\xfe",
+    [1, 2],
+    {},
+    {"directories": "/nonexistent/phpauth"},
+    {"directories": ["."], "keywords": 5},
+    {"directories": ["."], "exclude": ["re:("]},
+    {"directories": ["."], "include": ["re:[a-"]},
+    {"directories": ["."], "lexer": "bogus"},
+    {"directories": ["."], "rules": ["no-such-pack"]},
+])
+def test_malformed_request_is_rejected_with_400(server, body):
+    status, data = post(server, body)
+    assert status == 400
+    assert data["error"]
+
+
+def test_invalid_regex_error_mentions_rule(server):
+    status, data = post(server, {"directories": ["."], "exclude": ["re:("]})
+    assert status == 400 and "re:(" in data["error"]
+
+
+def test_scan_job_reports_results(server, tmp_path):
+    (tmp_path / "open.php").write_text("<?php echo 1;", encoding="utf-8")
+    (tmp_path / "guarded.php").write_text("<?php session_start();", encoding="utf-8")
+    status, job = post(server, {"directories": [str(tmp_path)], "keywords": ["session"], "exclude": ["re:^x"]})
+    assert status == 202
+    data = wait_done(server, job["id"])
+    assert data["state"] == "done"
+    assert [r["path"] for r in data["records"]] == ["open.php"]
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from scanner_cli import main as cli_main
+from scanner_shard import EXIT_FOUND, EXIT_USAGE, ShardPartial, check_partials, main as merge_main, parse_shard
+from scanner_walk import shard_of
+
+
+def make_tree(root):
+    for n in range(40):
+        path = root / f"m{n % 4}" / ("sub" if n % 3 else "") / f"F{n}.php"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("<?php session_start();" if n % 5 else f"<?php echo {n};", encoding="utf-8")
+    return str(root)
+
+
+def verdicts(path):
+    with open(path, encoding="utf-8") as f:
+        return sorted((r["directory"], r["path"], r["verdict"]) for r in map(json.loads, f))
+
+
+def scan_shards(directory, tmp_path, shards):
+    partials = []
+    for shard in range(shards):
+        path = str(tmp_path / f"part{shard}.jsonl")
+        cli_main([directory, "-k", "session", "-w", "1", "-q", "--shard", f"{shard}/{shards}", "-o", path])
+        partials.append(path)
+    return partials
+
+
+def test_shard_of_is_stable_and_ignores_directory_spelling():
+    assert shard_of("app/admin", "a/B.php", 7) == shard_of("./app/admin/", "a/B.php", 7)
+    assert {shard_of("app", f"f{n}.php", 4) for n in range(200)} == {0, 1, 2, 3}
+    assert all(shard_of("app", f"f{n}.php", 1) == 0 for n in range(20))
+
+
+@pytest.mark.parametrize("text", ["4/4", "-1/2", "1", "a/b", "0/0"])
+def test_parse_shard_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_shard(text)
+
+
+@pytest.mark.parametrize("shards", [1, 3, 8])
+def test_merged_shards_equal_full_scan(tmp_path, shards):
+    directory = make_tree(tmp_path / "project")
+    full = str(tmp_path / "full.jsonl")
+    cli_main([directory, "-k", "session", "-w", "1", "-q", "-f", "jsonl", "--all", "-o", full])
+    partials = scan_shards(directory, tmp_path, shards)
+    merged = str(tmp_path / "merged.jsonl")
+    assert merge_main([*partials, "-o", merged, "-q"]) == EXIT_FOUND
+    assert verdicts(merged) == verdicts(full)
+    assert len(verdicts(full)) == 40
+
+
+def test_check_partials_reports_missing_duplicate_and_incomplete(tmp_path):
+    directory = make_tree(tmp_path / "project")
+    paths = scan_shards(directory, tmp_path, 3)
+
+    problems, _ = check_partials([ShardPartial(paths[0]), ShardPartial(paths[2])])
+    assert any("缺少 1 个分片" in p for p in problems)
+    problems, _ = check_partials([ShardPartial(p) for p in paths + [paths[1]]])
+    assert any("分片 1 重复" in p for p in problems)
+
+    with open(paths[1], encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(paths[1], "w", encoding="utf-8") as f:
+        f.writelines(lines[:-1])
+    problems, _ = check_partials([ShardPartial(p) for p in paths])
+    assert any("未完成" in p for p in problems)
+
+
+def test_check_partials_detects_new_file_and_other_job(tmp_path):
+    directory = make_tree(tmp_path / "project")
+    paths = scan_shards(directory, tmp_path, 2)
+    assert check_partials([ShardPartial(p) for p in paths]) == ([], [])
+
+    with open(os.path.join(directory, "m0", "New.php"), "w", encoding="utf-8") as f:
+        f.write("<?php echo 1;")
+    problems, _ = check_partials([ShardPartial(p) for p in paths])
+    assert any("未被任何分片覆盖" in p for p in problems)
+    assert check_partials([ShardPartial(p) for p in paths], verify=False) == ([], [])
+
+    other = str(tmp_path / "other.jsonl")
+    cli_main([directory, "-k", "auth", "-w", "1", "-q", "--shard", "1/2", "-o", other])
+    problems, _ = check_partials([ShardPartial(paths[0]), ShardPartial(other)], verify=False)
+    assert any("匹配规则指纹" in p for p in problems)
+    assert merge_main([paths[0], other, "-o", str(tmp_path / "x.txt"), "-q"]) == EXIT_USAGE
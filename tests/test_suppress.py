@@ -0,0 +1,79 @@
+import json
+
+import scanner_suppress
+from scanner_cache import ScanCache
+from scanner_core import PHPAuthScanner
+from scanner_index import IdentifierIndex
+from scanner_reader import VERDICT_NO_AUTH, VERDICT_SUPPRESSED, VERDICT_SUPPRESSED_CHANGED
+from scanner_suppress import SuppressionIndex
+
+
+def make_project(tmp_path):
+    for name in ("admin", "api"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "Index.php").write_text(f"<?php echo '{name}';", encoding="utf-8")
+    return [str(tmp_path / "admin"), str(tmp_path / "api")]
+
+
+def scan(directories, suppressions, **attributes):
+    scanner = PHPAuthScanner()
+    scanner.suppressions = suppressions
+    for name, value in attributes.items():
+        setattr(scanner, name, value)
+    pattern = scanner.generate_matcher(["session"])
+    return {(r.directory, r.path.rsplit("/", 1)[-1]): r.verdict for r in scanner.iter_records(directories, pattern)}
+
+
+def test_entries_are_keyed_by_directory(tmp_path):
+    directories = make_project(tmp_path)
+    index = SuppressionIndex(str(tmp_path / "suppressions.json"))
+    index.add(directories[0], "Index.php", scanner_suppress.file_digest(directories[0] + "/Index.php"))
+    verdicts = scan(directories, index)
+    assert verdicts[(directories[0], "Index.php")] == VERDICT_SUPPRESSED
+    assert verdicts[(directories[1], "Index.php")] == VERDICT_NO_AUTH
+
+    (tmp_path / "admin" / "Index.php").write_text("<?php echo 'changed';", encoding="utf-8")
+    assert scan(directories, index)[(directories[0], "Index.php")] == VERDICT_SUPPRESSED_CHANGED
+
+
+def test_apply_reuses_digest_from_scan(tmp_path, monkeypatch):
+    directories = make_project(tmp_path)
+    index = SuppressionIndex(str(tmp_path / "suppressions.json"))
+    for directory in directories:
+        index.add(directory, "Index.php", scanner_suppress.file_digest(directory + "/Index.php"))
+
+    def fail(path):
+        raise AssertionError(f"apply不应重新读取 {path}")
+
+    monkeypatch.setattr(scanner_suppress, "file_digest", fail)
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    index_db = IdentifierIndex(str(tmp_path / "index.sqlite3"))
+    for attributes in ({}, {"dedup": True}, {"cache": cache}, {"cache": cache}, {"index": index_db},
+                       {"index": index_db}):
+        assert set(scan(directories, index, **attributes).values()) == {VERDICT_SUPPRESSED}
+
+
+def test_save_and_load_roundtrip_and_legacy_format(tmp_path):
+    directories = make_project(tmp_path)
+    path = str(tmp_path / "suppressions.json")
+    index = SuppressionIndex(path)
+    index.add(directories[1], "Index.php", None, "回调接口")
+    index.save()
+    assert SuppressionIndex(path).entries == index.entries
+
+    # 旧版只有相对路径的条目对所有扫描目录生效
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "files": {"Index.php": {"digest": None}}}, f)
+    assert set(scan(directories, SuppressionIndex(path)).values()) == {VERDICT_SUPPRESSED}
+
+
+def test_import_report_registers_scan_directory(tmp_path):
+    directories = make_project(tmp_path)
+    report = tmp_path / "report.jsonl"
+    report.write_text(json.dumps({"directory": directories[0], "path": "Index.php", "verdict": VERDICT_NO_AUTH}) + "\n",
+                      encoding="utf-8")
+    index = SuppressionIndex(str(tmp_path / "suppressions.json"))
+    assert index.import_report(str(report)) == (1, 0)
+    verdicts = scan(directories, index)
+    assert verdicts[(directories[0], "Index.php")] == VERDICT_SUPPRESSED
+    assert verdicts[(directories[1], "Index.php")] == VERDICT_NO_AUTH
@@ -0,0 +1,91 @@
+from scanner_reader import VERDICT_AUTH, VERDICT_ERROR, VERDICT_NO_AUTH
+from scanner_results import ScanRecord
+from scanner_view import ROW_GROUP, ROW_RECORD, SORT_PATH, SORT_VERDICT, ResultStore
+
+
+def record(directory, name, verdict=VERDICT_NO_AUTH, **fields):
+    return ScanRecord(directory, f"{directory}/{name}", verdict, **fields)
+
+
+def make_store():
+    store = ResultStore()
+    for r in (record("/a", "c/One.php"), record("/b", "Two.php", VERDICT_AUTH), record("/a", "Three.php"),
+              record("/b", "Four.php", VERDICT_ERROR), record("/a", "c/Five.php", VERDICT_AUTH)):
+        store.add(r)
+    return store
+
+
+def names(rows):
+    return [row[1].path.rsplit("/", 1)[-1] if row[0] == ROW_RECORD else row[1:] for row in rows]
+
+
+def test_add_groups_by_directory_in_discovery_order():
+    store = make_store()
+    assert len(store) == 5 and store.visible_count() == 5 and store.row_count() == 7
+    assert names(store.rows(0, 100)) == [
+        ("/a", 3, False), "One.php", "Three.php", "Five.php",
+        ("/b", 2, False), "Two.php", "Four.php"]
+    # 同一文件再次添加时替换原结果
+    store.add(record("/a", "Three.php", VERDICT_AUTH))
+    assert len(store) == 5
+    assert [row[1].verdict for row in store.rows(0, 100) if row[0] == ROW_RECORD and
+            row[1].path == "/a/Three.php"] == [VERDICT_AUTH]
+    assert list(store.found()) == [("/a", "c/One.php")]
+
+
+def test_filter_by_prefix_and_verdict():
+    store = make_store()
+    store.set_view(prefix="c/")
+    assert names(store.rows(0, 100)) == [("/a", 2, False), "One.php", "Five.php"]
+    store.set_view(prefix="/b/T")
+    assert names(store.rows(0, 100)) == [("/b", 1, False), "Two.php"]
+    store.set_view(verdicts=[VERDICT_NO_AUTH, VERDICT_ERROR])
+    assert names(store.rows(0, 100)) == [("/a", 2, False), "One.php", "Three.php", ("/b", 1, False), "Four.php"]
+    # 过滤期间新增的结果按条件决定是否显示
+    store.add(record("/b", "Six.php", VERDICT_AUTH))
+    store.add(record("/b", "Seven.php"))
+    assert store.visible_count() == 4
+    assert store.discard("/a/c/One.php") and not store.discard("/a/c/One.php")
+    assert names(store.rows(0, 100)) == [("/a", 1, False), "Three.php", ("/b", 2, False), "Four.php", "Seven.php"]
+
+
+def test_sort_and_collapse():
+    store = make_store()
+    store.set_view(sort=SORT_PATH)
+    assert names(store.rows(0, 4)) == [("/a", 3, False), "Three.php", "Five.php", "One.php"]
+    store.set_view(sort=SORT_VERDICT, reverse=True)
+    assert names(store.rows(0, 100)) == [
+        ("/b", 2, False), "Two.php", "Four.php", ("/a", 3, False), "Five.php", "Three.php", "One.php"]
+    store.set_view()
+    store.toggle("/a")
+    assert store.row_count() == 4
+    assert names(store.rows(0, 100)) == [("/a", 3, True), ("/b", 2, False), "Two.php", "Four.php"]
+
+
+def test_row_window():
+    store = ResultStore()
+    for d in range(3):
+        for i in range(10):
+            store.add(record(f"/d{d}", f"F{i}.php"))
+    rows = [row[1] if row[0] == ROW_GROUP else row[1].path for row in store.rows(0, store.row_count())]
+    assert len(rows) == store.row_count() == 33
+    # 任意窗口取出的行与完整列表的对应切片一致
+    for start in range(0, 34):
+        for size in (1, 5, 11, 40):
+            window = [row[1] if row[0] == ROW_GROUP else row[1].path for row in store.rows(start, start + size)]
+            assert window == rows[start:start + size]
+    assert store.rows(33, 40) == [] and store.rows(5, 5) == []
+
+
+def test_duplicates_merge_into_first_file():
+    store = ResultStore()
+    store.add(record("/a", "Open.php"))
+    store.add(record("/b", "Open.php", duplicate_of="/a/Open.php"))
+    store.add(record("/b", "Auth.php", VERDICT_AUTH, duplicate_of="/a/Open.php"))
+    assert store.copies("/a/Open.php") == ["/b/Open.php"]
+    assert store.duplicates() == {("/a", "Open.php"): [("/b", "Open.php")]}
+    assert names(store.rows(0, 100)) == [("/a", 1, False), "Open.php", ("/b", 1, False), "Auth.php"]
+    # 首个文件移除后由内容相同的下一个文件代替显示
+    store.discard("/a/Open.php")
+    assert store.copies("/b/Open.php") == ()
+    assert names(store.rows(0, 100)) == [("/b", 2, False), "Open.php", "Auth.php"]
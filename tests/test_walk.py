@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from scanner_core import PHPAuthScanner
+from scanner_walk import FileWalker, compile_rules
+
+
+def write(path, text="<?php echo 1;"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_invalid_regex_rule_raises_value_error():
+    with pytest.raises(ValueError, match="re:\\("):
+        compile_rules(["re:("])
+    with pytest.raises(ValueError):
+        FileWalker(include=["re:[a-"])
+
+
+def test_glob_and_regex_rules_exclude_files(tmp_path):
+    write(tmp_path / "keep.php")
+    write(tmp_path / "vendor" / "lib.php")
+    write(tmp_path / "view.tpl.php")
+    walker = FileWalker(exclude=["vendor", "re:.*\\.tpl\\.php$"])
+    assert [os.path.basename(p) for p in walker.iter_files(str(tmp_path))] == ["keep.php"]
+
+
+def test_discover_controller_dirs_uses_given_walker(tmp_path):
+    write(tmp_path / "app" / "admin" / "controller" / "Index.php")
+    write(tmp_path / "vendor" / "pkg" / "controller" / "Base.php")
+    scanner = PHPAuthScanner()
+    original = scanner.walker
+    found = [os.path.relpath(d, tmp_path) for d, _ in
+             scanner.discover_controller_dirs([str(tmp_path)], walker=FileWalker(exclude=["vendor"]))]
+    assert found == [os.path.join("app", "admin", "controller")]
+    # 传入的walker只用于本次查找，不替换扫描器正在使用的walker
+    assert scanner.walker is original
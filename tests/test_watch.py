@@ -0,0 +1,58 @@
+import os
+
+from scanner_core import PHPAuthScanner
+from scanner_reader import VERDICT_AUTH, VERDICT_NO_AUTH
+from scanner_watch import UPDATE_ADDED, UPDATE_CHANGED, UPDATE_REMOVED, PollingBackend, ScanWatcher
+
+
+def write(path, text):
+    """写入文件并推后修改时间，避免与上次轮询落在同一时间戳内"""
+    existed = path.exists()
+    path.write_text(text, encoding="utf-8")
+    if existed:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+def start(tmp_path):
+    for name, text in {"Auth.php": "<?php session_start();", "Edit.php": "<?php echo 1;",
+                       "Gone.php": "<?php echo 2;"}.items():
+        write(tmp_path / name, text)
+    scanner = PHPAuthScanner()
+    watcher = ScanWatcher(scanner, [str(tmp_path)], scanner.generate_matcher(["session"]), poll_interval=0.01)
+    verdicts = {os.path.basename(r.path): r.verdict for r in watcher.iter_records()}
+    assert verdicts == {"Auth.php": VERDICT_AUTH, "Edit.php": VERDICT_NO_AUTH, "Gone.php": VERDICT_NO_AUTH}
+    assert isinstance(watcher.backend, PollingBackend)
+    # 记录此后实际重新判定的文件
+    evaluated = []
+    scanner.on_file_start = evaluated.append
+    return watcher, evaluated
+
+
+def test_only_changed_paths_are_reevaluated(tmp_path):
+    watcher, evaluated = start(tmp_path)
+    untouched = watcher.records[str(tmp_path / "Auth.php")]
+    write(tmp_path / "Edit.php", "<?php $_SESSION['uid'];")
+    write(tmp_path / "New.php", "<?php session('uid');")
+    os.remove(tmp_path / "Gone.php")
+
+    updates = watcher.wait(5)
+    assert sorted(os.path.basename(p) for p in evaluated) == ["Edit.php", "New.php"]
+    assert watcher.last_rescan[0] == 3
+    assert sorted((u.kind, os.path.basename((u.record or u.previous).path)) for u in updates) == [
+        (UPDATE_ADDED, "New.php"), (UPDATE_CHANGED, "Edit.php"), (UPDATE_REMOVED, "Gone.php")]
+    changed = next(u for u in updates if u.kind == UPDATE_CHANGED)
+    assert (changed.previous.verdict, changed.record.verdict) == (VERDICT_NO_AUTH, VERDICT_AUTH)
+    assert watcher.records[str(tmp_path / "Auth.php")] is untouched
+    assert sorted(os.path.basename(p) for p in watcher.records) == ["Auth.php", "Edit.php", "New.php"]
+
+
+def test_same_verdict_produces_no_update(tmp_path):
+    watcher, evaluated = start(tmp_path)
+    assert watcher.wait(0.05) == []
+    assert evaluated == [] and watcher.last_rescan is None
+    # 内容变化但判定不变的文件会重新判定，但不产出更新
+    write(tmp_path / "Edit.php", "<?php echo 3;")
+    assert watcher.wait(5) == []
+    assert watcher.last_rescan[0] == 1
+    assert [os.path.basename(p) for p in evaluated] == ["Edit.php"]